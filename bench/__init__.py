@@ -0,0 +1,13 @@
+"""
+Benchmarks de carga contra un Postgres local desechable.
+
+    python -m bench.carga [--meses 6] [--ventas-dia 400] [--duracion 30]
+                          [--salida bench/resultados/base.json]
+                          [--comparar bench/resultados/base.json]
+
+Levanta un Postgres temporal (paquete `pgserver`, o `initdb`/`pg_ctl` del
+PATH / PG_BIN), carga db.txt, genera datos sintéticos reproducibles y maneja
+la app FastAPI en el mismo proceso con cargas concurrentes de POS y de
+reportes. Escribe p50/p95/p99 y throughput por endpoint en un JSON que se
+puede comparar entre commits.
+"""
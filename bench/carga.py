@@ -0,0 +1,310 @@
+"""
+Corre el benchmark completo: Postgres temporal, datos sintéticos y cargas
+concurrentes de POS y reportes sobre la app en el mismo proceso.
+
+    python -m bench.carga --help
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+from pathlib import Path
+from bench.postgres import postgres_temporal
+
+logger = logging.getLogger("bench")
+
+RAIZ = Path(__file__).resolve().parent.parent
+BASE_BENCH = "cafeteria_bench"
+
+
+class Registro:
+    """Latencias (ms) y errores por endpoint durante la fase medida."""
+
+    def __init__(self):
+        self.latencias: dict[str, list[float]] = defaultdict(list)
+        self.errores: dict[str, int] = defaultdict(int)
+        self.activo = False
+
+    async def medir(self, nombre, peticion):
+        inicio = time.perf_counter()
+        respuesta = await peticion
+        ms = (time.perf_counter() - inicio) * 1000
+        if self.activo:
+            self.latencias[nombre].append(ms)
+            if respuesta.status_code >= 400:
+                self.errores[nombre] += 1
+        return respuesta
+
+
+def _percentil(ordenados, p):
+    return round(ordenados[min(len(ordenados) - 1, int(len(ordenados) * p))], 2)
+
+
+def resumir(registro: Registro, duracion: float) -> dict:
+    resultado = {}
+    for nombre, latencias in sorted(registro.latencias.items()):
+        ordenados = sorted(latencias)
+        resultado[nombre] = {
+            "peticiones": len(ordenados),
+            "errores": registro.errores[nombre],
+            "rps": round(len(ordenados) / duracion, 2),
+            "p50": _percentil(ordenados, 0.50),
+            "p95": _percentil(ordenados, 0.95),
+            "p99": _percentil(ordenados, 0.99),
+            "max": round(ordenados[-1], 2),
+        }
+    return resultado
+
+
+# ---------- Cargas ----------
+
+async def _pos(cliente, registro: Registro, fin: float, rnd: random.Random, datos: dict):
+    """Un cajero: ventas, catálogo (con ETag), búsqueda de clientes y consultas de tickets."""
+    etag = None
+    while time.perf_counter() < fin:
+        r = rnd.random()
+        if r < 0.45:
+            productos = rnd.sample(range(1, datos["productos"] + 1), rnd.randint(1, 3))
+            await registro.medir("POST /venta/", cliente.post("/venta/", json={
+                "id_usuario": rnd.randint(1, datos["empleados"]),
+                "id_cliente": 1 if rnd.random() < 0.6 else rnd.randint(2, datos["clientes"]),
+                "id_estado": 1,
+                "metodo_pago": rnd.choice(["EFECTIVO", "QR", "TARJETA"]),
+                "detalles": [
+                    {"id_producto": p, "cantidad": rnd.randint(1, 3), "precio_unitario": 10}
+                    for p in productos
+                ],
+            }))
+        elif r < 0.65:
+            cabeceras = {"If-None-Match": etag} if etag else {}
+            respuesta = await registro.medir("GET /producto/", cliente.get("/producto/", headers=cabeceras))
+            etag = respuesta.headers.get("etag", etag)
+        elif r < 0.85:
+            q = rnd.choice(datos["busquedas"])
+            await registro.medir("GET /cliente/buscar", cliente.get("/cliente/buscar", params={"q": q}))
+        elif r < 0.95:
+            id_venta = rnd.randint(1, datos["ventas"])
+            await registro.medir("GET /venta/{id_venta}", cliente.get(f"/venta/{id_venta}"))
+        elif r < 0.98:
+            ventas = [
+                {
+                    "id_local": str(uuid.UUID(int=rnd.getrandbits(128))),
+                    "id_usuario": rnd.randint(1, datos["empleados"]),
+                    "id_cliente": 1,
+                    "id_estado": 1,
+                    "metodo_pago": "EFECTIVO",
+                    "detalles": [{"id_producto": rnd.randint(1, datos["productos"]), "cantidad": 1,
+                                  "precio_unitario": 10}],
+                }
+                for _ in range(20)
+            ]
+            await registro.medir("POST /venta/lote", cliente.post("/venta/lote", json={"ventas": ventas}))
+        else:
+            await registro.medir("POST /auth/login", cliente.post("/auth/login", json={
+                "email": f"bench{rnd.randint(1, datos['empleados'])}@cafeteria.com",
+                "password": datos["password"],
+            }))
+
+
+async def _reportes(cliente, registro: Registro, fin: float, rnd: random.Random, datos: dict):
+    """Un administrador revisando reportes y exportando."""
+    desde, hasta = datos["desde"], datos["hasta"]
+    dias = (hasta - desde).days
+    while time.perf_counter() < fin:
+        inicio = desde + timedelta(days=rnd.randint(0, max(dias - 7, 0)))
+        semana = {"fecha_inicio": str(inicio), "fecha_fin": str(inicio + timedelta(days=6))}
+        r = rnd.random()
+        if r < 0.35:
+            await registro.medir("GET /venta/reporte/detallado",
+                                 cliente.get("/venta/reporte/detallado", params=semana))
+        elif r < 0.6:
+            await registro.medir("GET /venta/reporte/resumen", cliente.get(
+                "/venta/reporte/resumen", params={"fecha_inicio": str(desde), "fecha_fin": str(hasta)}))
+        elif r < 0.85:
+            dimension = rnd.choice(["producto", "usuario", "metodo_pago"])
+            await registro.medir("GET /venta/reporte/resumen/{dimension}", cliente.get(
+                f"/venta/reporte/resumen/{dimension}",
+                params={"fecha_inicio": str(desde), "fecha_fin": str(hasta)}))
+        else:
+            await registro.medir("GET /compra/reporte/detallado?formato=csv", cliente.get(
+                "/compra/reporte/detallado", params={**semana, "formato": "csv"}))
+
+
+async def _ejecutar_cargas(app, args, datos) -> tuple[dict, float]:
+    import httpx
+
+    registro = Registro()
+    transporte = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://bench", timeout=120) as cliente:
+        async def fase(segundos):
+            fin = time.perf_counter() + segundos
+            tareas = [
+                _pos(cliente, registro, fin, random.Random(args.semilla * 1000 + i), datos)
+                for i in range(args.cajeros)
+            ] + [
+                _reportes(cliente, registro, fin, random.Random(args.semilla * 2000 + i), datos)
+                for i in range(args.reportes)
+            ]
+            await asyncio.gather(*tareas)
+
+        logger.info(f"Calentamiento: {args.calentamiento}s")
+        await fase(args.calentamiento)
+
+        logger.info(f"Midiendo: {args.duracion}s con {args.cajeros} cajeros y {args.reportes} reportes")
+        registro.activo = True
+        inicio = time.perf_counter()
+        await fase(args.duracion)
+        duracion = time.perf_counter() - inicio
+
+    return resumir(registro, duracion), duracion
+
+
+# ---------- Comparación ----------
+
+def comparar(actual: dict, anterior: dict, tolerancia: float) -> bool:
+    """Imprime las diferencias por endpoint. Retorna False si algún p95 empeoró más que la tolerancia."""
+    ok = True
+    print(f"\n{'endpoint':45} {'p95 antes':>10} {'p95 ahora':>10} {'Δ p95':>8} {'Δ rps':>8}")
+    for nombre, ahora in actual["endpoints"].items():
+        antes = anterior["endpoints"].get(nombre)
+        if not antes:
+            print(f"{nombre:45} {'-':>10} {ahora['p95']:>10} {'nuevo':>8}")
+            continue
+        delta_p95 = (ahora["p95"] - antes["p95"]) / antes["p95"] if antes["p95"] else 0.0
+        delta_rps = (ahora["rps"] - antes["rps"]) / antes["rps"] if antes["rps"] else 0.0
+        marca = ""
+        if delta_p95 > tolerancia:
+            ok = False
+            marca = "  ← regresión"
+        print(f"{nombre:45} {antes['p95']:>10} {ahora['p95']:>10} {delta_p95:>+8.0%} {delta_rps:>+8.0%}{marca}")
+    return ok
+
+
+# ---------- Orquestación ----------
+
+def _git(*argumentos) -> str:
+    try:
+        return subprocess.run(["git", *argumentos], cwd=RAIZ, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+async def _preparar_base(socket, puerto, args) -> tuple[bool, dict]:
+    import psycopg
+    from psycopg.rows import dict_row
+    from bench.generador import Parametros, cargar_esquema, generar, NOMBRES, APELLIDOS, PASSWORD_BENCH
+
+    async with await psycopg.AsyncConnection.connect(
+        host=socket, port=puerto, user="postgres", dbname="postgres", autocommit=True
+    ) as conn:
+        await conn.execute(f"DROP DATABASE IF EXISTS {BASE_BENCH}")
+        await conn.execute(f"CREATE DATABASE {BASE_BENCH}")
+
+    parametros = Parametros(meses=args.meses, ventas_dia=args.ventas_dia, clientes=args.clientes,
+                            productos=args.productos, semilla=(args.semilla % 1000) / 1000)
+    async with await psycopg.AsyncConnection.connect(
+        host=socket, port=puerto, user="postgres", dbname=BASE_BENCH, row_factory=dict_row
+    ) as conn:
+        trgm = await cargar_esquema(conn)
+        inicio = time.perf_counter()
+        desde, hasta = await generar(conn, parametros)
+        logger.info(f"Generación de datos: {time.perf_counter() - inicio:.1f}s")
+        cur = await conn.execute("SELECT count(*) AS n FROM venta")
+        ventas = (await cur.fetchone())["n"]
+        cur = await conn.execute("SHOW server_version")
+        version_pg = (await cur.fetchone())["server_version"]
+
+    datos = {
+        "desde": desde, "hasta": hasta, "ventas": ventas,
+        "productos": parametros.productos, "clientes": parametros.clientes,
+        "empleados": parametros.empleados, "password": PASSWORD_BENCH,
+        "busquedas": [n[:3].lower() for n in NOMBRES] + [a[:4].lower() for a in APELLIDOS] + ["4000", "40001"],
+        "postgres": version_pg,
+    }
+    return trgm, datos
+
+
+async def _correr(socket, puerto, args) -> dict:
+    # La configuración de la app se lee de variables de entorno al importarla
+    # (el generador ya importa módulos de la app)
+    os.environ.update({
+        "HOST": "", "PORT": str(puerto), "USER": "postgres", "PASSWORD": "",
+        "DATABASE": BASE_BENCH, "PGHOST": socket, "LOG_NIVEL": "WARNING",
+    })
+    os.chdir(RAIZ)
+    sys.path.insert(0, str(RAIZ))
+
+    trgm, datos = await _preparar_base(socket, puerto, args)
+
+    from config.config import settings
+    settings.cliente_busqueda_trgm = trgm
+    import main
+
+    async with main.app.router.lifespan_context(main.app):
+        endpoints, duracion = await _ejecutar_cargas(main.app, args, datos)
+
+    return {
+        "meta": {
+            "commit": _git("rev-parse", "--short", "HEAD"),
+            "cambios_sin_commit": bool(_git("status", "--porcelain", "--untracked-files=no")),
+            "fecha": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "postgres": datos["postgres"],
+            "pg_trgm": trgm,
+            "parametros": {k: v for k, v in vars(args).items() if k not in ("salida", "comparar")},
+            "ventas_generadas": datos["ventas"],
+            "duracion_medida_s": round(duracion, 2),
+        },
+        "endpoints": endpoints,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de carga contra un Postgres local desechable")
+    parser.add_argument("--meses", type=int, default=6, help="meses de historial de ventas")
+    parser.add_argument("--ventas-dia", type=int, default=400)
+    parser.add_argument("--clientes", type=int, default=5000)
+    parser.add_argument("--productos", type=int, default=60)
+    parser.add_argument("--cajeros", type=int, default=16, help="workers concurrentes de POS")
+    parser.add_argument("--reportes", type=int, default=2, help="workers concurrentes de reportes")
+    parser.add_argument("--duracion", type=float, default=30, help="segundos medidos")
+    parser.add_argument("--calentamiento", type=float, default=3)
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--salida", type=Path, help="JSON de resultados (por defecto bench/resultados/<commit>.json)")
+    parser.add_argument("--comparar", type=Path, help="JSON de una corrida anterior para comparar")
+    parser.add_argument("--tolerancia", type=float, default=0.25,
+                        help="empeoramiento de p95 tolerado al comparar (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(name)s | %(message)s")
+    logging.getLogger("pgserver").setLevel(logging.WARNING)
+
+    with postgres_temporal() as (socket, puerto):
+        resultado = asyncio.run(_correr(socket, puerto, args))
+
+    salida = args.salida or RAIZ / "bench" / "resultados" / f"{resultado['meta']['commit'] or 'local'}.json"
+    salida.parent.mkdir(parents=True, exist_ok=True)
+    salida.write_text(json.dumps(resultado, indent=2, ensure_ascii=False, default=str), encoding="utf-8")
+
+    print(f"\n{'endpoint':45} {'n':>7} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'err':>5}")
+    for nombre, e in resultado["endpoints"].items():
+        print(f"{nombre:45} {e['peticiones']:>7} {e['rps']:>8} {e['p50']:>8} {e['p95']:>8} {e['p99']:>8} {e['errores']:>5}")
+    print(f"\nResultados en {salida}")
+
+    if args.comparar:
+        anterior = json.loads(args.comparar.read_text(encoding="utf-8"))
+        if not comparar(resultado, anterior, args.tolerancia):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+Generador de datos sintéticos para los benchmarks.
+
+Todo se genera en SQL (generate_series) con una semilla fija, así que dos
+corridas con los mismos parámetros producen los mismos datos.
+"""
+import logging
+from dataclasses import dataclass
+from datetime import date, timedelta
+from pathlib import Path
+import bcrypt
+from services.particiones import asegurar_particiones
+from services.resumen_service import reconstruir_rango
+
+logger = logging.getLogger(__name__)
+
+RAIZ = Path(__file__).resolve().parent.parent
+PASSWORD_BENCH = "bench123"
+
+NOMBRES = ["Ana", "Luis", "María", "Carlos", "Paola", "Jorge", "Lucía", "Diego", "Sofía", "Miguel",
+           "Valeria", "Andrés", "Camila", "Fernando", "Daniela", "Ricardo", "Gabriela", "Mario"]
+APELLIDOS = ["Mamani", "Quispe", "Flores", "Condori", "Choque", "Torrez", "Apaza", "Limachi",
+             "Rojas", "Vargas", "Gutiérrez", "Fernández", "López", "Pérez", "Gómez", "Cruz"]
+
+
+@dataclass
+class Parametros:
+    meses: int = 6
+    ventas_dia: int = 400
+    clientes: int = 5000
+    productos: int = 60
+    insumos: int = 40
+    empleados: int = 12
+    semilla: float = 0.42
+
+
+async def cargar_esquema(conn) -> bool:
+    """
+    Ejecuta db.txt. Si el servidor no trae pg_trgm se omiten la extensión y
+    sus índices. Retorna si quedó disponible la búsqueda por trigramas.
+    """
+    async with conn.cursor() as cur:
+        await cur.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        trgm = await cur.fetchone() is not None
+
+        lineas = (RAIZ / "db.txt").read_text(encoding="utf-8").splitlines()
+        if not trgm:
+            lineas = [l for l in lineas if "pg_trgm" not in l and "gin_trgm_ops" not in l]
+        await cur.execute("\n".join(lineas))
+    await conn.commit()
+    return trgm
+
+
+async def generar(conn, p: Parametros):
+    hasta = date.today()
+    desde = hasta - timedelta(days=30 * p.meses)
+    hash_bench = bcrypt.hashpw(PASSWORD_BENCH.encode(), bcrypt.gensalt()).decode()
+
+    async with conn.cursor() as cur:
+        # Un solo proceso para que random() siga la semilla en orden
+        await cur.execute("SET max_parallel_workers_per_gather = 0")
+        await cur.execute("SELECT setseed(%s)", (p.semilla,))
+
+        await cur.execute(
+            """
+            INSERT INTO rol (nombre) VALUES
+                ('Administrador'), ('Cajero'), ('Cocinero'), ('Mesero'),
+                ('Barista'), ('Encargado de Almacén'), ('Encargado de Limpieza')
+            """
+        )
+
+        # Empleados con usuario (bench1@cafeteria.com ... todos con PASSWORD_BENCH)
+        await cur.execute(
+            """
+            INSERT INTO personal (id_rol, ci, nombres, primer_apellido, activo, fecha_ingreso)
+            SELECT 1 + (g %% 6), 10000000 + g,
+                   (%(nombres)s::text[])[1 + g %% array_length(%(nombres)s::text[], 1)],
+                   (%(apellidos)s::text[])[1 + (g / 3) %% array_length(%(apellidos)s::text[], 1)],
+                   TRUE, %(desde)s
+            FROM generate_series(1, %(empleados)s) AS g
+            """,
+            {"nombres": NOMBRES, "apellidos": APELLIDOS, "desde": desde, "empleados": p.empleados}
+        )
+        await cur.execute(
+            """
+            INSERT INTO usuario (id_personal, email, password_hash, activo)
+            SELECT id_personal, 'bench' || id_personal || '@cafeteria.com', %s, TRUE
+            FROM personal
+            """,
+            (hash_bench,)
+        )
+
+        # Clientes: el 1 es "Cliente General", el resto con nombre y (casi siempre) NIT
+        await cur.execute(
+            """
+            INSERT INTO cliente (nombre, nit, activo)
+            SELECT
+                CASE WHEN g = 1 THEN 'Cliente General' ELSE
+                    (%(nombres)s::text[])[1 + floor(random() * array_length(%(nombres)s::text[], 1))::int]
+                    || ' ' ||
+                    (%(apellidos)s::text[])[1 + floor(random() * array_length(%(apellidos)s::text[], 1))::int]
+                END,
+                CASE WHEN g = 1 OR random() < 0.3 THEN NULL ELSE (4000000 + g * 7)::text END,
+                TRUE
+            FROM generate_series(1, %(clientes)s) AS g
+            """,
+            {"nombres": NOMBRES, "apellidos": APELLIDOS, "clientes": p.clientes}
+        )
+
+        await cur.execute(
+            """
+            INSERT INTO proveedor (nombre, nit, telefono, activo)
+            SELECT 'Proveedor ' || g, 1000000 + g, 70000000 + g, TRUE
+            FROM generate_series(1, 5) AS g
+            """
+        )
+        await cur.execute(
+            """
+            INSERT INTO categoria_producto (nombre) VALUES
+                ('Bebidas Calientes'), ('Bebidas Frías'), ('Sándwiches'),
+                ('Postres'), ('Desayunos'), ('Snacks')
+            """
+        )
+        await cur.execute(
+            """
+            INSERT INTO producto (id_categoria, nombre, costo, precio_venta, activo)
+            SELECT 1 + (g %% 6), 'Producto ' || g, c.costo, c.costo * 2, TRUE
+            FROM generate_series(1, %s) AS g
+            CROSS JOIN LATERAL (SELECT 2 + (g * 37 %% 150) / 10.0 AS costo) AS c
+            """,
+            (p.productos,)
+        )
+        await cur.execute(
+            """
+            INSERT INTO insumo (nombre, unidad, stock, activo)
+            SELECT 'Insumo ' || g, (ARRAY['g', 'ml', 'unidad'])[1 + g %% 3], 1000000, TRUE
+            FROM generate_series(1, %s) AS g
+            """,
+            (p.insumos,)
+        )
+
+        # Recetas: de 1 a 4 insumos por producto, elegidos de forma determinista
+        await cur.execute(
+            """
+            INSERT INTO receta (id_producto, id_insumo, cantidad)
+            SELECT pr.id_producto, i.id_insumo, round((1 + random() * 100)::numeric, 1)
+            FROM producto pr
+            CROSS JOIN LATERAL (
+                SELECT id_insumo FROM insumo
+                ORDER BY md5(pr.id_producto || '-' || id_insumo)
+                LIMIT 1 + pr.id_producto % 4
+            ) AS i
+            """
+        )
+
+        # Ventas: ventas_dia por día entre las 7 y las 21; 60% a "Cliente General"
+        await cur.execute(
+            """
+            INSERT INTO venta (id_usuario, id_cliente, id_estado, metodo_pago, fecha)
+            SELECT
+                1 + floor(random() * %(empleados)s)::int,
+                CASE WHEN random() < 0.6 THEN 1 ELSE 2 + floor(random() * (%(clientes)s - 1))::int END,
+                1,
+                (ARRAY['EFECTIVO', 'QR', 'TARJETA'])[1 + floor(random() * 3)::int],
+                d + interval '7 hours' + random() * interval '14 hours'
+            FROM generate_series(%(desde)s::date, %(hasta)s::date - 1, interval '1 day') AS d,
+                 generate_series(1, %(ventas_dia)s) AS n
+            ORDER BY 5
+            """,
+            {"empleados": p.empleados, "clientes": p.clientes, "desde": desde,
+             "hasta": hasta, "ventas_dia": p.ventas_dia}
+        )
+        # De 1 a 4 productos distintos por venta
+        await cur.execute(
+            """
+            INSERT INTO detalle_venta (id_venta, fecha_venta, id_producto, cantidad, precio_unitario)
+            SELECT v.id_venta, v.fecha, pr.id_producto, 1 + (v.id_venta + pr.id_producto) % 3, pr.precio_venta
+            FROM venta v
+            CROSS JOIN LATERAL (
+                SELECT id_producto, precio_venta FROM producto
+                ORDER BY md5(v.id_venta || '-' || id_producto)
+                LIMIT 1 + v.id_venta % 4
+            ) AS pr
+            """
+        )
+
+        # Una compra diaria de 5 insumos
+        await cur.execute(
+            """
+            INSERT INTO compra (id_proveedor, id_usuario, fecha, observacion)
+            SELECT 1 + (extract(doy FROM d)::int %% 5), 1, d + interval '6 hours', 'Compra sintética'
+            FROM generate_series(%s::date, %s::date - 1, interval '1 day') AS d
+            """,
+            (desde, hasta)
+        )
+        await cur.execute(
+            """
+            INSERT INTO detalle_compra (id_compra, id_insumo, cantidad, costo_unitario)
+            SELECT c.id_compra, i.id_insumo, 100 + (c.id_compra * i.id_insumo) % 900, 0.5
+            FROM compra c
+            CROSS JOIN LATERAL (
+                SELECT id_insumo FROM insumo ORDER BY md5(c.id_compra || '-' || id_insumo) LIMIT 5
+            ) AS i
+            """
+        )
+
+        await reconstruir_rango(cur, desde, hasta)
+        # db.txt solo trae las *_default: el historial se reparte en sus meses
+        # para que los benchmarks midan con poda de particiones
+        await asegurar_particiones(cur, desde, hasta)
+    await conn.commit()
+
+    await conn.set_autocommit(True)
+    async with conn.cursor() as cur:
+        await cur.execute("VACUUM ANALYZE")
+        await cur.execute("SELECT count(*) AS n FROM venta")
+        total = (await cur.fetchone())["n"]
+    await conn.set_autocommit(False)
+    logger.info(f"Datos generados: {total} ventas entre {desde} y {hasta}")
+    return desde, hasta
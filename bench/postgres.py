@@ -0,0 +1,67 @@
+import os
+import shutil
+import subprocess
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+PUERTO = 5432
+
+
+@contextmanager
+def _con_pgserver(directorio: Path):
+    import pgserver
+
+    servidor = pgserver.get_server(directorio, cleanup_mode="delete")
+    try:
+        uri = urlparse(servidor.get_uri())
+        yield parse_qs(uri.query)["host"][0], uri.port or PUERTO
+    finally:
+        servidor.cleanup()
+
+
+@contextmanager
+def _con_binarios(directorio: Path):
+    bin_pg = os.environ.get("PG_BIN")
+    initdb = shutil.which("initdb", path=bin_pg)
+    pg_ctl = shutil.which("pg_ctl", path=bin_pg)
+    if not initdb or not pg_ctl:
+        raise RuntimeError(
+            "No se encontró Postgres para el benchmark: instala `pgserver` "
+            "(pip install pgserver) o deja initdb/pg_ctl en el PATH o en PG_BIN."
+        )
+
+    datos = directorio / "data"
+    subprocess.run(
+        [initdb, "-D", datos, "-U", "postgres", "--auth=trust", "-E", "UTF8"],
+        check=True, capture_output=True
+    )
+    subprocess.run(
+        [pg_ctl, "-D", datos, "-w", "-l", directorio / "postgres.log",
+         "-o", f"-k {directorio} -c listen_addresses='' -p {PUERTO}", "start"],
+        check=True, capture_output=True
+    )
+    try:
+        yield str(directorio), PUERTO
+    finally:
+        subprocess.run([pg_ctl, "-D", datos, "-m", "fast", "stop"], capture_output=True)
+
+
+@contextmanager
+def postgres_temporal():
+    """
+    Levanta un Postgres en un directorio temporal, escuchando solo por socket
+    Unix, y lo borra al salir. Entrega (directorio_del_socket, puerto).
+    """
+    directorio = Path(tempfile.mkdtemp(prefix="cafeteria_bench_"))
+    try:
+        try:
+            import pgserver  # noqa: F401
+            servidor = _con_pgserver(directorio)
+        except ImportError:
+            servidor = _con_binarios(directorio)
+        with servidor as conexion:
+            yield conexion
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
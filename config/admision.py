@@ -0,0 +1,175 @@
+import asyncio
+import logging
+import time
+from collections import Counter, deque
+from enum import IntEnum
+from fastapi import HTTPException, Request, status
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Prioridad(IntEnum):
+    """Clases de admisión; el número más bajo es el más prioritario."""
+    POS      = 0    # cobro y pedidos del cajero/mesero
+    CATALOGO = 1    # catálogo y listados completos
+    REPORTES = 2    # reportes y exportaciones
+
+
+class _Clase:
+    def __init__(self, limite: int, cola_max: int):
+        self.limite = limite
+        self.cola_max = cola_max
+        self.en_curso = 0
+        self.cola: deque[asyncio.Future] = deque()
+        self.admitidos = 0
+        self.encolados = 0
+        self.rechazados: Counter = Counter()     # motivo -> cantidad
+        self.espera_total_ms = 0.0
+
+
+class ControlAdmision:
+    """
+    Limita cuántas peticiones de cada clase corren a la vez y cuántas en total
+    (`capacidad`). Las que no entran esperan en la cola de su clase; cuando se
+    libera un lugar pasa primero la cola del POS, luego la del catálogo y al
+    final la de reportes. Se responde 503 + Retry-After si la cola de la clase
+    está llena, si la capacidad está agotada y hay peticiones más prioritarias
+    esperando (se descarta primero lo menos importante) o si la espera pasa de
+    `espera_max`.
+    """
+
+    def __init__(self, capacidad: int, limites: dict[Prioridad, tuple[int, int]],
+                 espera_max: float, retry_after: int):
+        self.capacidad = capacidad
+        self.espera_max = espera_max
+        self.retry_after = retry_after
+        self.en_curso = 0
+        self._clases = {p: _Clase(*limites[p]) for p in sorted(Prioridad)}
+        self._encolados_ruta: Counter = Counter()
+        self._rechazados_ruta: Counter = Counter()
+
+    def _hay_lugar(self, clase: _Clase) -> bool:
+        return self.en_curso < self.capacidad and clase.en_curso < clase.limite
+
+    def _tomar(self, clase: _Clase):
+        self.en_curso += 1
+        clase.en_curso += 1
+        clase.admitidos += 1
+
+    def _rechazar(self, prioridad: Prioridad, ruta: str, motivo: str):
+        self._clases[prioridad].rechazados[motivo] += 1
+        self._rechazados_ruta[ruta] += 1
+        logger.warning(f"Admisión: {ruta} rechazada ({prioridad.name.lower()}, {motivo}), {self.en_curso} en curso")
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Servidor ocupado, intente nuevamente en unos segundos",
+            headers={"Retry-After": str(self.retry_after)},
+        )
+
+    async def entrar(self, prioridad: Prioridad, ruta: str):
+        clase = self._clases[prioridad]
+        # Las colas de otras clases que podían entrar ya se despertaron en salir(),
+        # así que basta con no adelantarse a la propia
+        if self._hay_lugar(clase) and not clase.cola:
+            self._tomar(clase)
+            return
+        saturado = self.en_curso >= self.capacidad
+        if saturado and any(c.cola for p, c in self._clases.items() if p < prioridad):
+            raise self._rechazar(prioridad, ruta, "prioridad")
+        if len(clase.cola) >= clase.cola_max:
+            raise self._rechazar(prioridad, ruta, "cola_llena")
+
+        turno = asyncio.get_running_loop().create_future()
+        clase.cola.append(turno)
+        clase.encolados += 1
+        self._encolados_ruta[ruta] += 1
+        inicio = time.perf_counter()
+        try:
+            async with asyncio.timeout(self.espera_max):
+                await turno
+        except (TimeoutError, asyncio.CancelledError) as e:
+            if turno.done() and not turno.cancelled():
+                # Se le dio el lugar justo cuando se rendía: devolverlo
+                self.salir(prioridad)
+            elif turno in clase.cola:
+                clase.cola.remove(turno)
+            if isinstance(e, TimeoutError):
+                raise self._rechazar(prioridad, ruta, "espera") from None
+            raise
+        finally:
+            clase.espera_total_ms += (time.perf_counter() - inicio) * 1000
+
+    def salir(self, prioridad: Prioridad):
+        self.en_curso -= 1
+        self._clases[prioridad].en_curso -= 1
+        self._despertar()
+
+    def _despertar(self):
+        for clase in self._clases.values():
+            while clase.cola and self._hay_lugar(clase):
+                turno = clase.cola.popleft()
+                if not turno.done():
+                    self._tomar(clase)
+                    turno.set_result(None)
+            if self.en_curso >= self.capacidad:
+                return
+
+    def metricas(self) -> dict:
+        return {
+            "capacidad": self.capacidad,
+            "en_curso": self.en_curso,
+            "espera_max_s": self.espera_max,
+            "clases": {
+                p.name.lower(): {
+                    "limite": c.limite,
+                    "cola_max": c.cola_max,
+                    "en_curso": c.en_curso,
+                    "en_cola": len(c.cola),
+                    "admitidos": c.admitidos,
+                    "encolados": c.encolados,
+                    "rechazados": dict(c.rechazados),
+                    "espera_promedio_ms": round(c.espera_total_ms / c.encolados, 2) if c.encolados else 0.0,
+                }
+                for p, c in self._clases.items()
+            },
+            "encolados_por_ruta": dict(self._encolados_ruta),
+            "rechazados_por_ruta": dict(self._rechazados_ruta),
+        }
+
+
+control = ControlAdmision(
+    capacidad=settings.admision_capacidad,
+    limites={
+        Prioridad.POS: (settings.admision_pos_limite, settings.admision_pos_cola),
+        Prioridad.CATALOGO: (settings.admision_catalogo_limite, settings.admision_catalogo_cola),
+        Prioridad.REPORTES: (settings.admision_reportes_limite, settings.admision_reportes_cola),
+    },
+    espera_max=settings.admision_espera_max,
+    retry_after=settings.admision_retry_after,
+)
+
+
+def admitir(prioridad: Prioridad):
+    """
+    Dependencia para `dependencies=[...]` de la ruta: ocupa un lugar de su
+    clase hasta que termina la respuesta (incluido el streaming). Debe ir
+    antes que get_conexion para no tomar conexión mientras espera.
+    """
+    async def dependencia(request: Request):
+        if not settings.admision_habilitada:
+            yield
+            return
+        endpoint = request.scope["endpoint"]
+        ruta = f"{endpoint.__module__.removeprefix('routers.')}.{endpoint.__name__}"
+        await control.entrar(prioridad, ruta)
+        try:
+            yield
+        finally:
+            control.salir(prioridad)
+
+    return dependencia
+
+
+def metricas() -> dict:
+    return {"habilitada": settings.admision_habilitada, **control.metricas()}
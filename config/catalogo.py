@@ -0,0 +1,58 @@
+import secrets
+from fastapi import HTTPException, Request, Response
+from .notificaciones import suscribir, notificar
+
+CANAL_CATALOGO = "catalogo_cambio"
+
+
+class VersionCatalogo:
+    """
+    Versión en memoria del catálogo (producto, categoria_producto, estado_venta, rol).
+
+    Los handlers de escritura de esos routers la incrementan tras el commit y
+    avisan a los demás workers por LISTEN/NOTIFY. El ETag lleva además un token
+    aleatorio por proceso: dos workers nunca comparten ETag, así que lo peor que
+    puede pasar al cambiar de worker es un 200 de más, nunca un 304 incorrecto.
+    """
+
+    def __init__(self):
+        self._token = secrets.token_hex(4)
+        self.version = 0
+
+    def invalidar(self, payload=None):
+        self.version += 1
+
+    @property
+    def etag(self) -> str:
+        return f'W/"{self._token}-{self.version}"'
+
+
+catalogo = VersionCatalogo()
+suscribir(CANAL_CATALOGO, catalogo.invalidar)
+
+
+async def publicar_cambio(cur):
+    """Avisa a todos los workers que el catálogo cambió. Llamar antes del commit."""
+    await notificar(cur, CANAL_CATALOGO)
+
+
+def _coincide(if_none_match: str, etag: str) -> bool:
+    etiquetas = [e.strip() for e in if_none_match.split(",")]
+    return "*" in etiquetas or etag in etiquetas or etag.removeprefix("W/") in etiquetas
+
+
+def verificar_catalogo(request: Request, response: Response):
+    """
+    Dependencia para los GET del catálogo: responde 304 si el cliente ya tiene
+    la versión vigente. Debe declararse en `dependencies=[...]` de la ruta para
+    resolverse antes que get_conexion y así no tomar conexión del pool.
+    """
+    # La versión se lee antes de consultar: si cambia durante la consulta,
+    # el cliente queda con un ETag viejo y la próxima vez recibe un 200.
+    cabeceras = {"ETag": catalogo.etag, "Cache-Control": "no-cache"}
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _coincide(if_none_match, cabeceras["ETag"]):
+        raise HTTPException(status_code=304, headers=cabeceras)
+
+    response.headers.update(cabeceras)
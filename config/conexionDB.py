@@ -1,32 +1,175 @@
+import asyncio
+import time
+from collections import deque
 from psycopg_pool import AsyncConnectionPool
 from psycopg.rows import dict_row
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, Depends
 from .config import settings
+from . import notificaciones, hashing
+from .medicion import CursorMedido, CursorServidorMedido
+from .respuestas import RespuestaJSON
+from services.receta_cache import recetas
+from services.stock_service import consolidar_periodicamente
+from services.pedidos_feed import feed as feed_pedidos
+from services.particiones import mantener_periodicamente as mantener_particiones
+from services.migraciones import aplicar_migraciones
 
 DB_URL = (
     f"postgresql://{settings.user}:{settings.password}"
     f"@{settings.host}:{settings.port}/{settings.database}"
 )
 
-pool = AsyncConnectionPool(conninfo=DB_URL, open=False)
+async def _configurar_conexion(conn):
+    # Se ejecuta una vez por conexión física, no en cada checkout
+    conn.row_factory = dict_row
+    # Cursores que suman su tiempo a la medición de la petición (Server-Timing)
+    conn.cursor_factory = CursorMedido
+    conn.server_cursor_factory = CursorServidorMedido
+
+pool = AsyncConnectionPool(
+    conninfo=DB_URL,
+    open=False,
+    min_size=settings.pool_min_size,
+    max_size=settings.pool_max_size,
+    max_idle=settings.pool_max_idle,
+    max_lifetime=settings.pool_max_lifetime,
+    timeout=settings.pool_timeout,
+    max_waiting=settings.pool_max_waiting,
+    check=AsyncConnectionPool.check_connection if settings.pool_check else None,
+    configure=_configurar_conexion,
+    kwargs={"connect_timeout": settings.connect_timeout},
+)
+
+# Reportes y exportaciones van por su propio pool: por muchos que corran a la
+# vez, las conexiones del POS (pool) quedan libres. Cada conexión abre sus
+# transacciones en solo lectura y corta las consultas que pasen del límite.
+pool_reportes = AsyncConnectionPool(
+    conninfo=settings.reportes_dsn or DB_URL,
+    open=False,
+    min_size=settings.reportes_pool_min_size,
+    max_size=settings.reportes_pool_max_size,
+    max_idle=settings.pool_max_idle,
+    max_lifetime=settings.pool_max_lifetime,
+    timeout=settings.reportes_pool_timeout,
+    check=AsyncConnectionPool.check_connection if settings.pool_check else None,
+    configure=_configurar_conexion,
+    kwargs={
+        "connect_timeout": settings.connect_timeout,
+        "application_name": "cafeteria_reportes",
+        "options": (
+            "-c default_transaction_read_only=on "
+            f"-c statement_timeout={settings.reportes_statement_timeout_ms}"
+        ),
+    },
+    name="reportes",
+)
+
+# Últimas esperas de checkout (ms) para calcular percentiles
+_esperas_checkout = deque(maxlen=2048)
+_esperas_checkout_reportes = deque(maxlen=2048)
+
+async def _cargar_caches():
+    try:
+        async with pool.connection() as conn:
+            await recetas.cargar(conn)
+    except Exception as e:
+        # Sin la carga inicial, la primera venta recargará el índice
+        print(f"⚠️ No se pudo precargar las recetas: {e}")
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    consolidacion = particiones = None
     try:
         await pool.open()
+        await pool_reportes.open()
         print("✅ Pool de conexiones abierto exitosamente")
+        if settings.migraciones_al_iniciar:
+            async with pool.connection() as conn:
+                await aplicar_migraciones(conn)
+        await notificaciones.iniciar(DB_URL, settings.connect_timeout)
+        feed_pedidos.iniciar(pool)
+        await _cargar_caches()
+        consolidacion = asyncio.create_task(
+            consolidar_periodicamente(pool, settings.consolidacion_stock_segundos)
+        )
+        particiones = asyncio.create_task(mantener_particiones(pool))
         yield
     finally:
+        tareas = [t for t in (consolidacion, particiones) if t]
+        for tarea in tareas:
+            tarea.cancel()
+        # Que una consolidación a medio transacción termine antes de cerrar el pool
+        await asyncio.gather(*tareas, return_exceptions=True)
+        await feed_pedidos.detener()
+        await notificaciones.detener()
+        hashing.cerrar()
+        await pool_reportes.close()
         await pool.close()
         print("🛑 Pool de conexiones cerrado")
 
-app = FastAPI(lifespan=lifespan)
+app = FastAPI(lifespan=lifespan, default_response_class=RespuestaJSON)
 
 # ✅ Add this function
 async def get_conexion():
+    inicio = time.perf_counter()
     async with pool.connection() as conn:
-        conn.row_factory = dict_row
+        _esperas_checkout.append((time.perf_counter() - inicio) * 1000)
+        yield conn
+
+
+async def get_conexion_reportes():
+    """Conexión de solo lectura del pool de reportes (posiblemente una réplica)."""
+    inicio = time.perf_counter()
+    async with pool_reportes.connection() as conn:
+        _esperas_checkout_reportes.append((time.perf_counter() - inicio) * 1000)
         yield conn
 
+
+def _percentil(valores, p):
+    if not valores:
+        return 0.0
+    return round(valores[min(len(valores) - 1, int(len(valores) * p))], 2)
+
+
+def _checkout_ms(esperas) -> dict:
+    esperas = sorted(esperas)
+    return {
+        "muestras": len(esperas),
+        "p50": _percentil(esperas, 0.50),
+        "p95": _percentil(esperas, 0.95),
+        "p99": _percentil(esperas, 0.99),
+        "max": round(esperas[-1], 2) if esperas else 0.0,
+    }
+
+
+def metricas_pool() -> dict:
+    """
+    Estadísticas del pool (psycopg_pool) más la latencia de checkout medida en
+    get_conexion; en "reportes", lo mismo para el pool de reportes.
+    """
+    return {
+        "config": {
+            "min_size": pool.min_size,
+            "max_size": pool.max_size,
+            "max_idle": settings.pool_max_idle,
+            "max_lifetime": settings.pool_max_lifetime,
+            "timeout": settings.pool_timeout,
+            "max_waiting": settings.pool_max_waiting,
+        },
+        "estadisticas": pool.get_stats(),
+        "checkout_ms": _checkout_ms(_esperas_checkout),
+        "reportes": {
+            "config": {
+                "min_size": pool_reportes.min_size,
+                "max_size": pool_reportes.max_size,
+                "timeout": settings.reportes_pool_timeout,
+                "statement_timeout_ms": settings.reportes_statement_timeout_ms,
+                "replica": settings.reportes_dsn is not None,
+            },
+            "estadisticas": pool_reportes.get_stats(),
+            "checkout_ms": _checkout_ms(_esperas_checkout_reportes),
+        },
+    }
+
         
\ No newline at end of file
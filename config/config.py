@@ -35,6 +35,197 @@ class Configuracion(BaseSettings):
 
 
 
+    # Pool de conexiones a Postgres
+
+
+    pool_min_size: int = 4
+
+
+    pool_max_size: int = 10
+
+
+    pool_max_idle: float = 600
+
+
+    pool_max_lifetime: float = 3600
+
+
+    pool_timeout: float = 30          # espera máxima para obtener una conexión
+
+
+    pool_max_waiting: int = 0         # 0 = sin límite de peticiones en espera
+
+
+    pool_check: bool = True           # verificar la conexión antes de entregarla
+
+
+    connect_timeout: int = 10
+
+
+    # Hash de contraseñas (bcrypt) fuera del event loop
+
+
+    bcrypt_rounds: int = 12
+
+
+    hash_workers: int = 2
+
+
+    hash_max_pendientes: int = 64
+
+
+
+    # Cada cuántos segundos se suman los movimientos de stock al snapshot de insumo
+
+
+    consolidacion_stock_segundos: float = 30
+
+
+
+    # Búsqueda de clientes: pg_trgm para ranking por similitud y caché LRU de búsquedas
+
+
+    cliente_busqueda_trgm: bool = True
+
+
+    cliente_busqueda_cache: int = 1024
+
+
+    cliente_busqueda_ttl: float = 60
+
+
+
+    # Logging: cola acotada hacia un hilo escritor, un archivo por día en logs/ (app_AAAA-MM-DD.log)
+
+
+    log_nivel: str = "INFO"
+
+
+    log_formato: str = "texto"   # "texto" o "json"
+
+
+    log_cola_max: int = 10000
+
+
+    log_dias_retencion: int = 14
+
+
+
+    # Cabecera Server-Timing (tiempo total y de base de datos) en cada respuesta
+
+
+    server_timing: bool = True
+
+
+
+    # Caché de tokens JWT ya verificados (por hash del token, hasta su exp)
+
+
+    jwt_cache_max: int = 4096
+
+
+
+    # Ventas sin conexión sincronizadas por lote (POST /venta/lote)
+
+
+    venta_lote_max: int = 500
+
+
+
+    # Particiones mensuales de venta: cuántos meses por delante se crean al arrancar
+
+
+    particiones_meses_adelante: int = 2
+
+
+    # Espera máxima por los bloqueos al crear particiones; si no alcanza se reintenta a los N segundos
+
+
+    particiones_lock_timeout_ms: int = 2000
+
+
+    particiones_reintento_segundos: float = 300
+
+
+
+    # Aplicar al arrancar las migraciones pendientes de migraciones/ (si no: python -m services.migraciones aplicar)
+
+
+    migraciones_al_iniciar: bool = True
+
+
+
+    # Compresión gzip de respuestas de la API: tamaño mínimo (bytes) y nivel 1-9
+
+
+    gzip_tamano_minimo: int = 1024
+
+
+    gzip_nivel: int = 6
+
+
+
+    # Pool aparte para reportes: transacciones de solo lectura con su propio statement_timeout.
+    # reportes_dsn puede apuntar a una réplica de lectura; vacío = la misma base del POS
+
+
+    reportes_dsn: str | None = None
+
+
+    reportes_pool_min_size: int = 1
+
+
+    reportes_pool_max_size: int = 3
+
+
+    reportes_pool_timeout: float = 30
+
+
+    reportes_statement_timeout_ms: int = 60000
+
+
+
+    # Control de admisión: peticiones en curso entre todas las clases (POS > catálogo > reportes);
+    # al liberarse un lugar pasa primero la cola más prioritaria
+
+
+    admision_habilitada: bool = True
+
+
+    admision_capacidad: int = 12
+
+
+    # Por clase: máximo en curso y máximo en cola (pasada la cola responde 503 + Retry-After)
+
+
+    admision_pos_limite: int = 12
+
+
+    admision_pos_cola: int = 100
+
+
+    admision_catalogo_limite: int = 6
+
+
+    admision_catalogo_cola: int = 24
+
+
+    admision_reportes_limite: int = 2
+
+
+    admision_reportes_cola: int = 4
+
+
+    # Segundos que una petición puede esperar en cola, y los que se sugieren en Retry-After
+
+
+    admision_espera_max: float = 10
+
+
+    admision_retry_after: int = 5
+
+
+
 
 
     model_config = SettingsConfigDict(
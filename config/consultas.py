@@ -0,0 +1,55 @@
+import time
+
+# nombre -> ConsultaPreparada, para reportar métricas de todos los caminos calientes
+_registro: dict[str, "ConsultaPreparada"] = {}
+
+
+class ConsultaPreparada:
+    """
+    SQL de un camino caliente (login, catálogo, venta).
+    Se ejecuta con prepare=True, así psycopg hace PREPARE una sola vez por
+    conexión del pool y las siguientes llamadas se saltan el parse/plan.
+    Lleva su propio conteo de llamadas y latencia.
+    """
+
+    def __init__(self, nombre: str, sql: str):
+        self.nombre = nombre
+        self.sql = sql
+        self.llamadas = 0
+        self.errores = 0
+        self.tiempo_total_ms = 0.0
+        self.tiempo_max_ms = 0.0
+        _registro[nombre] = self
+
+    async def ejecutar(self, cur, params=None):
+        inicio = time.perf_counter()
+        try:
+            await cur.execute(self.sql, params, prepare=True)
+        except Exception:
+            self.errores += 1
+            raise
+        finally:
+            duracion = (time.perf_counter() - inicio) * 1000
+            self.llamadas += 1
+            self.tiempo_total_ms += duracion
+            self.tiempo_max_ms = max(self.tiempo_max_ms, duracion)
+        return cur
+
+
+def metricas() -> list[dict]:
+    """Llamadas y latencia por consulta registrada, de mayor a menor tiempo total."""
+    return sorted(
+        (
+            {
+                "nombre": c.nombre,
+                "llamadas": c.llamadas,
+                "errores": c.errores,
+                "tiempo_total_ms": round(c.tiempo_total_ms, 2),
+                "tiempo_promedio_ms": round(c.tiempo_total_ms / c.llamadas, 3) if c.llamadas else 0.0,
+                "tiempo_max_ms": round(c.tiempo_max_ms, 2),
+            }
+            for c in _registro.values()
+        ),
+        key=lambda m: m["tiempo_total_ms"],
+        reverse=True,
+    )
@@ -0,0 +1,190 @@
+"""
+Frontend estático (/app): build con huellas y precompresión, y el StaticFiles
+que lo sirve.
+
+    python -m config.estaticos
+
+copia fontend/ a fontend_dist/ renombrando cada .css y .js con un hash de su
+contenido (css/styles.3f2a9c1b7e.css), reescribe las referencias de los .html
+y deja al lado de cada archivo de texto su versión .gz (y .br si está
+instalado `brotli`). Los archivos con huella se sirven con Cache-Control
+immutable por un año; los .html y el resto con no-cache (se revalidan con
+ETag). Si fontend_dist/ no existe o es más viejo que fontend/, se sirve
+fontend/ tal cual y la compresión queda a cargo del GZipMiddleware.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import posixpath
+import re
+import shutil
+from pathlib import Path
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse
+
+try:
+    import brotli
+except ImportError:  # Sin brotli solo se generan .gz
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+RAIZ = Path(__file__).resolve().parent.parent
+FUENTE = RAIZ / "fontend"
+DIST = RAIZ / "fontend_dist"
+MANIFIESTO = "manifest.json"
+
+CON_HUELLA = {".css", ".js"}
+COMPRIMIBLES = {".html", ".css", ".js", ".json", ".svg", ".txt"}
+TAMANO_MINIMO_COMPRIMIR = 256
+OMITIR = {"README.md"}
+
+CACHE_INMUTABLE = "public, max-age=31536000, immutable"
+CACHE_REVALIDAR = "no-cache"
+
+# (codificación, extensión) en orden de preferencia
+VARIANTES = (("br", ".br"), ("gzip", ".gz"))
+
+_REFERENCIA = re.compile(r'(\b(?:src|href)=")([^"?#:]+\.(?:css|js))(")')
+
+
+# ---- Build ----
+
+def _archivos(origen: Path) -> list[Path]:
+    return sorted(p for p in origen.rglob("*") if p.is_file() and p.name not in OMITIR)
+
+
+def _reescribir_html(texto: str, rel_html: str, manifiesto: dict[str, str]) -> str:
+    base = posixpath.dirname(rel_html)
+
+    def reemplazar(m):
+        destino = posixpath.normpath(posixpath.join(base, m.group(2)))
+        if destino not in manifiesto:
+            return m.group(0)
+        return m.group(1) + posixpath.relpath(manifiesto[destino], base or ".") + m.group(3)
+
+    return _REFERENCIA.sub(reemplazar, texto)
+
+
+def _precomprimir(ruta: Path, contenido: bytes):
+    # mtime=0: el mismo contenido produce el mismo .gz en cada build
+    variantes = {".gz": gzip.compress(contenido, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variantes[".br"] = brotli.compress(contenido, quality=11)
+    for extension, comprimido in variantes.items():
+        if len(comprimido) < len(contenido):
+            ruta.with_name(ruta.name + extension).write_bytes(comprimido)
+
+
+def construir(origen: Path = FUENTE, destino: Path = DIST) -> dict[str, str]:
+    """Genera `destino` desde cero y lo reemplaza de una vez. Retorna el manifiesto {original: con_huella}."""
+    archivos = _archivos(origen)
+    manifiesto = {}
+    for ruta in archivos:
+        if ruta.suffix in CON_HUELLA:
+            rel = ruta.relative_to(origen).as_posix()
+            huella = hashlib.sha256(ruta.read_bytes()).hexdigest()[:10]
+            manifiesto[rel] = f"{rel[:-len(ruta.suffix)]}.{huella}{ruta.suffix}"
+
+    temporal = destino.with_name(destino.name + ".tmp")
+    shutil.rmtree(temporal, ignore_errors=True)
+    for ruta in archivos:
+        rel = ruta.relative_to(origen).as_posix()
+        contenido = ruta.read_bytes()
+        if ruta.suffix == ".html":
+            contenido = _reescribir_html(contenido.decode("utf-8"), rel, manifiesto).encode("utf-8")
+        # Los .css/.js se dejan también con su nombre original por si algo los pide sin huella
+        for nombre in {rel, manifiesto.get(rel, rel)}:
+            salida = temporal / nombre
+            salida.parent.mkdir(parents=True, exist_ok=True)
+            salida.write_bytes(contenido)
+            if ruta.suffix in COMPRIMIBLES and len(contenido) >= TAMANO_MINIMO_COMPRIMIR:
+                _precomprimir(salida, contenido)
+    (temporal / MANIFIESTO).write_text(json.dumps(manifiesto, indent=2, sort_keys=True), encoding="utf-8")
+
+    anterior = destino.with_name(destino.name + ".old")
+    shutil.rmtree(anterior, ignore_errors=True)
+    if destino.exists():
+        destino.rename(anterior)
+    temporal.rename(destino)
+    shutil.rmtree(anterior, ignore_errors=True)
+    logger.info(f"Frontend construido en {destino}: {len(archivos)} archivos, {len(manifiesto)} con huella")
+    return manifiesto
+
+
+def directorio_frontend(origen: Path = FUENTE, dist: Path = DIST) -> Path:
+    """fontend_dist/ si está construido y al día; si no, fontend/."""
+    manifiesto = dist / MANIFIESTO
+    if not manifiesto.exists():
+        return origen
+    construido = manifiesto.stat().st_mtime
+    if any(p.stat().st_mtime > construido for p in _archivos(origen)):
+        logger.warning(f"{dist} es más viejo que {origen}; se sirve sin precompresión. Ejecute: python -m config.estaticos")
+        return origen
+    return dist
+
+
+# ---- Servir ----
+
+def _acepta(cabeceras: Headers, codificacion: str) -> bool:
+    for parte in cabeceras.get("accept-encoding", "").lower().split(","):
+        nombre, _, parametro = parte.partition(";")
+        if nombre.strip() != codificacion:
+            continue
+        q = parametro.strip().removeprefix("q=")
+        try:
+            return float(q or 1) > 0
+        except ValueError:
+            return True
+    return False
+
+
+class EstaticosPrecomprimidos(StaticFiles):
+    """
+    StaticFiles que entrega el .br/.gz precomprimido cuando el cliente lo
+    acepta y pone Cache-Control según el archivo tenga huella o no.
+    """
+
+    def __init__(self, *, directory: Path, **kwargs):
+        super().__init__(directory=directory, **kwargs)
+        manifiesto = Path(directory) / MANIFIESTO
+        self.inmutables = set(json.loads(manifiesto.read_text(encoding="utf-8")).values()) if manifiesto.exists() else set()
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope, status_code: int = 200) -> Response:
+        cabeceras = Headers(scope=scope)
+        respuesta = None
+        for codificacion, extension in VARIANTES:
+            if not _acepta(cabeceras, codificacion):
+                continue
+            comprimido = f"{full_path}{extension}"
+            try:
+                stat_comprimido = os.stat(comprimido)
+            except FileNotFoundError:
+                continue
+            respuesta = FileResponse(
+                comprimido,
+                status_code=status_code,
+                stat_result=stat_comprimido,
+                media_type=mimetypes.guess_type(full_path)[0] or "text/plain",
+                # El GZipMiddleware no toca respuestas con Content-Encoding: Vary va aquí
+                headers={"Content-Encoding": codificacion, "Vary": "Accept-Encoding"},
+            )
+            break
+        if respuesta is None:
+            respuesta = FileResponse(full_path, status_code=status_code, stat_result=stat_result)
+
+        rel = Path(os.path.relpath(full_path, os.path.realpath(self.directory))).as_posix()
+        respuesta.headers["Cache-Control"] = CACHE_INMUTABLE if rel in self.inmutables else CACHE_REVALIDAR
+        if self.is_not_modified(respuesta.headers, cabeceras):
+            return NotModifiedResponse(respuesta.headers)
+        return respuesta
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(levelname)-8s | %(message)s")
+    construir()
@@ -0,0 +1,84 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+import bcrypt
+from fastapi import HTTPException, status
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# bcrypt libera el GIL mientras calcula, así que un pool de hilos acotado basta
+# para sacar el trabajo del event loop sin frenar las demás peticiones.
+_executor = ThreadPoolExecutor(max_workers=settings.hash_workers, thread_name_prefix="bcrypt")
+
+_metricas = {
+    "pendientes": 0,        # en cola + en ejecución
+    "max_pendientes": 0,
+    "completados": 0,
+    "rechazados": 0,
+    "espera_total_ms": 0.0,
+    "ejecucion_total_ms": 0.0,
+}
+
+
+async def _ejecutar(fn, *args):
+    if _metricas["pendientes"] >= settings.hash_max_pendientes:
+        _metricas["rechazados"] += 1
+        logger.warning(f"Pool de hash saturado ({_metricas['pendientes']} pendientes), petición rechazada")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Servicio de autenticación ocupado, intente nuevamente",
+            headers={"Retry-After": "1"},
+        )
+
+    encolado = time.perf_counter()
+
+    def tarea():
+        inicio = time.perf_counter()
+        resultado = fn(*args)
+        return resultado, inicio - encolado, time.perf_counter() - inicio
+
+    _metricas["pendientes"] += 1
+    _metricas["max_pendientes"] = max(_metricas["max_pendientes"], _metricas["pendientes"])
+    try:
+        resultado, espera, duracion = await asyncio.get_running_loop().run_in_executor(_executor, tarea)
+    finally:
+        _metricas["pendientes"] -= 1
+
+    _metricas["completados"] += 1
+    _metricas["espera_total_ms"] += espera * 1000
+    _metricas["ejecucion_total_ms"] += duracion * 1000
+    return resultado
+
+
+async def hashear_password(password: str) -> str:
+    """Genera el hash bcrypt de una contraseña con el costo configurado."""
+    salt = bcrypt.gensalt(rounds=settings.bcrypt_rounds)
+    hashed = await _ejecutar(bcrypt.hashpw, password.encode(), salt)
+    return hashed.decode()
+
+
+async def verificar_password(password: str, password_hash: str) -> bool:
+    """Compara una contraseña contra su hash bcrypt."""
+    return await _ejecutar(bcrypt.checkpw, password.encode(), password_hash.encode())
+
+
+def metricas() -> dict:
+    completados = _metricas["completados"] or 1
+    return {
+        "workers": settings.hash_workers,
+        "bcrypt_rounds": settings.bcrypt_rounds,
+        "limite_pendientes": settings.hash_max_pendientes,
+        "pendientes": _metricas["pendientes"],
+        "en_cola": max(0, _metricas["pendientes"] - settings.hash_workers),
+        "max_pendientes": _metricas["max_pendientes"],
+        "completados": _metricas["completados"],
+        "rechazados": _metricas["rechazados"],
+        "espera_promedio_ms": round(_metricas["espera_total_ms"] / completados, 2),
+        "ejecucion_promedio_ms": round(_metricas["ejecucion_total_ms"] / completados, 2),
+    }
+
+
+def cerrar():
+    _executor.shutdown(wait=False, cancel_futures=True)
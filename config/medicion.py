@@ -0,0 +1,144 @@
+import math
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass
+from psycopg import AsyncCursor, AsyncServerCursor
+
+
+@dataclass
+class Medicion:
+    """Tiempo de base de datos acumulado durante una petición."""
+    db_ms: float = 0.0
+    consultas: int = 0
+
+
+# Medición de la petición en curso; la fija el middleware de tiempos
+medicion_actual: ContextVar[Medicion | None] = ContextVar("medicion_actual", default=None)
+
+
+def _acumular(inicio: float):
+    medicion = medicion_actual.get()
+    if medicion is not None:
+        medicion.db_ms += (time.perf_counter() - inicio) * 1000
+        medicion.consultas += 1
+
+
+class CursorMedido(AsyncCursor):
+    """Cursor del pool que suma cada execute a la medición de la petición."""
+
+    async def execute(self, query, params=None, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            return await super().execute(query, params, **kwargs)
+        finally:
+            _acumular(inicio)
+
+
+class CursorServidorMedido(AsyncServerCursor):
+    """Igual que CursorMedido, contando además cada lote leído del cursor de servidor."""
+
+    async def execute(self, query, params=None, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            return await super().execute(query, params, **kwargs)
+        finally:
+            _acumular(inicio)
+
+    async def fetchmany(self, size=0):
+        inicio = time.perf_counter()
+        try:
+            return await super().fetchmany(size)
+        finally:
+            _acumular(inicio)
+
+
+class Histograma:
+    """
+    Histograma log-lineal al estilo HDR: cubetas de ancho relativo fijo (2 %),
+    así que cualquier percentil tiene un error acotado con memoria constante
+    (menos de mil cubetas entre 10 µs y 20 minutos).
+    """
+
+    _MINIMO_MS = 0.01
+    _FACTOR = 1.02
+    _LOG_FACTOR = math.log(_FACTOR)
+
+    def __init__(self):
+        self._cubetas: Counter = Counter()
+        self.cantidad = 0
+        self.suma = 0.0
+        self.maximo = 0.0
+
+    def registrar(self, ms: float):
+        indice = 0 if ms <= self._MINIMO_MS else int(math.log(ms / self._MINIMO_MS) / self._LOG_FACTOR) + 1
+        self._cubetas[indice] += 1
+        self.cantidad += 1
+        self.suma += ms
+        self.maximo = max(self.maximo, ms)
+
+    def percentil(self, p: float) -> float:
+        if not self.cantidad:
+            return 0.0
+        objetivo = math.ceil(self.cantidad * p)
+        acumulado = 0
+        for indice in sorted(self._cubetas):
+            acumulado += self._cubetas[indice]
+            if acumulado >= objetivo:
+                # Límite superior de la cubeta, sin pasar del máximo observado
+                return round(min(self._MINIMO_MS * self._FACTOR ** indice, self.maximo), 2)
+        return round(self.maximo, 2)
+
+    def resumen(self) -> dict:
+        return {
+            "p50": self.percentil(0.50),
+            "p90": self.percentil(0.90),
+            "p99": self.percentil(0.99),
+            "max": round(self.maximo, 2),
+            "promedio": round(self.suma / self.cantidad, 2) if self.cantidad else 0.0,
+        }
+
+
+class EstadisticaRuta:
+    def __init__(self):
+        self.total = Histograma()
+        self.db = Histograma()
+        self.consultas = 0
+        self.errores = 0
+
+    def registrar(self, total_ms: float, medicion: Medicion, status: int):
+        self.total.registrar(total_ms)
+        self.db.registrar(medicion.db_ms)
+        self.consultas += medicion.consultas
+        if status >= 500:
+            self.errores += 1
+
+
+# "MÉTODO /plantilla/{de}/ruta" -> estadísticas
+_rutas: dict[str, EstadisticaRuta] = {}
+
+
+def registrar_peticion(ruta: str, total_ms: float, medicion: Medicion, status: int):
+    estadistica = _rutas.get(ruta)
+    if estadistica is None:
+        estadistica = _rutas[ruta] = EstadisticaRuta()
+    estadistica.registrar(total_ms, medicion, status)
+
+
+def metricas() -> list[dict]:
+    filas = [
+        {
+            "ruta": ruta,
+            "peticiones": e.total.cantidad,
+            "errores_5xx": e.errores,
+            "consultas_promedio": round(e.consultas / e.total.cantidad, 2) if e.total.cantidad else 0.0,
+            "total_ms": e.total.resumen(),
+            "db_ms": e.db.resumen(),
+        }
+        for ruta, e in _rutas.items()
+    ]
+    return sorted(filas, key=lambda f: f["total_ms"]["p99"], reverse=True)
+
+
+def reiniciar():
+    _rutas.clear()
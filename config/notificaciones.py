@@ -0,0 +1,93 @@
+import asyncio
+import logging
+import psycopg
+from psycopg import sql
+
+logger = logging.getLogger(__name__)
+
+# canal -> lista de callbacks(payload). payload=None indica que la escucha se
+# reconectó y pudieron perderse notificaciones: el suscriptor debe resincronizar.
+_suscriptores: dict[str, list] = {}
+_tarea: asyncio.Task | None = None
+# Se marca cuando el primer LISTEN queda activo; iniciar() lo espera
+_escuchando: asyncio.Event | None = None
+_inicio_sin_escucha = False
+
+
+def suscribir(canal: str, callback):
+    """Registra un callback para las notificaciones de un canal de Postgres."""
+    _suscriptores.setdefault(canal, []).append(callback)
+
+
+async def notificar(cur, canal: str, payload: str = ""):
+    """
+    Encola un NOTIFY en la transacción actual.
+    Postgres lo entrega a los demás procesos solo cuando la transacción hace commit.
+    """
+    await cur.execute("SELECT pg_notify(%s, %s)", (canal, payload))
+
+
+def _despachar(canal: str, payload):
+    for callback in _suscriptores.get(canal, []):
+        try:
+            callback(payload)
+        except Exception as e:
+            logger.error(f"Error en suscriptor del canal '{canal}': {e}", exc_info=True)
+
+
+async def _escuchar(conninfo: str):
+    espera = 1
+    reconexion = False
+    while True:
+        try:
+            async with await psycopg.AsyncConnection.connect(conninfo, autocommit=True) as conn:
+                for canal in _suscriptores:
+                    await conn.execute(sql.SQL("LISTEN {}").format(sql.Identifier(canal)))
+                logger.info(f"Escuchando notificaciones en: {', '.join(_suscriptores)}")
+
+                # Si iniciar() dejó de esperar, las cachés se cargaron sin escucha
+                # activa y pudieron perder notificaciones: se resincronizan igual
+                if reconexion or _inicio_sin_escucha:
+                    for canal in _suscriptores:
+                        _despachar(canal, None)
+                reconexion = True
+                espera = 1
+                _escuchando.set()
+
+                async for notificacion in conn.notifies():
+                    _despachar(notificacion.channel, notificacion.payload)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Conexión de notificaciones perdida: {e}. Reintentando en {espera}s")
+            await asyncio.sleep(espera)
+            espera = min(espera * 2, 30)
+
+
+async def iniciar(conninfo: str, espera_max: float = 10):
+    """
+    Lanza la tarea de escucha (una conexión dedicada, fuera del pool) y espera
+    a que el LISTEN esté activo, para que las cargas iniciales de cachés que
+    vienen después no pierdan las notificaciones enviadas mientras tanto.
+    """
+    global _tarea, _escuchando, _inicio_sin_escucha
+    if _tarea is None and _suscriptores:
+        _escuchando = asyncio.Event()
+        _inicio_sin_escucha = False
+        _tarea = asyncio.create_task(_escuchar(conninfo))
+        try:
+            await asyncio.wait_for(_escuchando.wait(), espera_max)
+        except TimeoutError:
+            _inicio_sin_escucha = True
+            logger.warning(f"LISTEN no quedó activo en {espera_max}s; se sigue arrancando y se resincroniza al conectar")
+
+
+async def detener():
+    global _tarea
+    if _tarea is not None:
+        _tarea.cancel()
+        try:
+            await _tarea
+        except asyncio.CancelledError:
+            pass
+        _tarea = None
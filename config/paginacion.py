@@ -0,0 +1,119 @@
+import csv
+import io
+from typing import Literal, Optional
+from fastapi import Query, Response
+from fastapi.responses import StreamingResponse
+from psycopg import sql
+from config.respuestas import a_json, respuesta_json
+
+LIMITE_MAXIMO = 1000
+TAMANO_LOTE = 500   # filas por viaje del cursor de servidor en modo streaming
+
+
+class Paginacion:
+    """
+    Parámetros comunes de los listados:
+    - after_id: devuelve solo filas con id mayor a este (paginación por clave)
+    - limit:    máximo de filas de la página; si falta, LIMITE_MAXIMO
+    - formato:  'ndjson' para recibir todas las filas en streaming, una por línea
+                (sin límite salvo que se pida)
+    """
+
+    def __init__(
+        self,
+        after_id: Optional[int] = Query(None, ge=0),
+        limit: Optional[int] = Query(None, ge=1, le=LIMITE_MAXIMO),
+        formato: Optional[Literal["ndjson"]] = None,
+    ):
+        self.after_id = after_id
+        # Una página JSON nunca trae la tabla entera; el streaming es el que no tiene tope
+        self.limit = limit if limit is not None or formato == "ndjson" else LIMITE_MAXIMO
+        self.formato = formato
+
+
+def _consulta(tabla, pk, pag: Paginacion):
+    partes = [sql.SQL("SELECT * FROM {}").format(sql.Identifier(tabla))]
+    params = []
+    if pag.after_id is not None:
+        partes.append(sql.SQL("WHERE {} > %s").format(sql.Identifier(pk)))
+        params.append(pag.after_id)
+    partes.append(sql.SQL("ORDER BY {}").format(sql.Identifier(pk)))
+    if pag.limit is not None:
+        partes.append(sql.SQL("LIMIT %s"))
+        params.append(pag.limit)
+    return sql.SQL(" ").join(partes), params
+
+
+async def _lotes(conn, consulta, params, nombre):
+    async with conn.transaction():
+        async with conn.cursor(name=nombre) as cursor:
+            await cursor.execute(consulta, params)
+            filas = await cursor.fetchmany(TAMANO_LOTE)
+            yield [col.name for col in cursor.description]
+            while filas:
+                yield filas
+                filas = await cursor.fetchmany(TAMANO_LOTE)
+
+
+async def abrir_stream(conn, consulta, params=(), nombre="listado_stream"):
+    """
+    Ejecuta la consulta con un cursor de servidor y trae el primer lote antes
+    de enviar nada: un filtro inválido o el statement_timeout salen aquí, cuando
+    la ruta todavía puede responder 400, y no como una descarga cortada.
+    Retorna (columnas, generador con el resto de los lotes).
+    """
+    lotes = _lotes(conn, consulta, params, nombre)
+    columnas = await anext(lotes)
+    return columnas, lotes
+
+
+async def stream_ndjson(lotes):
+    """Emite NDJSON por lotes, así la memoria no depende del tamaño de la tabla."""
+    async for filas in lotes:
+        yield b"".join(a_json(fila) + b"\n" for fila in filas)
+
+
+async def stream_csv(columnas, lotes):
+    """Igual que stream_ndjson pero emite CSV con cabecera."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columnas)
+    async for filas in lotes:
+        writer.writerows(fila.values() for fila in filas)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+async def respuesta_exportacion(conn, consulta, params, formato: str, nombre: str) -> StreamingResponse:
+    """StreamingResponse en CSV (descarga como archivo) o NDJSON para una consulta."""
+    columnas, lotes = await abrir_stream(conn, consulta, params, "export_stream")
+    if formato == "csv":
+        return StreamingResponse(
+            stream_csv(columnas, lotes),
+            media_type="text/csv; charset=utf-8",
+            headers={"Content-Disposition": f'attachment; filename="{nombre}.csv"'},
+        )
+    return StreamingResponse(stream_ndjson(lotes), media_type="application/x-ndjson")
+
+
+async def listar_paginado(conn, response: Response, tabla: str, pk: str, pag: Paginacion):
+    """
+    Listado por clave (keyset) ordenado por `pk`.
+    Si la página viene llena, la cabecera X-Next-After-Id indica desde dónde pedir la siguiente.
+    """
+    consulta, params = _consulta(tabla, pk, pag)
+
+    if pag.formato == "ndjson":
+        _, lotes = await abrir_stream(conn, consulta, params)
+        return StreamingResponse(stream_ndjson(lotes), media_type="application/x-ndjson")
+
+    async with conn.cursor() as cursor:
+        await cursor.execute(consulta, params)
+        filas = await cursor.fetchall()
+
+    if pag.limit is not None and len(filas) == pag.limit:
+        response.headers["X-Next-After-Id"] = str(filas[-1][pk])
+    return respuesta_json(filas, response)
@@ -0,0 +1,53 @@
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from uuid import UUID
+from fastapi import Response
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # Sin orjson se serializa con json de la librería estándar
+    orjson = None
+
+
+def _a_json(valor):
+    if isinstance(valor, Decimal):
+        return float(valor)
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    if isinstance(valor, UUID):
+        return str(valor)
+    raise TypeError(f"Tipo no serializable: {type(valor).__name__}")
+
+
+def a_json(contenido) -> bytes:
+    """
+    Filas de psycopg (dict_row) a JSON en bytes. orjson serializa de forma
+    nativa datetime, date y UUID; Decimal sale como número (float), igual
+    que con jsonable_encoder.
+    """
+    if orjson is not None:
+        return orjson.dumps(contenido, default=_a_json)
+    return json.dumps(contenido, default=_a_json, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class RespuestaJSON(JSONResponse):
+    """Clase de respuesta por defecto de la app (ver conexionDB.app)."""
+
+    def render(self, content) -> bytes:
+        return a_json(content)
+
+
+def respuesta_json(contenido, response: Response | None = None, status_code: int = 200) -> RespuestaJSON:
+    """
+    Camino rápido para listados y reportes: al devolver una Response ya armada,
+    FastAPI no pasa cada fila por jsonable_encoder y los bytes salen directo
+    de a_json. Si la ruta recibió `response: Response` (p. ej. para ETag o
+    X-Next-After-Id), sus cabeceras se copian, porque FastAPI solo las aplica
+    a las respuestas que arma él.
+    """
+    respuesta = RespuestaJSON(contenido, status_code=status_code)
+    if response is not None:
+        respuesta.headers.raw.extend(response.headers.raw)
+    return respuesta
@@ -0,0 +1,101 @@
+import hashlib
+import time
+from collections import OrderedDict
+from fastapi import Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from schema.enums import Permiso
+from .config import settings
+from .jwt import verify_token
+
+# ---- Matriz de permisos por id_rol (mismos ids que usa el frontend) ----
+_TODOS = frozenset(Permiso)
+
+PERMISOS_POR_ROL: dict[int, frozenset[Permiso]] = {
+    1: _TODOS,                                                  # Administrador
+    2: frozenset({Permiso.CATALOGO_LEER, Permiso.VENTAS,
+                  Permiso.CLIENTES, Permiso.REPORTES}),         # Cajero
+    3: frozenset({Permiso.CATALOGO_LEER, Permiso.PEDIDOS}),     # Cocinero
+    4: frozenset({Permiso.CATALOGO_LEER, Permiso.PEDIDOS,
+                  Permiso.VENTAS, Permiso.CLIENTES}),           # Mesero
+    5: frozenset({Permiso.CATALOGO_LEER, Permiso.PEDIDOS}),     # Barista
+    6: frozenset({Permiso.CATALOGO_LEER, Permiso.INVENTARIO,
+                  Permiso.COMPRAS}),                            # Encargado de Almacén
+}
+
+_bearer = HTTPBearer(auto_error=False)
+
+# sha256(token) -> (exp, claims). Un token verificado no vuelve a decodificarse
+# hasta que expira; el tamaño está acotado (LRU).
+_cache: OrderedDict[bytes, tuple[float, dict]] = OrderedDict()
+_aciertos = 0
+_fallos = 0
+
+
+def _no_autorizado(detalle: str = "Token inválido o expirado"):
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=detalle,
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def _claims(token: str) -> dict:
+    global _aciertos, _fallos
+    clave = hashlib.sha256(token.encode()).digest()
+    ahora = time.time()
+
+    entrada = _cache.get(clave)
+    if entrada is not None:
+        exp, claims = entrada
+        if exp > ahora:
+            _cache.move_to_end(clave)
+            _aciertos += 1
+            return claims
+        del _cache[clave]
+        raise _no_autorizado()
+
+    _fallos += 1
+    claims = verify_token(token)
+    exp = claims.get("exp")
+    if exp is not None:
+        _cache[clave] = (float(exp), claims)
+        if len(_cache) > settings.jwt_cache_max:
+            _cache.popitem(last=False)
+    return claims
+
+
+async def usuario_actual(
+    credenciales: HTTPAuthorizationCredentials | None = Depends(_bearer),
+) -> dict:
+    """Claims del JWT de la petición (Authorization: Bearer ...)."""
+    if credenciales is None:
+        raise _no_autorizado("No autenticado")
+    return _claims(credenciales.credentials)
+
+
+def requiere_permiso(permiso: Permiso):
+    """
+    Dependencia que exige un usuario autenticado cuyo rol tenga `permiso`.
+    Uso: dependencies=[Depends(requiere_permiso(Permiso.VENTAS))]
+    """
+
+    async def verificar(usuario: dict = Depends(usuario_actual)) -> dict:
+        if permiso not in PERMISOS_POR_ROL.get(usuario.get("id_rol"), ()):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"El rol '{usuario.get('rol')}' no tiene el permiso {permiso.value}"
+            )
+        return usuario
+
+    return verificar
+
+
+def metricas() -> dict:
+    total = _aciertos + _fallos
+    return {
+        "entradas": len(_cache),
+        "capacidad": settings.jwt_cache_max,
+        "aciertos": _aciertos,
+        "fallos": _fallos,
+        "tasa_aciertos": round(_aciertos / total, 3) if total else 0.0,
+    }
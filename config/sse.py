@@ -0,0 +1,59 @@
+import asyncio
+import json
+from fastapi.responses import StreamingResponse
+
+# Cada conexión se cierra sola pasado este tiempo; EventSource reconecta y
+# recibe un snapshot nuevo. Así un apagado del servidor no espera streams eternos.
+DURACION_MAXIMA = 300
+INTERVALO_PING = 15
+
+
+def evento_sse(evento: str, datos) -> str:
+    return f"event: {evento}\ndata: {json.dumps(datos, default=float)}\n\n"
+
+
+async def _transmitir(suscribirse, desuscribirse, snapshot):
+    loop = asyncio.get_running_loop()
+    fin = loop.time() + DURACION_MAXIMA
+    # Se suscribe al empezar a transmitir: si el cliente se va antes, no queda nada colgado
+    cola = suscribirse()
+    try:
+        yield "retry: 3000\n\n"
+        yield evento_sse("snapshot", await snapshot())
+        while (restante := fin - loop.time()) > 0:
+            try:
+                item = await asyncio.wait_for(cola.get(), timeout=min(INTERVALO_PING, restante))
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+            if item is None:
+                yield evento_sse("snapshot", await snapshot())
+            else:
+                yield evento_sse(*item)
+    finally:
+        desuscribirse(cola)
+
+
+def respuesta_sse(suscribirse, desuscribirse, snapshot) -> StreamingResponse:
+    """
+    Server-Sent Events a partir de la cola de (evento, datos) que entrega
+    `suscribirse()`. Primero envía un evento `snapshot` con `await snapshot()`;
+    un None en la cola pide reenviarlo (el suscriptor pudo perder eventos).
+    `desuscribirse(cola)` se llama siempre al terminar, también si el cliente
+    se desconecta.
+    """
+    return StreamingResponse(
+        _transmitir(suscribirse, desuscribirse, snapshot),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def encolar(cola: asyncio.Queue, item):
+    """Encola sin bloquear; si el cliente va atrasado se descarta lo pendiente y se le pide resincronizar."""
+    try:
+        cola.put_nowait(item)
+    except asyncio.QueueFull:
+        while not cola.empty():
+            cola.get_nowait()
+        cola.put_nowait(None)
@@ -20,6 +20,23 @@ async function apiFetch(path, options = {}) {
   }
 }
 
+/* ---- Listados paginados ---- */
+// Los listados devuelven a lo sumo 1000 filas por página; si hay más, la
+// cabecera X-Next-After-Id dice desde dónde seguir. Junta todas las páginas
+// y devuelve un Response con el arreglo completo (se usa igual que apiFetch).
+async function apiFetchTodo(path) {
+  const filas = [];
+  let afterId = null;
+  do {
+    const sep = path.includes('?') ? '&' : '?';
+    const res = await apiFetch(afterId == null ? path : `${path}${sep}after_id=${afterId}`);
+    if (!res || !res.ok) return res;
+    filas.push(...await res.json());
+    afterId = res.headers.get('X-Next-After-Id');
+  } while (afterId);
+  return new Response(JSON.stringify(filas), { status: 200, headers: { 'Content-Type': 'application/json' } });
+}
+
 /* ---- Toast ---- */
 let _toastT = null;
 function mostrarToast(msg, tipo = 'success') {
@@ -0,0 +1,50 @@
+/* ============================================================
+   pedidos.js — Pedidos en vivo (Server-Sent Events) para barra y cocina
+   ============================================================ */
+
+/* ---- Suscripción al feed: GET /venta/pedidos/stream ---- */
+function escucharPedidos(params, { snapshot, pedido, retirado }) {
+  const fuente = new EventSource(`${API_BASE}/venta/pedidos/stream?${new URLSearchParams(params)}`);
+  fuente.addEventListener('snapshot', e => snapshot(JSON.parse(e.data)));
+  fuente.addEventListener('pedido', e => pedido(JSON.parse(e.data)));
+  fuente.addEventListener('retirado', e => retirado(JSON.parse(e.data).id_venta));
+  return fuente;
+}
+
+/* ---- Panel de pedidos PENDIENTE con botón "Listo" ---- */
+async function panelPedidos(contenedorId, rol) {
+  const pedidos = new Map();
+  const contenedor = document.getElementById(contenedorId);
+
+  const rE = await apiFetch('/estado_venta/');
+  const estados = rE ? await rE.json() : [];
+  const completada = estados.find(e => e.nombre === 'COMPLETADA');
+
+  function render() {
+    if (!pedidos.size) { contenedor.innerHTML = '<p style="color:var(--color-text-muted);font-size:.85rem">Sin pedidos pendientes</p>'; return; }
+    contenedor.innerHTML = [...pedidos.values()].sort((a, b) => a.id_venta - b.id_venta).map(p => `
+      <div style="background:var(--color-surface);border:1px solid var(--color-border);border-radius:var(--radius-sm);padding:12px 14px;min-width:200px">
+        <div style="display:flex;justify-content:space-between;align-items:center;margin-bottom:6px">
+          <strong>#${p.id_venta}</strong>
+          <span style="font-size:.78rem;color:var(--color-text-muted)">${new Date(p.fecha).toLocaleTimeString('es-BO', {hour:'2-digit',minute:'2-digit'})}</span>
+        </div>
+        <div style="font-size:.82rem;color:var(--color-text-muted);margin-bottom:6px">${esc(p.cliente || 'General')}</div>
+        ${p.items.map(i => `<div style="font-size:.88rem">${i.cantidad} × ${esc(i.producto)}</div>`).join('')}
+        ${completada ? `<button class="btn btn-primary btn-sm" style="margin-top:10px;width:100%" onclick="marcarListo(${p.id_venta}, ${completada.id_estado})">✓ Listo</button>` : ''}
+      </div>`).join('');
+  }
+
+  escucharPedidos({ rol, estado: 'PENDIENTE' }, {
+    snapshot: lista => { pedidos.clear(); lista.forEach(p => pedidos.set(p.id_venta, p)); render(); },
+    pedido: p => {
+      if (!pedidos.has(p.id_venta)) mostrarToast(`Nuevo pedido #${p.id_venta}`, 'info');
+      pedidos.set(p.id_venta, p); render();
+    },
+    retirado: id => { pedidos.delete(id); render(); },
+  });
+}
+
+async function marcarListo(idVenta, idEstado) {
+  const res = await apiFetch(`/venta/${idVenta}/estado`, { method: 'PATCH', body: JSON.stringify({ id_estado: idEstado }) });
+  if (res && !res.ok) { const e = await res.json(); mostrarToast(e.detail || 'Error', 'error'); }
+}
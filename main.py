@@ -1,12 +1,14 @@
 from fastapi import FastAPI, Depends, HTTPException
-from fastapi.staticfiles import StaticFiles
 from fastapi.responses import RedirectResponse
 from config.conexionDB import pool, get_conexion, app
+from config.estaticos import EstaticosPrecomprimidos, directorio_frontend
 from routers import categoria_producto, producto, insumo, proveedor, personal, usuario, rol, compra, detalle_compra, venta, detalle_venta, receta, cliente, estado_venta
-from routers import auth
+from routers import auth, metricas
 from middlewares.corps import add_cors
+from middlewares.compresion import add_compresion
 from middlewares.errors import add_error_handlers
 from middlewares.login import setup_logging
+from middlewares.tiempos import add_tiempos
 import os, logging
 
 os.makedirs("logs", exist_ok=True)
@@ -14,6 +16,8 @@ setup_logging()
 
 add_cors(app)
 add_error_handlers(app)
+add_compresion(app)
+add_tiempos(app)
 
 # Ruta raíz redirige al login
 @app.get("/")
@@ -37,6 +41,7 @@ app.include_router(insumo.router, prefix="/insumo")
 app.include_router(proveedor.router, prefix="/proveedor")
 app.include_router(receta.router, prefix="/receta")
 app.include_router(estado_venta.router, prefix="/estado_venta")
+app.include_router(metricas.router, prefix="/metricas", tags=["metricas"])
 
 
 
@@ -50,4 +55,4 @@ if __name__ == "__main__":
 
 
 # ---- Servir frontend (debe ir al final, después de todos los routers) ----
-app.mount("/app", StaticFiles(directory="fontend", html=True), name="frontend")
+app.mount("/app", EstaticosPrecomprimidos(directory=directorio_frontend(), html=True), name="frontend")
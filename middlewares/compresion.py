@@ -0,0 +1,11 @@
+from starlette.middleware.gzip import GZipMiddleware
+from config.config import settings
+
+def add_compresion(app):
+    # Respuestas JSON grandes (reportes, listados). Las que ya traen
+    # Content-Encoding (estáticos precomprimidos) y los streams SSE se dejan pasar.
+    app.add_middleware(
+        GZipMiddleware,
+        minimum_size=settings.gzip_tamano_minimo,
+        compresslevel=settings.gzip_nivel,
+    )
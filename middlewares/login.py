@@ -1,32 +1,158 @@
+import atexit
+import copy
+import json
 import logging
+import os
+import queue
 import sys
-from datetime import datetime
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+from logging.handlers import QueueHandler, QueueListener
+from config.config import settings
+
+_listener: QueueListener | None = None
+_cola_handler: "ColaAcotadaHandler | None" = None
+_formato_base = logging.Formatter()
+
+
+class ColaAcotadaHandler(QueueHandler):
+    """
+    Encola los registros sin bloquear nunca al event loop. Si la cola está
+    llena el registro se descarta y se cuenta por nivel.
+    """
+
+    def __init__(self, cola: queue.Queue):
+        super().__init__(cola)
+        self.descartados: Counter = Counter()
+
+    def prepare(self, record):
+        # Resuelve mensaje y traceback aquí (los args pueden no ser
+        # serializables o cambiar después); el formato final lo aplica el hilo escritor
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _formato_base.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.descartados[record.levelname] += 1
+
+
+class ArchivoDiarioHandler(logging.FileHandler):
+    """
+    Escribe en logs/app_AAAA-MM-DD.log y pasa al archivo del día siguiente al
+    primer registro después de medianoche. No renombra nada (a diferencia de
+    TimedRotatingFileHandler), así que varios workers pueden escribir en el
+    mismo directorio sin pisarse: cada uno solo abre en modo append el
+    archivo de la fecha. Al cambiar de día borra los de más de `dias_retencion`.
+    """
+
+    def __init__(self, directorio: str, prefijo: str, dias_retencion: int, encoding="utf-8"):
+        self.directorio = directorio
+        self.prefijo = prefijo
+        self.dias_retencion = dias_retencion
+        self.fecha = date.today()
+        super().__init__(self._ruta(self.fecha), encoding=encoding, delay=True)
+
+    def _ruta(self, fecha: date) -> str:
+        return os.path.join(self.directorio, f"{self.prefijo}_{fecha.isoformat()}.log")
+
+    def emit(self, record):
+        hoy = date.today()
+        if hoy != self.fecha:
+            self.fecha = hoy
+            self.close()
+            self.baseFilename = os.path.abspath(self._ruta(hoy))
+            self._borrar_viejos(hoy)
+        super().emit(record)
+
+    def _borrar_viejos(self, hoy: date):
+        limite = self._ruta(hoy - timedelta(days=self.dias_retencion))
+        for nombre in os.listdir(self.directorio):
+            ruta = os.path.join(self.directorio, nombre)
+            # Los nombres con fecha ISO se ordenan igual que las fechas
+            if nombre.startswith(self.prefijo + "_") and nombre.endswith(".log") and ruta < limite:
+                try:
+                    os.remove(ruta)
+                except FileNotFoundError:
+                    pass   # Otro worker lo borró primero
+
+
+class FormatoJSON(logging.Formatter):
+    """Una línea JSON por registro, para ingesta en herramientas de logs."""
+
+    def format(self, record):
+        datos = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "mensaje": record.getMessage(),
+        }
+        if record.exc_text:
+            datos["excepcion"] = record.exc_text
+        return json.dumps(datos, ensure_ascii=False)
 
 
 def setup_logging():
+    global _listener, _cola_handler
+
     # Formato de los logs
-    formatter = logging.Formatter(
-        fmt="%(asctime)s | %(levelname)-8s | %(name)s | %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S"
-    )
+    if settings.log_formato == "json":
+        formatter = FormatoJSON()
+    else:
+        formatter = logging.Formatter(
+            fmt="%(asctime)s | %(levelname)-8s | %(name)s | %(message)s",
+            datefmt="%Y-%m-%d %H:%M:%S"
+        )
 
     # Handler consola
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setFormatter(formatter)
 
-    # Handler archivo
-    file_handler = logging.FileHandler(
-        f"logs/app_{datetime.now().strftime('%Y-%m-%d')}.log",
-        encoding="utf-8"
-    )
+    # Handler archivo: un archivo por fecha (logs/app_AAAA-MM-DD.log)
+    file_handler = ArchivoDiarioHandler("logs", "app", settings.log_dias_retencion)
     file_handler.setFormatter(formatter)
 
+    # La escritura (consola y disco) la hace un hilo aparte; los handlers
+    # de la app solo encolan
+    cola = queue.Queue(maxsize=settings.log_cola_max)
+    _cola_handler = ColaAcotadaHandler(cola)
+    _listener = QueueListener(cola, console_handler, file_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(detener_logging)
+
     # Logger raíz
     root_logger = logging.getLogger()
-    root_logger.setLevel(logging.INFO)
-    root_logger.addHandler(console_handler)
-    root_logger.addHandler(file_handler)
+    root_logger.setLevel(settings.log_nivel.upper())
+    root_logger.addHandler(_cola_handler)
 
     # Silenciar librerías muy verbosas
     logging.getLogger("uvicorn.access").setLevel(logging.WARNING)
-    logging.getLogger("psycopg2").setLevel(logging.WARNING)
\ No newline at end of file
+    logging.getLogger("psycopg2").setLevel(logging.WARNING)
+
+
+def detener_logging():
+    """Vacía la cola y detiene el hilo escritor."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def metricas_logging() -> dict:
+    if _cola_handler is None:
+        return {"activo": False}
+    cola = _cola_handler.queue
+    return {
+        "activo": _listener is not None,
+        "formato": settings.log_formato,
+        "en_cola": cola.qsize(),
+        "capacidad": cola.maxsize,
+        "descartados": dict(_cola_handler.descartados),
+        "descartados_total": sum(_cola_handler.descartados.values()),
+    }
@@ -0,0 +1,70 @@
+import time
+from config.config import settings
+from config.medicion import Medicion, medicion_actual, registrar_peticion
+
+
+def _plantilla(scope) -> str:
+    """
+    Ruta con los parámetros en vez de sus valores (/venta/{id_venta}), para no
+    abrir una serie por id. Se reconstruye desde la URL porque la ruta que
+    queda en el scope no incluye el prefijo del router.
+    """
+    ruta = scope["path"]
+    segmentos = ruta.split("/")
+    for nombre, valor in scope.get("path_params", {}).items():
+        valor = str(valor)
+        if "/" in valor:
+            # Parámetros de tipo path (p. ej. archivos estáticos): reemplazan la cola
+            if ruta.endswith(valor):
+                return ruta[:-len(valor)] + "{" + nombre + "}"
+            continue
+        segmentos = ["{" + nombre + "}" if s == valor else s for s in segmentos]
+    return "/".join(segmentos)
+
+
+class MedicionTiempos:
+    """
+    Middleware ASGI que mide cada petición HTTP: tiempo total, tiempo en la
+    base de datos y cantidad de consultas (sumados por los cursores del pool).
+
+    Agrega la cabecera Server-Timing con lo medido hasta que sale la respuesta;
+    el histograma por ruta se registra al terminar el cuerpo, así que en las
+    exportaciones en streaming incluye toda la transferencia.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        medicion = Medicion()
+        token = medicion_actual.set(medicion)
+        inicio = time.perf_counter()
+        status = 500
+
+        async def enviar(mensaje):
+            nonlocal status
+            if mensaje["type"] == "http.response.start":
+                status = mensaje["status"]
+                if settings.server_timing:
+                    total_ms = (time.perf_counter() - inicio) * 1000
+                    cabecera = (
+                        f'app;dur={total_ms:.1f}, '
+                        f'db;dur={medicion.db_ms:.1f};desc="{medicion.consultas} consultas"'
+                    )
+                    mensaje["headers"] = [*mensaje.get("headers", []), (b"server-timing", cabecera.encode())]
+            await send(mensaje)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            medicion_actual.reset(token)
+            nombre = f"{scope['method']} {_plantilla(scope)}" if "route" in scope else "sin_ruta"
+            registrar_peticion(nombre, (time.perf_counter() - inicio) * 1000, medicion, status)
+
+
+def add_tiempos(app):
+    app.add_middleware(MedicionTiempos)
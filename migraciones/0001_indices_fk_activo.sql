@@ -0,0 +1,15 @@
+-- Índices para las claves foráneas que se usan en JOIN y filtros y que no
+-- quedan cubiertas por otro índice, y parciales para las búsquedas sobre
+-- filas activas. receta(id_producto) ya lo cubre UNIQUE (id_producto, id_insumo);
+-- el sentido que faltaba es receta(id_insumo).
+-- En venta y detalle_venta (particionadas) el índice se crea en cada partición.
+CREATE INDEX IF NOT EXISTS idx_receta_id_insumo         ON receta(id_insumo);
+CREATE INDEX IF NOT EXISTS idx_venta_id_usuario         ON venta(id_usuario);
+CREATE INDEX IF NOT EXISTS idx_venta_id_cliente         ON venta(id_cliente);
+CREATE INDEX IF NOT EXISTS idx_detalle_venta_id_producto ON detalle_venta(id_producto);
+CREATE INDEX IF NOT EXISTS idx_compra_id_proveedor      ON compra(id_proveedor);
+CREATE INDEX IF NOT EXISTS idx_detalle_compra_id_insumo ON detalle_compra(id_insumo);
+
+CREATE INDEX IF NOT EXISTS idx_producto_categoria_activo ON producto(id_categoria) WHERE activo = TRUE;
+CREATE INDEX IF NOT EXISTS idx_proveedor_nombre_activo   ON proveedor(nombre) WHERE activo = TRUE;
+CREATE INDEX IF NOT EXISTS idx_cliente_nombre_activo     ON cliente(nombre) WHERE activo = TRUE;
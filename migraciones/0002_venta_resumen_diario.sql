@@ -0,0 +1,29 @@
+-- Totales de venta por día, producto, usuario y método de pago para
+-- /venta/reporte/resumen. Si la tabla no existía se llena con el historial;
+-- si ya existía (instalación desde db.txt) se deja como está para no sumar
+-- dos veces. `python -m services.resumen_service` la reconstruye por rango.
+DO $$
+BEGIN
+    IF to_regclass('venta_resumen_diario') IS NOT NULL THEN
+        RETURN;
+    END IF;
+
+    CREATE TABLE venta_resumen_diario (
+        fecha       DATE          NOT NULL,
+        id_producto INT           NOT NULL REFERENCES producto(id_producto),
+        id_usuario  INT           NOT NULL REFERENCES usuario(id_usuario),
+        metodo_pago VARCHAR(30)   NOT NULL,
+        cantidad    INT           NOT NULL,
+        ingreso     DECIMAL(14,2) NOT NULL,
+        PRIMARY KEY (fecha, id_producto, id_usuario, metodo_pago)
+    );
+
+    INSERT INTO venta_resumen_diario
+        (fecha, id_producto, id_usuario, metodo_pago, cantidad, ingreso)
+    SELECT v.fecha::date, dv.id_producto, v.id_usuario, v.metodo_pago,
+           SUM(dv.cantidad), SUM(dv.cantidad * dv.precio_unitario)
+    FROM venta v
+    JOIN detalle_venta dv ON dv.id_venta = v.id_venta
+    GROUP BY v.fecha::date, dv.id_producto, v.id_usuario, v.metodo_pago;
+END
+$$;
@@ -0,0 +1,38 @@
+-- Ledger de stock: ventas y compras agregan movimientos en lugar de hacer
+-- UPDATE sobre insumo.stock, que queda como snapshot consolidado. El stock
+-- puede quedar negativo hasta consolidar, por eso se quita chk_stock_positivo.
+CREATE TABLE IF NOT EXISTS movimiento_insumo (
+    id_movimiento BIGSERIAL     PRIMARY KEY,
+    id_insumo     INT           NOT NULL REFERENCES insumo(id_insumo),
+    tipo          VARCHAR(20)   NOT NULL,
+    cantidad      DECIMAL(12,2) NOT NULL,
+    id_referencia INT,
+    fecha         TIMESTAMP     NOT NULL DEFAULT NOW(),
+    consolidado   BOOLEAN       NOT NULL DEFAULT FALSE
+);
+
+CREATE INDEX IF NOT EXISTS idx_movimiento_insumo_pendiente ON movimiento_insumo(id_insumo) WHERE NOT consolidado;
+CREATE INDEX IF NOT EXISTS idx_movimiento_insumo_id_insumo ON movimiento_insumo(id_insumo, fecha);
+
+ALTER TABLE insumo DROP CONSTRAINT IF EXISTS chk_stock_positivo;
+
+-- Stock actual = snapshot en insumo.stock + movimientos pendientes de consolidar.
+-- Si la vista ya existe puede tener columnas agregadas después (0006): no se toca.
+DO $$
+BEGIN
+    IF to_regclass('insumo_stock') IS NULL THEN
+        CREATE VIEW insumo_stock AS
+        SELECT
+            i.id_insumo,
+            i.nombre,
+            i.unidad,
+            i.stock + COALESCE((
+                SELECT SUM(m.cantidad)
+                FROM movimiento_insumo m
+                WHERE m.id_insumo = i.id_insumo AND NOT m.consolidado
+            ), 0) AS stock,
+            i.activo
+        FROM insumo i;
+    END IF;
+END
+$$;
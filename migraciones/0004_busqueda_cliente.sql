@@ -0,0 +1,17 @@
+-- Búsqueda de clientes (/cliente/buscar): prefijos con btree, subcadenas con
+-- trigramas. Si el servidor no trae pg_trgm se crean solo los de prefijo y la
+-- búsqueda por subcadena debe ir con CLIENTE_BUSQUEDA_TRGM=false.
+CREATE INDEX IF NOT EXISTS idx_cliente_nit_prefijo    ON cliente (nit varchar_pattern_ops) WHERE activo = TRUE;
+CREATE INDEX IF NOT EXISTS idx_cliente_nombre_prefijo ON cliente (lower(nombre) text_pattern_ops) WHERE activo = TRUE;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm') THEN
+        RAISE NOTICE 'pg_trgm no está disponible; se omiten los índices de trigramas';
+        RETURN;
+    END IF;
+    CREATE EXTENSION IF NOT EXISTS pg_trgm;
+    CREATE INDEX IF NOT EXISTS idx_cliente_nit_trgm    ON cliente USING gin (nit gin_trgm_ops) WHERE activo = TRUE;
+    CREATE INDEX IF NOT EXISTS idx_cliente_nombre_trgm ON cliente USING gin (nombre gin_trgm_ops) WHERE activo = TRUE;
+END
+$$;
@@ -0,0 +1,21 @@
+-- id generado por el POS para cada venta subida en /venta/lote; hace
+-- idempotentes los reintentos. Las bases que lo tenían como columna de venta
+-- (antes del particionado) pasan los valores a la tabla y quitan la columna.
+CREATE TABLE IF NOT EXISTS venta_local (
+    id_local UUID PRIMARY KEY,
+    id_venta INT  NOT NULL
+);
+
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'venta' AND column_name = 'id_local'
+    ) THEN
+        INSERT INTO venta_local (id_local, id_venta)
+        SELECT id_local, id_venta FROM venta WHERE id_local IS NOT NULL
+        ON CONFLICT (id_local) DO NOTHING;
+        ALTER TABLE venta DROP COLUMN id_local;
+    END IF;
+END
+$$;
@@ -0,0 +1,18 @@
+-- Punto de reposición por insumo para las alertas de stock bajo; 0 = sin alerta.
+-- La vista insumo_stock lo expone al final (CREATE OR REPLACE solo admite
+-- agregar columnas después de las existentes).
+ALTER TABLE insumo ADD COLUMN IF NOT EXISTS stock_minimo DECIMAL(12,2) NOT NULL DEFAULT 0;
+
+CREATE OR REPLACE VIEW insumo_stock AS
+SELECT
+    i.id_insumo,
+    i.nombre,
+    i.unidad,
+    i.stock + COALESCE((
+        SELECT SUM(m.cantidad)
+        FROM movimiento_insumo m
+        WHERE m.id_insumo = i.id_insumo AND NOT m.consolidado
+    ), 0) AS stock,
+    i.activo,
+    i.stock_minimo
+FROM insumo i;
@@ -1,11 +1,29 @@
-import bcrypt
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, HTTPException, status
 from pydantic import BaseModel
-from config.conexionDB import get_conexion
+from config.conexionDB import pool
 from config.jwt import create_access_token
+from config.hashing import verificar_password
+from config.consultas import ConsultaPreparada
 
 router = APIRouter()
 
+CONSULTA_LOGIN = ConsultaPreparada("auth.login", """
+    SELECT
+        u.id_usuario,
+        u.password_hash,
+        u.activo       AS usuario_activo,
+        p.id_personal,
+        p.nombres      AS nombres,
+        p.primer_apellido,
+        p.activo       AS personal_activo,
+        r.id_rol,
+        r.nombre       AS rol
+    FROM usuario u
+    JOIN personal p ON p.id_personal = u.id_personal
+    JOIN rol r      ON r.id_rol      = p.id_rol
+    WHERE u.email = %s;
+""")
+
 
 # ---------- Modelos ----------
 
@@ -27,34 +45,20 @@ class LoginResponse(BaseModel):
 # ---------- Endpoint ----------
 
 @router.post("/login", response_model=LoginResponse)
-async def login(datos: LoginRequest, conn=Depends(get_conexion)):
+async def login(datos: LoginRequest):
     """
     Autentica un usuario por email y contraseña.
     Retorna un JWT con datos del usuario y su rol.
 
     Solo usuarios activos cuyo personal también esté activo pueden ingresar.
     """
-    consulta = """
-        SELECT
-            u.id_usuario,
-            u.password_hash,
-            u.activo       AS usuario_activo,
-            p.id_personal,
-            p.nombres      AS nombres,
-            p.primer_apellido,
-            p.activo       AS personal_activo,
-            r.id_rol,
-            r.nombre       AS rol
-        FROM usuario u
-        JOIN personal p ON p.id_personal = u.id_personal
-        JOIN rol r      ON r.id_rol      = p.id_rol
-        WHERE u.email = %s;
-    """
-
     try:
-        async with conn.cursor() as cursor:
-            await cursor.execute(consulta, (datos.email,))
-            usuario = await cursor.fetchone()
+        # La conexión se devuelve al pool antes de bcrypt: en un pico de logins
+        # la espera en la cola de hashing no debe dejar al POS sin conexiones
+        async with pool.connection() as conn:
+            async with conn.cursor() as cursor:
+                await CONSULTA_LOGIN.ejecutar(cursor, (datos.email,))
+                usuario = await cursor.fetchone()
 
         # 1. Usuario no encontrado → misma respuesta genérica (no revelar si el email existe)
         if not usuario:
@@ -64,10 +68,7 @@ async def login(datos: LoginRequest, conn=Depends(get_conexion)):
             )
 
         # 2. Verificar contraseña con bcrypt
-        password_ok = bcrypt.checkpw(
-            datos.password.encode(),
-            usuario["password_hash"].encode()
-        )
+        password_ok = await verificar_password(datos.password, usuario["password_hash"])
         if not password_ok:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
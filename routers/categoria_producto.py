@@ -1,6 +1,9 @@
-from fastapi import Depends, HTTPException, APIRouter
+from fastapi import Depends, HTTPException, APIRouter, Response
 from pydantic import BaseModel
 from config.conexionDB import get_conexion
+from config.catalogo import catalogo, verificar_catalogo, publicar_cambio
+from config.respuestas import respuesta_json
+from config.admision import admitir, Prioridad
 
 router = APIRouter()
 
@@ -15,8 +18,8 @@ class CategoriaProductoCreate(BaseModel):
 
 
 # LISTAR TODAS LAS CATEGORÍAS
-@router.get("/")
-async def listar(conn=Depends(get_conexion)):
+@router.get("/", dependencies=[Depends(verificar_catalogo), Depends(admitir(Prioridad.CATALOGO))])
+async def listar(response: Response, conn=Depends(get_conexion)):
 
     consulta = """
         SELECT id_categoria, nombre
@@ -27,7 +30,7 @@ async def listar(conn=Depends(get_conexion)):
         async with conn.cursor() as cursor:
             await cursor.execute(consulta)
             resultado = await cursor.fetchall()
-            return resultado
+            return respuesta_json(resultado, response)
 
     except Exception as e:
         print(f"Error listando categorías: {e}")
@@ -35,7 +38,7 @@ async def listar(conn=Depends(get_conexion)):
 
 
 # LISTAR POR ID
-@router.get("/{id}")
+@router.get("/{id}", dependencies=[Depends(verificar_catalogo)])
 async def listar_por_id(id: int, conn=Depends(get_conexion)):
 
     consulta = """
@@ -78,6 +81,9 @@ async def crear(categoria: CategoriaProductoCreate, conn=Depends(get_conexion)):
             )
 
             resultado = await cursor.fetchone()
+            await publicar_cambio(cursor)
+            await conn.commit()
+            catalogo.invalidar()
             return resultado
 
     except Exception as e:
@@ -109,6 +115,9 @@ async def actualizar(id: int, categoria: CategoriaProductoCreate, conn=Depends(g
             if resultado is None:
                 raise HTTPException(status_code=404, detail="Categoría no encontrada")
 
+            await publicar_cambio(cursor)
+            await conn.commit()
+            catalogo.invalidar()
             return resultado
 
     except Exception as e:
@@ -135,6 +144,9 @@ async def eliminar(id: int, conn=Depends(get_conexion)):
             if resultado is None:
                 raise HTTPException(status_code=404, detail="Categoría no encontrada")
 
+            await publicar_cambio(cursor)
+            await conn.commit()
+            catalogo.invalidar()
             return {"mensaje": "Categoría eliminada correctamente"}
 
     except Exception as e:
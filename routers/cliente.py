@@ -1,6 +1,9 @@
-from fastapi import Depends, HTTPException, APIRouter
+from fastapi import Depends, HTTPException, APIRouter, Response
 from pydantic import BaseModel
 from config.conexionDB import get_conexion
+from config.paginacion import Paginacion, listar_paginado
+from config.admision import admitir, Prioridad
+from services import cliente_busqueda
 
 router = APIRouter()
 
@@ -15,15 +18,10 @@ class ClienteCreate(BaseModel):
     nit: str 
     activo : bool | None = True
 
-@router.get("/")
-async def listar(conn=Depends(get_conexion)):
-    consulta = """
-        SELECT * FROM cliente;
-    """
+@router.get("/", dependencies=[Depends(admitir(Prioridad.CATALOGO))])
+async def listar(response: Response, pag: Paginacion = Depends(), conn=Depends(get_conexion)):
     try:
-        async with conn.cursor() as cursor:
-            await cursor.execute(consulta)
-            return await cursor.fetchall()
+        return await listar_paginado(conn, response, "cliente", "id_cliente", pag)
     except Exception as e:
         print(f"Error listado gral de Psycopg: {e}")
         raise HTTPException(status_code=400, detail="Ocurrió un error, consulte con su Administrador")
@@ -33,21 +31,11 @@ async def listar(conn=Depends(get_conexion)):
 async def buscar_cliente(q: str = "", conn=Depends(get_conexion)):
     """
     Busca clientes por NIT/CI o nombre (búsqueda parcial, case-insensitive).
+    El NIT exacto y los prefijos aparecen primero; luego por similitud del nombre.
     Devuelve máximo 10 resultados.
     """
-    consulta = """
-        SELECT id_cliente, nombre, nit
-        FROM cliente
-        WHERE activo = TRUE
-          AND (nit ILIKE %s OR nombre ILIKE %s)
-        ORDER BY nombre
-        LIMIT 10;
-    """
     try:
-        patron = f"%{q}%"
-        async with conn.cursor() as cursor:
-            await cursor.execute(consulta, (patron, patron))
-            return await cursor.fetchall()
+        return await cliente_busqueda.buscar(conn, q)
     except Exception as e:
         print(f"Error al buscar cliente: {e}")
         raise HTTPException(status_code=400, detail="Ocurrió un error al buscar clientes")
@@ -79,7 +67,7 @@ async def crear(cliente: ClienteCreate, conn=Depends(get_conexion)):
             await cursor.execute(consulta, (cliente.nombre, cliente.nit, cliente.activo))
             id_cliente = await cursor.fetchone()
             await conn.commit()
-            return {"id_cliente": id_cliente[0], **cliente.dict()}
+            return {"id_cliente": id_cliente["id_cliente"], **cliente.dict()}
     except Exception as e:
         print(f"Error al crear cliente en Psycopg: {e}")
         raise HTTPException(status_code=400, detail="Ocurrió un error, consulte con su Administrador")
@@ -94,8 +82,10 @@ async def actualizar(id_cliente: int, cliente: ClienteCreate, conn=Depends(get_c
             await cursor.execute(consulta, (cliente.nombre, cliente.nit, cliente.activo, id_cliente))
             resultado = await cursor.fetchone()
             if resultado:
+                await cliente_busqueda.publicar_cambio(cursor)
                 await conn.commit()
-                return {"id_cliente": resultado[0], **cliente.dict()}
+                cliente_busqueda.invalidar()
+                return {"id_cliente": resultado["id_cliente"], **cliente.dict()}
             else:
                 raise HTTPException(status_code=404, detail="Cliente no encontrado")
     except Exception as e:
@@ -112,8 +102,10 @@ async def eliminar(id_cliente: int, conn=Depends(get_conexion)):
             await cursor.execute(consulta, (id_cliente,))
             resultado = await cursor.fetchone()
             if resultado:
+                await cliente_busqueda.publicar_cambio(cursor)
                 await conn.commit()
-                return {"id_cliente": resultado[0], "message": "Cliente eliminado exitosamente"}
+                cliente_busqueda.invalidar()
+                return {"id_cliente": resultado["id_cliente"], "message": "Cliente eliminado exitosamente"}
             else:
                 raise HTTPException(status_code=404, detail="Cliente no encontrado")
     except Exception as e:
@@ -1,9 +1,12 @@
-from fastapi import FastAPI, Depends, HTTPException, APIRouter
+from fastapi import FastAPI, Depends, HTTPException, APIRouter, Response
 from pydantic import BaseModel
 from contextlib import asynccontextmanager
-from config.conexionDB import pool, get_conexion, app
+from config.conexionDB import pool, get_conexion, get_conexion_reportes, app
+from config.paginacion import Paginacion, listar_paginado, respuesta_exportacion
+from config.respuestas import respuesta_json
+from config.admision import admitir, Prioridad
 from services.compra_service import registrar_compra
-from typing import List, Optional
+from typing import List, Literal, Optional
 
 router = APIRouter()
 
@@ -32,17 +35,47 @@ class CompraRegistro(BaseModel):
     observacion: Optional[str] = None
     detalles: List[DetalleCompra]
 
-@router.get("/reporte/detallado")
-async def reporte_compras(conn=Depends(get_conexion)):
+@router.get("/reporte/detallado", dependencies=[Depends(admitir(Prioridad.REPORTES))])
+async def reporte_compras(fecha_inicio: Optional[str] = None, fecha_fin: Optional[str] = None,
+                          id_usuario: Optional[int] = None, id_proveedor: Optional[int] = None,
+                          formato: Optional[Literal["csv", "ndjson"]] = None, conn=Depends(get_conexion_reportes)):
     """
     Reporte de compras con detalle de insumos y proveedores.
+    Parámetros opcionales:
+    - fecha_inicio: YYYY-MM-DD
+    - fecha_fin: YYYY-MM-DD (incluye todo el día)
+    - id_usuario: filtrar por usuario
+    - id_proveedor: filtrar por proveedor
+    - formato: csv | ndjson para exportar en streaming (sin cargar todo en memoria)
     """
     try:
-        consulta = """
+        filtros = []
+        params = []
+
+        if fecha_inicio:
+            filtros.append("c.fecha >= DATE(%s)")
+            params.append(fecha_inicio)
+
+        if fecha_fin:
+            filtros.append("c.fecha < DATE(%s) + 1")
+            params.append(fecha_fin)
+
+        if id_usuario:
+            filtros.append("c.id_usuario = %s")
+            params.append(id_usuario)
+
+        if id_proveedor:
+            filtros.append("c.id_proveedor = %s")
+            params.append(id_proveedor)
+
+        where_clause = "WHERE " + " AND ".join(filtros) if filtros else ""
+
+        consulta = f"""
             SELECT 
                 c.id_compra,
                 c.fecha,
                 c.observacion,
+                c.id_proveedor,
                 pr.nombre as proveedor,
                 i.nombre as insumo,
                 dc.cantidad,
@@ -53,25 +86,24 @@ async def reporte_compras(conn=Depends(get_conexion)):
             LEFT JOIN proveedor pr ON c.id_proveedor = pr.id_proveedor
             LEFT JOIN detalle_compra dc ON c.id_compra = dc.id_compra
             LEFT JOIN insumo i ON dc.id_insumo = i.id_insumo
+            {where_clause}
             ORDER BY c.id_compra DESC, dc.id_detalle_compra
         """
-        
+
+        if formato:
+            return await respuesta_exportacion(conn, consulta, params, formato, "reporte_compras")
+
         async with conn.cursor() as cursor:
-            await cursor.execute(consulta)
-            return await cursor.fetchall()
+            await cursor.execute(consulta, params)
+            return respuesta_json(await cursor.fetchall())
     except Exception as e:
         print(f"Error en reporte de compras: {e}")
         raise HTTPException(status_code=400, detail="Error al generar reporte")
 
-@router.get("/")
-async def listar_compras(conn=Depends(get_conexion)):
-    consulta = """
-        SELECT * FROM compra;
-    """
+@router.get("/", dependencies=[Depends(admitir(Prioridad.CATALOGO))])
+async def listar_compras(response: Response, pag: Paginacion = Depends(), conn=Depends(get_conexion)):
     try:
-        async with conn.cursor() as cursor:
-            await cursor.execute(consulta)
-            return await cursor.fetchall()
+        return await listar_paginado(conn, response, "compra", "id_compra", pag)
     except Exception as e:
         print(f"Error listando compras: {e}")
         raise HTTPException(status_code=400, detail="Ocurrió un error, consulte con su Administrador")
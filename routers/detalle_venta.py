@@ -1,7 +1,10 @@
-from fastapi import FastAPI, Depends, HTTPException, APIRouter
+from fastapi import FastAPI, Depends, HTTPException, APIRouter, Response
 from pydantic import BaseModel
 from contextlib import asynccontextmanager
 from config.conexionDB import pool, get_conexion, app
+from config.paginacion import Paginacion, listar_paginado
+from config.admision import admitir, Prioridad
+from services.resumen_service import recalcular_venta
 from decimal import Decimal
 from typing import Optional
 
@@ -18,15 +21,10 @@ class DetalleVentaActualizar(BaseModel):
     precio_unitario: Optional[Decimal] = None
 
 
-@router.get("/")
-async def listar(conn=Depends(get_conexion)):
-    consulta = """
-        SELECT * FROM detalle_venta;
-    """
+@router.get("/", dependencies=[Depends(admitir(Prioridad.CATALOGO))])
+async def listar(response: Response, pag: Paginacion = Depends(), conn=Depends(get_conexion)):
     try:
-        async with conn.cursor() as cursor:
-            await cursor.execute(consulta)
-            return await cursor.fetchall()
+        return await listar_paginado(conn, response, "detalle_venta", "id_detalle_venta", pag)
     except Exception as e:
         print(f"Error listado gral de Psycopg: {e}")
         raise HTTPException(status_code=400, detail="Ocurrió un error, consulte con su Administrador")
@@ -51,14 +49,19 @@ async def obtener(id_detalle_venta: int, conn=Depends(get_conexion)):
 @router.post("/")
 async def crear(detalle_venta: DetalleVentaCrear, conn=Depends(get_conexion)):
     consulta = """
-        INSERT INTO detalle_venta (id_venta, id_producto, cantidad, precio_unitario) VALUES (%s, %s, %s, %s) RETURNING id_detalle_venta;
+        INSERT INTO detalle_venta (id_venta, fecha_venta, id_producto, cantidad, precio_unitario)
+        SELECT id_venta, fecha, %s, %s, %s FROM venta WHERE id_venta = %s
+        RETURNING id_detalle_venta;
     """
     try:
         async with conn.cursor() as cursor:
-            await cursor.execute(consulta, (detalle_venta.id_venta, detalle_venta.id_producto, detalle_venta.cantidad, detalle_venta.precio_unitario))
+            await cursor.execute(consulta, (detalle_venta.id_producto, detalle_venta.cantidad, detalle_venta.precio_unitario, detalle_venta.id_venta))
             id_detalle_venta = await cursor.fetchone()
+            if not id_detalle_venta:
+                raise HTTPException(status_code=404, detail="Venta no encontrada")
+            await recalcular_venta(cursor, detalle_venta.id_venta)
             await conn.commit()
-            return {"id_detalle_venta": id_detalle_venta[0]}
+            return {"id_detalle_venta": id_detalle_venta["id_detalle_venta"]}
     except Exception as e:
         print(f"Error al crear detalle de venta en Psycopg: {e}")
         raise HTTPException(status_code=400, detail="Ocurrió un error, consulte con su Administrador")
@@ -76,6 +79,7 @@ async def actualizar(id_detalle_venta: int, detalle_venta: DetalleVentaActualiza
             await cursor.execute(consulta, (detalle_venta.cantidad, detalle_venta.precio_unitario, id_detalle_venta))
             resultado = await cursor.fetchone()
             if resultado:
+                await recalcular_venta(cursor, resultado["id_venta"])
                 await conn.commit()
                 return resultado
             else:
@@ -87,15 +91,16 @@ async def actualizar(id_detalle_venta: int, detalle_venta: DetalleVentaActualiza
 @router.delete("/{id_detalle_venta}")
 async def eliminar(id_detalle_venta: int, conn=Depends(get_conexion)):
     consulta = """
-        DELETE FROM detalle_venta WHERE id_detalle_venta = %s RETURNING id_detalle_venta;
+        DELETE FROM detalle_venta WHERE id_detalle_venta = %s RETURNING id_detalle_venta, id_venta;
     """
     try:
         async with conn.cursor() as cursor:
             await cursor.execute(consulta, (id_detalle_venta,))
             resultado = await cursor.fetchone()
             if resultado:
+                await recalcular_venta(cursor, resultado["id_venta"])
                 await conn.commit()
-                return {"id_detalle_venta": resultado[0]}
+                return {"id_detalle_venta": resultado["id_detalle_venta"]}
             else:
                 raise HTTPException(status_code=404, detail="Detalle de venta no encontrado")
     except Exception as e:
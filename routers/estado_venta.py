@@ -2,6 +2,8 @@ from fastapi import FastAPI, Depends, HTTPException, APIRouter
 from pydantic import BaseModel
 from contextlib import asynccontextmanager
 from config.conexionDB import pool, get_conexion, app
+from config.catalogo import catalogo, verificar_catalogo, publicar_cambio
+from config.admision import admitir, Prioridad
 from datetime import date
 
 router = APIRouter()
@@ -13,7 +15,7 @@ class EstadoVenta(BaseModel):
 class EstadoVentaCreate(BaseModel):
     nombre: str
 
-@router.get("/")
+@router.get("/", dependencies=[Depends(verificar_catalogo), Depends(admitir(Prioridad.CATALOGO))])
 async def listar(conn=Depends(get_conexion)):
     consulta = """
         SELECT * FROM estado_venta;
@@ -26,7 +28,7 @@ async def listar(conn=Depends(get_conexion)):
         print(f"Error listando estados de venta: {e}")
         raise HTTPException(status_code=400, detail="Ocurrió un error, consulte con su Administrador")
 
-@router.get("/{id_estado}")
+@router.get("/{id_estado}", dependencies=[Depends(verificar_catalogo)])
 async def obtener(id_estado: int, conn=Depends(get_conexion)):
     consulta = """
         SELECT * FROM estado_venta WHERE id_estado = %s;
@@ -52,7 +54,10 @@ async def crear(estado: EstadoVentaCreate, conn=Depends(get_conexion)):
         async with conn.cursor() as cursor:
             await cursor.execute(consulta, (estado.nombre,))
             id_estado = await cursor.fetchone()
-            return {"id_estado": id_estado[0], **estado.dict()}
+            await publicar_cambio(cursor)
+            await conn.commit()
+            catalogo.invalidar()
+            return {"id_estado": id_estado["id_estado"], **estado.dict()}
     except Exception as e:
         print(f"Error al crear estado de venta: {e}")
         raise HTTPException(status_code=400, detail="Ocurrió un error, consulte con su Administrador")
@@ -67,6 +72,9 @@ async def actualizar(id_estado: int, estado: EstadoVentaCreate, conn=Depends(get
             await cursor.execute(consulta, (estado.nombre, id_estado))
             resultado = await cursor.fetchone()
             if resultado:
+                await publicar_cambio(cursor)
+                await conn.commit()
+                catalogo.invalidar()
                 return resultado
             else:
                 raise HTTPException(status_code=404, detail="Estado de venta no encontrado")
@@ -84,6 +92,9 @@ async def eliminar(id_estado: int, conn=Depends(get_conexion)):
             await cursor.execute(consulta, (id_estado,))
             resultado = await cursor.fetchone()
             if resultado:
+                await publicar_cambio(cursor)
+                await conn.commit()
+                catalogo.invalidar()
                 return {"message": "Estado de venta eliminado"}
             else:
                 raise HTTPException(status_code=404, detail="Estado de venta no encontrado")
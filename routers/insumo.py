@@ -1,6 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from pydantic import BaseModel
-from config.conexionDB import get_conexion
+from config.conexionDB import get_conexion, pool
+from config.paginacion import Paginacion, listar_paginado
+from config.sse import respuesta_sse
+from config.admision import admitir, Prioridad
+from schema.enums import TipoMovInv
+from services import alertas_stock
+from services.stock_service import listar_insumos_bajo_stock, registrar_movimientos
 from decimal import Decimal
 
 router = APIRouter()
@@ -11,30 +17,46 @@ class Insumo(BaseModel):
     unidad: str
     stock : float
     activo: bool 
+    stock_minimo: float
 
 class InsumoInsert(BaseModel):
     nombre: str
     unidad: str
     stock : float
     activo: bool | None = True
+    stock_minimo: float = 0
 
-@router.get("/")
-async def listar(conn=Depends(get_conexion)):
-    consulta = """
-        SELECT * FROM insumo;
-    """
+@router.get("/", dependencies=[Depends(admitir(Prioridad.CATALOGO))])
+async def listar(response: Response, pag: Paginacion = Depends(), conn=Depends(get_conexion)):
     try:
-        async with conn.cursor() as cursor:
-            await cursor.execute(consulta)
-            return await cursor.fetchall()
+        return await listar_paginado(conn, response, "insumo_stock", "id_insumo", pag)
     except Exception as e:
         print(f"Error listado gral de Psycopg: {e}")
         raise HTTPException(status_code=400, detail="Ocurrió un error, consulte con su Administrador")
-    
+
+@router.get("/alertas")
+async def alertas(conn=Depends(get_conexion)):
+    return await listar_insumos_bajo_stock(conn)
+
+
+async def _snapshot_alertas():
+    # Conexión del pool solo mientras dura la consulta, no todo el stream
+    async with pool.connection() as conn:
+        return await listar_insumos_bajo_stock(conn)
+
+
+@router.get("/alertas/stream")
+async def alertas_stream():
+    """
+    Server-Sent Events: primero un `snapshot` con los insumos bajo su
+    stock_minimo y luego un evento `alerta` por cada cruce del umbral.
+    """
+    return respuesta_sse(alertas_stock.suscribirse, alertas_stock.desuscribirse, _snapshot_alertas)
+
 @router.get("/{id_insumo}")
 async def obtener(id_insumo: int, conn=Depends(get_conexion)):
     consulta = """
-        SELECT * FROM insumo WHERE id_insumo = %s;
+        SELECT * FROM insumo_stock WHERE id_insumo = %s;
     """
     try:
         async with conn.cursor() as cursor:
@@ -51,14 +73,14 @@ async def obtener(id_insumo: int, conn=Depends(get_conexion)):
 @router.post("/")
 async def crear(insumo: InsumoInsert, conn=Depends(get_conexion)):
     consulta = """
-        INSERT INTO insumo (nombre, unidad, stock, activo) VALUES (%s, %s, %s, %s) RETURNING id_insumo;
+        INSERT INTO insumo (nombre, unidad, stock, activo, stock_minimo) VALUES (%s, %s, %s, %s, %s) RETURNING id_insumo;
     """
     try:
         async with conn.cursor() as cursor:
-            await cursor.execute(consulta, (insumo.nombre, insumo.unidad, insumo.stock, insumo.activo))
+            await cursor.execute(consulta, (insumo.nombre, insumo.unidad, insumo.stock, insumo.activo, insumo.stock_minimo))
             id_insumo = await cursor.fetchone()
             await conn.commit()
-            return {"id_insumo": id_insumo[0], **insumo.dict()}
+            return {"id_insumo": id_insumo["id_insumo"], **insumo.dict()}
     except Exception as e:
         print(f"Error al crear insumo en Psycopg: {e}")
         raise HTTPException(status_code=400, detail="Ocurrió un error, consulte con su Administrador")
@@ -66,11 +88,13 @@ async def crear(insumo: InsumoInsert, conn=Depends(get_conexion)):
 
 @router.put("/{id_insumo}")
 async def actualizar(id_insumo: int, insumo: InsumoInsert, conn=Depends(get_conexion)):
+    # El stock enviado es el conteo real: la diferencia con el stock actual
+    # queda registrada como un movimiento de AJUSTE en el ledger.
     consulta = """
         UPDATE insumo
-        SET nombre = %s, unidad = %s, stock = %s, activo = %s
+        SET nombre = %s, unidad = %s, activo = %s, stock_minimo = %s
         WHERE id_insumo = %s
-        RETURNING id_insumo, nombre, unidad, stock, activo;
+        RETURNING id_insumo;
     """
     try:
         async with conn.cursor() as cursor:
@@ -79,13 +103,20 @@ async def actualizar(id_insumo: int, insumo: InsumoInsert, conn=Depends(get_cone
                 (
                     insumo.nombre,
                     insumo.unidad,
-                    insumo.stock,
                     insumo.activo,
+                    insumo.stock_minimo,
                     id_insumo
                 )
             )
             resultado = await cursor.fetchone()
             if resultado:
+                await cursor.execute("SELECT stock FROM insumo_stock WHERE id_insumo = %s;", (id_insumo,))
+                actual = await cursor.fetchone()
+                diferencia = Decimal(str(insumo.stock)) - actual["stock"]
+                if diferencia:
+                    await registrar_movimientos(cursor, TipoMovInv.AJUSTE.value, {id_insumo: diferencia})
+                await cursor.execute("SELECT * FROM insumo_stock WHERE id_insumo = %s;", (id_insumo,))
+                resultado = await cursor.fetchone()
                 await conn.commit()
                 return resultado
             else:
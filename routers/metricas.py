@@ -0,0 +1,74 @@
+from fastapi import APIRouter, Depends
+from config import admision, hashing, consultas, medicion, seguridad
+from config.seguridad import requiere_permiso
+from config.conexionDB import metricas_pool
+from services import cliente_busqueda
+from middlewares import login
+from schema.enums import Permiso
+
+# Solo administradores: exponen detalles internos de la app
+router = APIRouter(dependencies=[Depends(requiere_permiso(Permiso.METRICAS))])
+
+
+@router.get("/pool")
+async def metricas_pool_conexiones():
+    """
+    Estado del pool de conexiones: tamaño, peticiones en espera, conexiones
+    creadas/perdidas (churn) y percentiles del tiempo de checkout.
+    """
+    return metricas_pool()
+
+
+@router.get("/admision")
+async def metricas_admision():
+    """
+    Control de admisión por clase (POS, catálogo, reportes): en curso, en
+    cola, encolados y rechazados por motivo, más encolados/rechazados por ruta.
+    """
+    return admision.metricas()
+
+
+@router.get("/hash")
+async def metricas_hash():
+    """Estado del pool de hilos de bcrypt: profundidad de cola, rechazos y tiempos promedio."""
+    return hashing.metricas()
+
+
+@router.get("/cliente_busqueda")
+async def metricas_cliente_busqueda():
+    """Aciertos y fallos de la caché de /cliente/buscar."""
+    return cliente_busqueda.metricas()
+
+
+@router.get("/consultas")
+async def metricas_consultas():
+    """Llamadas y latencia de las consultas preparadas de los caminos calientes."""
+    return consultas.metricas()
+
+
+@router.get("/logging")
+async def metricas_logging():
+    """Ocupación de la cola de logs y registros descartados por nivel."""
+    return login.metricas_logging()
+
+
+@router.get("/rutas")
+async def metricas_rutas():
+    """
+    Latencia por ruta (p50/p90/p99/max del tiempo total y del tiempo en base
+    de datos) y consultas promedio por petición, ordenadas por p99.
+    """
+    return medicion.metricas()
+
+
+@router.delete("/rutas")
+async def reiniciar_metricas_rutas():
+    """Vacía los histogramas por ruta (útil entre corridas de carga)."""
+    medicion.reiniciar()
+    return {"mensaje": "Métricas de rutas reiniciadas"}
+
+
+@router.get("/auth")
+async def metricas_auth():
+    """Aciertos de la caché de tokens JWT verificados."""
+    return seguridad.metricas()
@@ -2,6 +2,7 @@ from fastapi import FastAPI, Depends, HTTPException, APIRouter
 from pydantic import BaseModel
 from contextlib import asynccontextmanager
 from config.conexionDB import pool, get_conexion, app
+from config.admision import admitir, Prioridad
 from services.creacion_empleado import crear_empleado
 from datetime import date
 from typing import Optional
@@ -46,7 +47,7 @@ class PersonalCreateSimple(BaseModel):
     crear_usuario: bool = False
 
 
-@router.get("/")
+@router.get("/", dependencies=[Depends(admitir(Prioridad.CATALOGO))])
 async def listar(conn=Depends(get_conexion)):
     consulta = """
         SELECT 
@@ -1,6 +1,10 @@
-from fastapi import Depends, HTTPException, APIRouter
+from fastapi import Depends, HTTPException, APIRouter, Response
 from pydantic import BaseModel
 from config.conexionDB import get_conexion
+from config.consultas import ConsultaPreparada
+from config.catalogo import catalogo, verificar_catalogo, publicar_cambio
+from config.respuestas import respuesta_json
+from config.admision import admitir, Prioridad
 from decimal import Decimal
 
 router = APIRouter()
@@ -22,28 +26,29 @@ class ProductoInsert(BaseModel):
     activo: bool | None = True
 
 
-# LISTAR TODOS
-@router.get("/")
-async def listar(conn=Depends(get_conexion)):
+CONSULTA_LISTAR = ConsultaPreparada("producto.listar", """
+    SELECT 
+        p.id_producto,
+        p.id_categoria,
+        p.nombre,
+        p.costo,
+        p.precio_venta,
+        p.activo,
+        c.nombre as categoria
+    FROM producto p
+    LEFT JOIN categoria_producto c ON p.id_categoria = c.id_categoria;
+""")
 
-    consulta = """
-        SELECT 
-            p.id_producto,
-            p.id_categoria,
-            p.nombre,
-            p.costo,
-            p.precio_venta,
-            p.activo,
-            c.nombre as categoria
-        FROM producto p
-        LEFT JOIN categoria_producto c ON p.id_categoria = c.id_categoria;
-    """
+
+# LISTAR TODOS
+@router.get("/", dependencies=[Depends(verificar_catalogo), Depends(admitir(Prioridad.CATALOGO))])
+async def listar(response: Response, conn=Depends(get_conexion)):
 
     try:
         async with conn.cursor() as cursor:
-            await cursor.execute(consulta)
+            await CONSULTA_LISTAR.ejecutar(cursor)
             resultado = await cursor.fetchall()
-            return resultado
+            return respuesta_json(resultado, response)
 
     except Exception as e:
         print(f"Error listando productos: {e}")
@@ -51,7 +56,7 @@ async def listar(conn=Depends(get_conexion)):
 
 
 # LISTAR POR ID
-@router.get("/{id}")
+@router.get("/{id}", dependencies=[Depends(verificar_catalogo)])
 async def listar_por_id(id: int, conn=Depends(get_conexion)):
 
     consulta = """
@@ -101,7 +106,9 @@ async def crear_producto(producto: ProductoInsert, conn=Depends(get_conexion)):
             )
 
             resultado = await cursor.fetchone()
+            await publicar_cambio(cursor)
             await conn.commit()
+            catalogo.invalidar()
             return resultado
 
     except Exception as e:
@@ -140,6 +147,9 @@ async def actualizar_producto(id: int, producto: ProductoInsert, conn=Depends(ge
             if resultado is None:
                 raise HTTPException(status_code=404, detail="Producto no encontrado")
 
+            await publicar_cambio(cursor)
+            await conn.commit()
+            catalogo.invalidar()
             return resultado
 
     except Exception as e:
@@ -166,6 +176,9 @@ async def eliminar_producto(id: int, conn=Depends(get_conexion)):
             if resultado is None:
                 raise HTTPException(status_code=404, detail="Producto no encontrado")
 
+            await publicar_cambio(cursor)
+            await conn.commit()
+            catalogo.invalidar()
             return {"mensaje": "Producto eliminado correctamente"}
 
     except Exception as e:
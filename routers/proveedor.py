@@ -1,6 +1,7 @@
 from fastapi import Depends, HTTPException, APIRouter
 from pydantic import BaseModel
 from config.conexionDB import get_conexion
+from config.admision import admitir, Prioridad
 
 router = APIRouter()
 
@@ -19,7 +20,7 @@ class ProveedorCreate(BaseModel):
     direccion: str
     activo: bool | None = True
 
-@router.get("/")
+@router.get("/", dependencies=[Depends(admitir(Prioridad.CATALOGO))])
 async def listar(conn=Depends(get_conexion)):
     consulta = """
         SELECT * FROM proveedor;
@@ -1,6 +1,9 @@
-from fastapi import Depends, HTTPException, APIRouter
+from fastapi import Depends, HTTPException, APIRouter, Response
 from pydantic import BaseModel
 from config.conexionDB import get_conexion
+from config.paginacion import Paginacion, listar_paginado
+from config.admision import admitir, Prioridad
+from services.receta_cache import recetas, publicar_cambio
 from datetime import date
 from decimal import Decimal
 
@@ -20,19 +23,10 @@ class RecetaInsert(BaseModel):
 
 
 # LISTAR TODAS LAS RECETAS
-@router.get("/")
-async def listar(conn=Depends(get_conexion)):
-
-    consulta = """
-        SELECT * FROM receta;
-    """
-
+@router.get("/", dependencies=[Depends(admitir(Prioridad.CATALOGO))])
+async def listar(response: Response, pag: Paginacion = Depends(), conn=Depends(get_conexion)):
     try:
-        async with conn.cursor() as cursor:
-            await cursor.execute(consulta)
-            resultado = await cursor.fetchall()
-            return resultado
-
+        return await listar_paginado(conn, response, "receta", "id_receta", pag)
     except Exception as e:
         print(f"Error listando recetas: {e}")
         raise HTTPException(status_code=400, detail="Error al listar recetas")
@@ -87,7 +81,9 @@ async def crear_receta(receta: RecetaInsert, conn=Depends(get_conexion)):
             )
 
             resultado = await cursor.fetchone()
+            await publicar_cambio(cursor)
             await conn.commit()
+            recetas.invalidar()
             return resultado
 
     except Exception as e:
@@ -126,7 +122,9 @@ async def actualizar_receta(id: int, receta: RecetaInsert, conn=Depends(get_cone
             if resultado is None:
                 raise HTTPException(status_code=404, detail="Receta no encontrada")
 
+            await publicar_cambio(cursor)
             await conn.commit()
+            recetas.invalidar()
             return resultado
 
     except Exception as e:
@@ -153,7 +151,9 @@ async def eliminar_receta(id: int, conn=Depends(get_conexion)):
             if resultado is None:
                 raise HTTPException(status_code=404, detail="Receta no encontrada")
 
+            await publicar_cambio(cursor)
             await conn.commit()
+            recetas.invalidar()
             return {"mensaje": "Receta eliminada correctamente"}
 
     except Exception as e:
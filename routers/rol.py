@@ -1,6 +1,8 @@
 from fastapi import Depends, HTTPException, APIRouter
 from pydantic import BaseModel
 from config.conexionDB import get_conexion
+from config.catalogo import catalogo, verificar_catalogo, publicar_cambio
+from config.admision import admitir, Prioridad
 
 router = APIRouter()
 
@@ -15,7 +17,7 @@ class RolInsert(BaseModel):
 
 
 # LISTAR TODOS
-@router.get("/")
+@router.get("/", dependencies=[Depends(verificar_catalogo), Depends(admitir(Prioridad.CATALOGO))])
 async def listar(conn=Depends(get_conexion)):
 
     consulta = """
@@ -35,7 +37,7 @@ async def listar(conn=Depends(get_conexion)):
 
 
 # LISTAR POR ID
-@router.get("/{id}")
+@router.get("/{id}", dependencies=[Depends(verificar_catalogo)])
 async def listar_por_id(id: int, conn=Depends(get_conexion)):
 
     consulta = """
@@ -75,6 +77,9 @@ async def crear_rol(rol: RolInsert, conn=Depends(get_conexion)):
 
             await cursor.execute(consulta, (rol.nombre,))
             resultado = await cursor.fetchone()
+            await publicar_cambio(cursor)
+            await conn.commit()
+            catalogo.invalidar()
 
             return resultado
 
@@ -103,6 +108,9 @@ async def actualizar_rol(id: int, rol: RolInsert, conn=Depends(get_conexion)):
             if resultado is None:
                 raise HTTPException(status_code=404, detail="Rol no encontrado")
 
+            await publicar_cambio(cursor)
+            await conn.commit()
+            catalogo.invalidar()
             return resultado
 
     except Exception as e:
@@ -129,6 +137,9 @@ async def eliminar_rol(id: int, conn=Depends(get_conexion)):
             if resultado is None:
                 raise HTTPException(status_code=404, detail="Rol no encontrado")
 
+            await publicar_cambio(cursor)
+            await conn.commit()
+            catalogo.invalidar()
             return {"mensaje": "Rol eliminado correctamente"}
 
     except Exception as e:
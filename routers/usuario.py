@@ -1,7 +1,9 @@
-from fastapi import FastAPI, Depends, HTTPException, APIRouter
+from fastapi import FastAPI, Depends, HTTPException, APIRouter, Response
 from pydantic import BaseModel
 from contextlib import asynccontextmanager
 from config.conexionDB import pool, get_conexion, app
+from config.paginacion import Paginacion, listar_paginado
+from config.admision import admitir, Prioridad
 from services.creacion_empleado import crear_usuario_para_empleado
 from datetime import date
 
@@ -29,15 +31,10 @@ class UsuarioCreateAuto(BaseModel):
     id_personal: int
 
 
-@router.get("/")
-async def listar(conn=Depends(get_conexion)):
-    consulta = """
-        SELECT * FROM usuario;
-    """
+@router.get("/", dependencies=[Depends(admitir(Prioridad.CATALOGO))])
+async def listar(response: Response, pag: Paginacion = Depends(), conn=Depends(get_conexion)):
     try:
-        async with conn.cursor() as cursor:
-            await cursor.execute(consulta)
-            return await cursor.fetchall()
+        return await listar_paginado(conn, response, "usuario", "id_usuario", pag)
     except Exception as e:
         print(f"Error listado gral de Psycopg: {e}")
         raise HTTPException(status_code=400, detail="Ocurrió un error, consulte con su Administrador")
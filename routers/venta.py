@@ -1,10 +1,17 @@
-from fastapi import FastAPI, Depends, HTTPException, APIRouter
+from fastapi import FastAPI, Depends, HTTPException, APIRouter, Query, Response
 from pydantic import BaseModel
 from contextlib import asynccontextmanager
-from config.conexionDB import pool, get_conexion, app
-from services.venta_service import registrar_venta
-from datetime import date
-from typing import List, Optional
+from config.conexionDB import pool, get_conexion, get_conexion_reportes, app
+from config.paginacion import Paginacion, listar_paginado, respuesta_exportacion
+from config.respuestas import respuesta_json
+from config.sse import respuesta_sse
+from config.admision import admitir, Prioridad
+from services.venta_service import registrar_venta, registrar_lote
+from services.pedidos_feed import ESTACION_POR_ROL, FiltroPedidos, feed, publicar_pedidos
+from services.resumen_service import recalcular_venta
+from datetime import date, datetime
+from uuid import UUID
+from typing import List, Literal, Optional
 from schema.enums import EstadoVenta
 
 
@@ -45,36 +52,47 @@ class VentaRegistro(BaseModel):
     metodo_pago: str
     detalles: List[DetalleVenta]
 
-@router.get("/")
-async def listar(conn=Depends(get_conexion)):
-    consulta = """
-        SELECT * FROM venta;
-    """
+class VentaOffline(VentaRegistro):
+    id_local: UUID                      # Generado por el POS; identifica la venta entre reintentos
+    fecha: Optional[datetime] = None    # Momento real de la venta; si falta se usa la hora de sincronización
+
+class VentaLote(BaseModel):
+    ventas: List[VentaOffline]
+
+class CambioEstado(BaseModel):
+    id_estado: int
+
+@router.get("/", dependencies=[Depends(admitir(Prioridad.CATALOGO))])
+async def listar(response: Response, pag: Paginacion = Depends(), conn=Depends(get_conexion)):
     try:
-        async with conn.cursor() as cursor:
-            await cursor.execute(consulta)
-            return await cursor.fetchall()
+        return await listar_paginado(conn, response, "venta", "id_venta", pag)
     except Exception as e:
         print(f"Error listando ventas: {e}")
         raise HTTPException(status_code=400, detail="Ocurrió un error, consulte con su Administrador")
 
-@router.get("/reporte/detallado")
-async def reporte_ventas(fecha_inicio: Optional[str] = None, fecha_fin: Optional[str] = None, id_usuario: Optional[int] = None, conn=Depends(get_conexion)):
+@router.get("/reporte/detallado", dependencies=[Depends(admitir(Prioridad.REPORTES))])
+async def reporte_ventas(fecha_inicio: Optional[str] = None, fecha_fin: Optional[str] = None, id_usuario: Optional[int] = None,
+                         formato: Optional[Literal["csv", "ndjson"]] = None, conn=Depends(get_conexion_reportes)):
     """
     Reporte de ventas con detalle de productos.
     Parámetros opcionales:
     - fecha_inicio: YYYY-MM-DD
     - fecha_fin: YYYY-MM-DD
     - id_usuario: filtrar por usuario
+    - formato: csv | ndjson para exportar en streaming (sin cargar todo en memoria)
     """
     try:
         filtros = []
         params = []
         
-        if fecha_inicio and fecha_fin:
-            filtros.append("v.fecha >= DATE(%s) AND v.fecha <= DATE(%s)")
-            params.extend([fecha_inicio, fecha_fin])
-        
+        if fecha_inicio:
+            filtros.append("v.fecha >= DATE(%s)")
+            params.append(fecha_inicio)
+
+        if fecha_fin:
+            filtros.append("v.fecha < DATE(%s) + 1")
+            params.append(fecha_fin)
+
         if id_usuario:
             filtros.append("v.id_usuario = %s")
             params.append(id_usuario)
@@ -98,20 +116,118 @@ async def reporte_ventas(fecha_inicio: Optional[str] = None, fecha_fin: Optional
             LEFT JOIN cliente c ON v.id_cliente = c.id_cliente
             LEFT JOIN estado_venta ev ON v.id_estado = ev.id_estado
             LEFT JOIN usuario pe ON v.id_usuario = pe.id_usuario
-            LEFT JOIN detalle_venta dv ON v.id_venta = dv.id_venta
+            LEFT JOIN detalle_venta dv ON v.id_venta = dv.id_venta AND dv.fecha_venta = v.fecha
             LEFT JOIN producto p ON dv.id_producto = p.id_producto
             {where_clause}
             ORDER BY v.id_venta DESC, dv.id_detalle_venta
         """
-        
+
+        if formato:
+            return await respuesta_exportacion(conn, consulta, params, formato, "reporte_ventas")
+
         async with conn.cursor() as cursor:
             await cursor.execute(consulta, params)
-            return await cursor.fetchall()
+            return respuesta_json(await cursor.fetchall())
     except Exception as e:
         print(f"Error en reporte de ventas: {e}")
         raise HTTPException(status_code=400, detail="Error al generar reporte")
     
-@router.get("/{id_venta}/factura")
+# Columnas por las que se puede desglosar el resumen diario
+_DIMENSIONES_RESUMEN = {
+    "producto": ("r.id_producto, p.nombre AS producto", "JOIN producto p ON p.id_producto = r.id_producto",
+                 "r.id_producto, p.nombre"),
+    "usuario": ("r.id_usuario, u.email AS usuario", "JOIN usuario u ON u.id_usuario = r.id_usuario",
+                "r.id_usuario, u.email"),
+    "metodo_pago": ("r.metodo_pago", "", "r.metodo_pago"),
+}
+
+
+def _filtros_resumen(fecha_inicio, fecha_fin, id_usuario):
+    filtros = []
+    params = []
+    if fecha_inicio:
+        filtros.append("r.fecha >= %s")
+        params.append(fecha_inicio)
+    if fecha_fin:
+        filtros.append("r.fecha <= %s")
+        params.append(fecha_fin)
+    if id_usuario:
+        filtros.append("r.id_usuario = %s")
+        params.append(id_usuario)
+    where_clause = "WHERE " + " AND ".join(filtros) if filtros else ""
+    return where_clause, params
+
+
+@router.get("/reporte/resumen", dependencies=[Depends(admitir(Prioridad.REPORTES))])
+async def resumen_ventas(fecha_inicio: Optional[date] = None, fecha_fin: Optional[date] = None,
+                         id_usuario: Optional[int] = None, conn=Depends(get_conexion_reportes)):
+    """
+    Totales de ventas por día, leídos del resumen diario (no recorre detalle_venta).
+    Parámetros opcionales: fecha_inicio, fecha_fin (YYYY-MM-DD), id_usuario.
+    """
+    try:
+        where_clause, params = _filtros_resumen(fecha_inicio, fecha_fin, id_usuario)
+        consulta = f"""
+            SELECT r.fecha, SUM(r.cantidad) AS cantidad, SUM(r.ingreso) AS ingreso
+            FROM venta_resumen_diario r
+            {where_clause}
+            GROUP BY r.fecha
+            ORDER BY r.fecha
+        """
+        async with conn.cursor() as cursor:
+            await cursor.execute(consulta, params)
+            por_dia = await cursor.fetchall()
+        return respuesta_json({
+            "cantidad": sum(d["cantidad"] for d in por_dia),
+            "ingreso": sum(d["ingreso"] for d in por_dia),
+            "por_dia": por_dia,
+        })
+    except Exception as e:
+        print(f"Error en resumen de ventas: {e}")
+        raise HTTPException(status_code=400, detail="Error al generar resumen")
+
+
+@router.get("/reporte/resumen/{dimension}", dependencies=[Depends(admitir(Prioridad.REPORTES))])
+async def resumen_ventas_por(dimension: Literal["producto", "usuario", "metodo_pago"],
+                             fecha_inicio: Optional[date] = None, fecha_fin: Optional[date] = None,
+                             id_usuario: Optional[int] = None, conn=Depends(get_conexion_reportes)):
+    """
+    Totales de ventas agrupados por producto, usuario o método de pago,
+    ordenados por ingreso (el primero es el más vendido).
+    """
+    try:
+        columnas, join, agrupacion = _DIMENSIONES_RESUMEN[dimension]
+        where_clause, params = _filtros_resumen(fecha_inicio, fecha_fin, id_usuario)
+        consulta = f"""
+            SELECT {columnas}, SUM(r.cantidad) AS cantidad, SUM(r.ingreso) AS ingreso
+            FROM venta_resumen_diario r
+            {join}
+            {where_clause}
+            GROUP BY {agrupacion}
+            ORDER BY ingreso DESC
+        """
+        async with conn.cursor() as cursor:
+            await cursor.execute(consulta, params)
+            return respuesta_json(await cursor.fetchall())
+    except Exception as e:
+        print(f"Error en resumen de ventas por {dimension}: {e}")
+        raise HTTPException(status_code=400, detail="Error al generar resumen")
+
+@router.get("/pedidos/stream")
+async def pedidos_stream(rol: Optional[Literal["barista", "cocinero", "mesero"]] = None,
+                         estado: List[str] = Query(default=[])):
+    """
+    Server-Sent Events con los pedidos de hoy, para las pantallas de barra y cocina.
+    - rol: barista (solo bebidas), cocinero (el resto) o mesero/sin rol (todo el pedido)
+    - estado: nombres de estado_venta a mostrar, repetible (?estado=PENDIENTE)
+
+    Envía un `snapshot` inicial, luego `pedido` con cada pedido nuevo o
+    modificado y `retirado` cuando sale de los estados filtrados o se elimina.
+    """
+    filtro = FiltroPedidos(estacion=ESTACION_POR_ROL.get(rol), estados=frozenset(estado))
+    return respuesta_sse(lambda: feed.suscribirse(filtro), feed.desuscribirse, lambda: feed.snapshot(filtro))
+
+@router.get("/{id_venta}/factura", dependencies=[Depends(admitir(Prioridad.POS))])
 async def obtener_factura(id_venta: int, conn=Depends(get_conexion)):
     """
     Devuelve todos los datos necesarios para generar la factura PDF de una venta.
@@ -132,7 +248,7 @@ async def obtener_factura(id_venta: int, conn=Depends(get_conexion)):
         FROM venta v
         LEFT JOIN cliente c   ON v.id_cliente  = c.id_cliente
         LEFT JOIN estado_venta ev ON v.id_estado = ev.id_estado
-        LEFT JOIN detalle_venta dv ON v.id_venta = dv.id_venta
+        LEFT JOIN detalle_venta dv ON v.id_venta = dv.id_venta AND dv.fecha_venta = v.fecha
         LEFT JOIN producto p  ON dv.id_producto = p.id_producto
         WHERE v.id_venta = %s
         ORDER BY dv.id_detalle_venta;
@@ -143,7 +259,7 @@ async def obtener_factura(id_venta: int, conn=Depends(get_conexion)):
             rows = await cursor.fetchall()
             if not rows:
                 raise HTTPException(status_code=404, detail="Venta no encontrada")
-            return rows
+            return respuesta_json(rows)
     except HTTPException:
         raise
     except Exception as e:
@@ -169,7 +285,7 @@ async def obtener(id_venta: int, conn=Depends(get_conexion)):
         raise HTTPException(status_code=400, detail="Ocurrió un error, consulte con su Administrador")
 
 
-@router.post("/")
+@router.post("/", dependencies=[Depends(admitir(Prioridad.POS))])
 async def crear_venta(venta: VentaRegistro, conn=Depends(get_conexion)):
     """
     Registra una venta con detalles de productos.
@@ -203,6 +319,32 @@ async def crear_venta(venta: VentaRegistro, conn=Depends(get_conexion)):
         raise HTTPException(status_code=500, detail="Ocurrió un error, consulte con su Administrador")
 
 
+@router.post("/lote", dependencies=[Depends(admitir(Prioridad.POS))])
+async def crear_ventas_lote(lote: VentaLote, conn=Depends(get_conexion)):
+    """
+    Sincroniza las ventas que el POS encoló sin conexión, en una sola transacción.
+    Body: {"ventas": [{"id_local": "<uuid>", "fecha": "...", ...mismo formato que POST /venta/}]}
+
+    Reenviar el mismo lote es seguro: las ventas con un id_local ya registrado
+    vuelven como 'duplicada' con su id_venta. Cada venta se responde como
+    'registrada', 'duplicada' o 'rechazada' (con el motivo).
+    """
+    try:
+        ventas = []
+        for v in lote.ventas:
+            venta = v.dict()
+            # La columna es TIMESTAMP sin zona: se guarda en hora local del servidor
+            if venta["fecha"] and venta["fecha"].tzinfo:
+                venta["fecha"] = venta["fecha"].astimezone().replace(tzinfo=None)
+            ventas.append(venta)
+        return await registrar_lote(conn, ventas)
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error al registrar lote de ventas: {e}")
+        raise HTTPException(status_code=500, detail="Ocurrió un error, consulte con su Administrador")
+
+
 @router.put("/{id_venta}")
 async def actualizar_venta(id_venta: int, venta: VentaCreate, conn=Depends(get_conexion)):
     consulta = """
@@ -225,6 +367,8 @@ async def actualizar_venta(id_venta: int, venta: VentaCreate, conn=Depends(get_c
             )
             resultado = await cursor.fetchone()
             if resultado:
+                await recalcular_venta(cursor, id_venta)
+                await publicar_pedidos(cursor, [id_venta])
                 await conn.commit()
                 return resultado
             else:
@@ -234,6 +378,29 @@ async def actualizar_venta(id_venta: int, venta: VentaCreate, conn=Depends(get_c
         raise HTTPException(status_code=400, detail="Ocurrió un error, consulte con su Administrador")
 
 
+@router.patch("/{id_venta}/estado", dependencies=[Depends(admitir(Prioridad.POS))])
+async def cambiar_estado(id_venta: int, cambio: CambioEstado, conn=Depends(get_conexion)):
+    """Cambia solo el estado del pedido (p. ej. PENDIENTE -> COMPLETADA desde la cocina)."""
+    consulta = """
+        UPDATE venta SET id_estado = %s
+        WHERE id_venta = %s
+        RETURNING id_venta, id_estado;
+    """
+    try:
+        async with conn.cursor() as cursor:
+            await cursor.execute(consulta, (cambio.id_estado, id_venta))
+            resultado = await cursor.fetchone()
+            if resultado:
+                await publicar_pedidos(cursor, [id_venta])
+                await conn.commit()
+                return resultado
+            else:
+                raise HTTPException(status_code=404, detail="Venta no encontrada")
+    except Exception as e:
+        print(f"Error al cambiar estado de venta: {e}")
+        raise HTTPException(status_code=400, detail="Ocurrió un error, consulte con su Administrador")
+
+
 @router.delete("/{id_venta}")
 async def eliminar_venta(id_venta: int, conn=Depends(get_conexion)):
     consulta = """
@@ -244,6 +411,7 @@ async def eliminar_venta(id_venta: int, conn=Depends(get_conexion)):
             await cursor.execute(consulta, (id_venta,))
             resultado = await cursor.fetchone()
             if resultado:
+                await publicar_pedidos(cursor, [id_venta])
                 await conn.commit()
                 return {"message": "Venta eliminada correctamente"}
             else:
@@ -22,4 +22,16 @@ class EstadoVenta(str, Enum):
 
 
 class MetodoPago(str, Enum):
-    EFECTIVO = "EFECTIVO"
\ No newline at end of file
+    EFECTIVO = "EFECTIVO"
+
+class Permiso(str, Enum):
+    CATALOGO_LEER   = "CATALOGO_LEER"
+    CATALOGO_EDITAR = "CATALOGO_EDITAR"
+    VENTAS          = "VENTAS"
+    PEDIDOS         = "PEDIDOS"
+    CLIENTES        = "CLIENTES"
+    INVENTARIO      = "INVENTARIO"
+    COMPRAS         = "COMPRAS"
+    REPORTES        = "REPORTES"
+    PERSONAL        = "PERSONAL"
+    METRICAS        = "METRICAS"
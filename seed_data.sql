@@ -171,12 +171,17 @@ INSERT INTO venta (id_usuario, id_cliente, id_estado, metodo_pago, fecha) VALUES
     (2, 2, 1, 'EFECTIVO',       NOW() - INTERVAL '1 day'),
     (3, 3, 3, 'EFECTIVO',  NOW());
 
-INSERT INTO detalle_venta (id_venta, id_producto, cantidad, precio_unitario) VALUES
+-- fecha_venta es la fecha de la venta (clave de partición)
+INSERT INTO detalle_venta (id_venta, fecha_venta, id_producto, cantidad, precio_unitario)
+SELECT d.id_venta, v.fecha, d.id_producto, d.cantidad, d.precio_unitario
+FROM (VALUES
     (1, 1, 2,  8.00),   -- 2 cafés americanos
     (1, 6, 1, 18.00),   -- 1 sándwich jamón
     (2, 2, 1, 10.00),   -- café con leche
     (2, 8, 2, 12.00),   -- 2 brownies
-    (3, 9, 1, 35.00);   -- 1 desayuno completo (pendiente)
+    (3, 9, 1, 35.00)    -- 1 desayuno completo (pendiente)
+) AS d(id_venta, id_producto, cantidad, precio_unitario)
+JOIN venta v ON v.id_venta = d.id_venta;
 
 
 -- ============================================================
@@ -0,0 +1,58 @@
+import asyncio
+import json
+import logging
+from config.notificaciones import suscribir, notificar
+from config.sse import encolar
+
+logger = logging.getLogger(__name__)
+
+# Cuando una venta o compra hace que un insumo cruce su stock_minimo, la misma
+# transacción encola un NOTIFY en este canal. Postgres lo entrega a todos los
+# workers solo tras el commit, y cada worker lo reparte a sus clientes SSE.
+CANAL_ALERTA_STOCK = "stock_alerta"
+
+# Eventos pendientes por cliente; si un cliente lento llena su cola se le
+# descarta lo acumulado y se le pide resincronizar (None).
+COLA_MAX = 100
+
+_clientes: set[asyncio.Queue] = set()
+
+
+def suscribirse() -> asyncio.Queue:
+    cola = asyncio.Queue(maxsize=COLA_MAX)
+    _clientes.add(cola)
+    return cola
+
+
+def desuscribirse(cola: asyncio.Queue):
+    _clientes.discard(cola)
+
+
+def _difundir(payload):
+    # payload None: la escucha se reconectó y pudo perder alertas
+    item = ("alerta", json.loads(payload)) if payload is not None else None
+    for cola in _clientes:
+        encolar(cola, item)
+
+
+suscribir(CANAL_ALERTA_STOCK, _difundir)
+
+
+async def publicar_cruces(cur, filas):
+    """
+    Encola una alerta por cada insumo que cruzó su stock_minimo (hacia abajo:
+    "bajo"; hacia arriba: "repuesto"). Llamar dentro de la transacción.
+    """
+    for fila in filas:
+        stock = float(fila["stock"])
+        stock_minimo = float(fila["stock_minimo"])
+        evento = {
+            "tipo": "bajo" if stock < stock_minimo else "repuesto",
+            "id_insumo": fila["id_insumo"],
+            "nombre": fila["nombre"],
+            "unidad": fila["unidad"],
+            "stock": stock,
+            "stock_minimo": stock_minimo,
+        }
+        logger.info(f"Alerta de stock ({evento['tipo']}): {evento['nombre']} = {stock} {evento['unidad']}")
+        await notificar(cur, CANAL_ALERTA_STOCK, json.dumps(evento))
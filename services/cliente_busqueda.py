@@ -0,0 +1,129 @@
+import logging
+import time
+from collections import OrderedDict
+from config.config import settings
+from config.notificaciones import suscribir, notificar
+
+logger = logging.getLogger(__name__)
+
+CANAL_CLIENTE = "cliente_cambio"
+LIMITE_RESULTADOS = 10
+LARGO_MINIMO_TRIGRAMA = 3   # con menos caracteres el índice de trigramas no ayuda
+
+# q normalizada -> (instante de carga, resultados). Cada entrada expira por TTL;
+# además se vacía al editar o desactivar un cliente (local o de otro worker vía
+# NOTIFY). Los clientes nuevos, que las ventas crean a cada rato, no la vacían:
+# aparecen en las búsquedas ya cacheadas cuando vence el TTL.
+_cache: OrderedDict[str, tuple[float, list]] = OrderedDict()
+_metricas = {"aciertos": 0, "fallos": 0}
+
+
+def invalidar(payload=None):
+    _cache.clear()
+
+
+suscribir(CANAL_CLIENTE, invalidar)
+
+
+async def publicar_cambio(cur):
+    """
+    Avisa a todos los workers que se editó o desactivó un cliente. Llamar
+    antes del commit; las altas no necesitan avisar.
+    """
+    await notificar(cur, CANAL_CLIENTE)
+
+
+def _escapar_like(texto: str) -> str:
+    return texto.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _consulta(q: str):
+    """
+    Elige la consulta según la búsqueda:
+    - vacía: primeros clientes por nombre
+    - corta (< 3): solo prefijos de NIT y nombre. Cada prefijo se lee de su
+      índice btree *_pattern_ops en el orden del índice (USING ~<~), así el
+      LIMIT corta el recorrido en vez de ordenar todas las coincidencias
+    - larga: subcadena en NIT o nombre (índices GIN de trigramas)
+    En todos los casos el NIT exacto y los prefijos se ordenan primero.
+    """
+    if not q:
+        return (
+            "SELECT id_cliente, nombre, nit FROM cliente WHERE activo = TRUE ORDER BY nombre LIMIT %(limite)s",
+            {"limite": LIMITE_RESULTADOS},
+        )
+
+    params = {
+        "q": q,
+        "prefijo": _escapar_like(q) + "%",
+        "prefijo_lower": _escapar_like(q.lower()) + "%",
+        "subcadena": "%" + _escapar_like(q) + "%",
+        "limite": LIMITE_RESULTADOS,
+    }
+    if len(q) < LARGO_MINIMO_TRIGRAMA:
+        consulta = """
+            SELECT id_cliente, nombre, nit
+            FROM (
+                (SELECT id_cliente, nombre, nit, 0 AS grupo
+                 FROM cliente
+                 WHERE activo = TRUE AND nit LIKE %(prefijo)s
+                 ORDER BY nit USING ~<~
+                 LIMIT %(limite)s)
+                UNION ALL
+                (SELECT id_cliente, nombre, nit, 1 AS grupo
+                 FROM cliente
+                 WHERE activo = TRUE AND lower(nombre) LIKE %(prefijo_lower)s
+                 ORDER BY lower(nombre) USING ~<~
+                 LIMIT %(limite)s)
+            ) c
+            GROUP BY id_cliente, nombre, nit
+            ORDER BY (nit = %(q)s) DESC, MIN(grupo), nombre
+            LIMIT %(limite)s
+        """
+        return consulta, params
+
+    filtro = "(nit ILIKE %(subcadena)s OR nombre ILIKE %(subcadena)s)"
+    similitud = "similarity(nombre, %(q)s) DESC," if settings.cliente_busqueda_trgm else ""
+    consulta = f"""
+        SELECT id_cliente, nombre, nit
+        FROM cliente
+        WHERE activo = TRUE
+          AND {filtro}
+        ORDER BY
+            (nit = %(q)s) DESC,
+            (nit LIKE %(prefijo)s) DESC,
+            (lower(nombre) LIKE %(prefijo_lower)s) DESC,
+            {similitud}
+            nombre
+        LIMIT %(limite)s
+    """
+    return consulta, params
+
+
+async def buscar(conn, q: str) -> list:
+    """Busca clientes activos por NIT/CI o nombre, con caché LRU de búsquedas recientes."""
+    q = q.strip()
+    clave = q.lower()
+    ahora = time.monotonic()
+
+    entrada = _cache.get(clave)
+    if entrada and ahora - entrada[0] < settings.cliente_busqueda_ttl:
+        _cache.move_to_end(clave)
+        _metricas["aciertos"] += 1
+        return entrada[1]
+
+    _metricas["fallos"] += 1
+    consulta, params = _consulta(q)
+    async with conn.cursor() as cursor:
+        await cursor.execute(consulta, params)
+        resultados = await cursor.fetchall()
+
+    _cache[clave] = (ahora, resultados)
+    _cache.move_to_end(clave)
+    while len(_cache) > settings.cliente_busqueda_cache:
+        _cache.popitem(last=False)
+    return resultados
+
+
+def metricas() -> dict:
+    return {**_metricas, "entradas": len(_cache)}
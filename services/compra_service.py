@@ -1,42 +1,65 @@
 import logging
+from collections import Counter
+from decimal import Decimal
 from fastapi import HTTPException
+from services.stock_service import registrar_movimientos
+from schema.enums import TipoMovInv
 
 logger = logging.getLogger(__name__)
 
 
-async def _obtener_o_crear_insumo(cur, nombre, unidad, cantidad):
+async def _resolver_insumos(cur, detalles) -> dict[str, int]:
     """
-    Busca un insumo por nombre.
-    - Si existe: retorna su id_insumo (el stock se actualiza después).
-    - Si no existe: lo crea con stock=0 y activo=True, retorna el nuevo id_insumo.
+    Resuelve los insumos de la compra por nombre: {nombre: id_insumo}.
+    - Los existentes se buscan todos en una sola consulta.
+    - Los que no existen se crean juntos con stock=0 y activo=True
+      (el stock se registra después en el ledger).
     La unidad es obligatoria solo cuando se crea; si el insumo ya existe se ignora.
     """
+    nombres = [d["nombre"] for d in detalles]
     await cur.execute(
-        "SELECT id_insumo FROM insumo WHERE nombre = %s",
-        (nombre,)
+        "SELECT id_insumo, nombre FROM insumo WHERE nombre = ANY(%s)",
+        (nombres,)
     )
-    row = await cur.fetchone()
-    if row:
-        return row["id_insumo"]
+    ids = {row["nombre"]: row["id_insumo"] for row in await cur.fetchall()}
 
-    # Insumo nuevo: se crea con stock=0, la compra le sumará el stock a continuación
-    if not unidad:
-        raise HTTPException(
-            status_code=400,
-            detail=f"El insumo '{nombre}' no existe. Debes indicar 'unidad' para crearlo."
-        )
+    # Insumos nuevos: se crean con stock=0, la compra les sumará el stock a continuación
+    nuevos = [d for d in detalles if d["nombre"] not in ids]
+    if not nuevos:
+        return ids
+
+    for d in nuevos:
+        if not d.get("unidad"):
+            raise HTTPException(
+                status_code=400,
+                detail=f"El insumo '{d['nombre']}' no existe. Debes indicar 'unidad' para crearlo."
+            )
 
     await cur.execute(
         """
         INSERT INTO insumo (nombre, unidad, stock, activo)
-        VALUES (%s, %s, 0, TRUE)
-        RETURNING id_insumo
+        SELECT n.nombre, n.unidad, 0, TRUE
+        FROM unnest(%s::text[], %s::text[]) AS n(nombre, unidad)
+        ON CONFLICT (nombre) DO NOTHING
+        RETURNING id_insumo, nombre
         """,
-        (nombre, unidad)
+        ([d["nombre"] for d in nuevos], [d["unidad"] for d in nuevos])
     )
-    nuevo = await cur.fetchone()
-    logger.info(f"Insumo nuevo creado: '{nombre}' (id={nuevo['id_insumo']})")
-    return nuevo["id_insumo"]
+    creados = {row["nombre"]: row["id_insumo"] for row in await cur.fetchall()}
+    ids.update(creados)
+    if creados:
+        logger.info(f"Insumos nuevos creados: {creados}")
+
+    # Creados por otra transacción entre la búsqueda y el INSERT
+    concurrentes = [d["nombre"] for d in nuevos if d["nombre"] not in ids]
+    if concurrentes:
+        await cur.execute(
+            "SELECT id_insumo, nombre FROM insumo WHERE nombre = ANY(%s)",
+            (concurrentes,)
+        )
+        ids.update({row["nombre"]: row["id_insumo"] for row in await cur.fetchall()})
+
+    return ids
 
 
 async def registrar_compra(conn, id_proveedor, id_usuario, detalles, observacion=None):
@@ -57,6 +80,13 @@ async def registrar_compra(conn, id_proveedor, id_usuario, detalles, observacion
     if not detalles:
         raise HTTPException(status_code=400, detail="Detalles requeridos")
 
+    repetidos = sorted(n for n, c in Counter(d["nombre"] for d in detalles).items() if c > 1)
+    if repetidos:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Insumos repetidos en la compra: {', '.join(repetidos)}. Agrupa cada insumo en una sola línea."
+        )
+
     try:
         cur = conn.cursor()
 
@@ -94,44 +124,56 @@ async def registrar_compra(conn, id_proveedor, id_usuario, detalles, observacion
         row = await cur.fetchone()
         id_compra = row["id_compra"]
 
-        insumos_afectados = []
-
-        # 2. Procesar cada detalle
-        for d in detalles:
-            nombre = d["nombre"]
-            cantidad = d["cantidad"]
-            costo_unitario = d["costo_unitario"]
-            unidad = d.get("unidad")
-
-            # Resolver insumo (crear si no existe)
-            id_insumo = await _obtener_o_crear_insumo(cur, nombre, unidad, cantidad)
-
-            # Insertar detalle de compra
-            await cur.execute(
-                """
-                INSERT INTO detalle_compra (id_compra, id_insumo, cantidad, costo_unitario)
-                VALUES (%s, %s, %s, %s)
-                """,
-                (id_compra, id_insumo, cantidad, costo_unitario)
+        # 2. Resolver todos los insumos (crear los que no existan)
+        ids_insumo = await _resolver_insumos(cur, detalles)
+        lineas = [
+            (
+                ids_insumo[d["nombre"]],
+                Decimal(str(d["cantidad"])),
+                Decimal(str(d["costo_unitario"])),
             )
+            for d in detalles
+        ]
 
-            # Actualizar stock del insumo
-            await cur.execute(
-                """
-                UPDATE insumo SET stock = stock + %s WHERE id_insumo = %s
-                RETURNING id_insumo, nombre, unidad, stock
-                """,
-                (cantidad, id_insumo)
+        # 3. Insertar todos los detalles en una sola sentencia
+        await cur.execute(
+            """
+            INSERT INTO detalle_compra (id_compra, id_insumo, cantidad, costo_unitario)
+            SELECT %s, d.id_insumo, d.cantidad, d.costo_unitario
+            FROM unnest(%s::int[], %s::numeric[], %s::numeric[])
+                 AS d(id_insumo, cantidad, costo_unitario)
+            """,
+            (
+                id_compra,
+                [l[0] for l in lineas],
+                [l[1] for l in lineas],
+                [l[2] for l in lineas],
             )
-            insumo_actualizado = await cur.fetchone()
-            insumos_afectados.append({
-                "id_insumo": insumo_actualizado["id_insumo"],
-                "nombre": insumo_actualizado["nombre"],
-                "unidad": insumo_actualizado["unidad"],
-                "stock_actual": float(insumo_actualizado["stock"]),
+        )
+
+        # 4. Registrar las entradas de stock en el ledger
+        await registrar_movimientos(
+            cur, TipoMovInv.COMPRA.value,
+            {id_insumo: cantidad for id_insumo, cantidad, _ in lineas},
+            id_referencia=id_compra
+        )
+        await cur.execute(
+            "SELECT id_insumo, nombre, unidad, stock FROM insumo_stock WHERE id_insumo = ANY(%s)",
+            ([l[0] for l in lineas],)
+        )
+        stock = {row["id_insumo"]: row for row in await cur.fetchall()}
+
+        insumos_afectados = [
+            {
+                "id_insumo": id_insumo,
+                "nombre": stock[id_insumo]["nombre"],
+                "unidad": stock[id_insumo]["unidad"],
+                "stock_actual": float(stock[id_insumo]["stock"]),
                 "cantidad_comprada": float(cantidad),
                 "costo_unitario": float(costo_unitario),
-            })
+            }
+            for id_insumo, cantidad, costo_unitario in lineas
+        ]
 
         await conn.commit()
         return {
@@ -1,6 +1,6 @@
 import logging
-import bcrypt
 from fastapi import HTTPException
+from config.hashing import hashear_password
 
 logger = logging.getLogger(__name__)
 
@@ -39,7 +39,7 @@ async def crear_empleado(conn, id_rol, ci, nombres, primer_apellido, segundo_ape
             email = f"{nombre_limpio}.{apellido_limpio}@cafeteria.com"
             password = str(ci)[-6:]
 
-            password_hash = bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+            password_hash = await hashear_password(password)
 
             await cur.execute(
                 """
@@ -95,7 +95,7 @@ async def crear_usuario_para_empleado(conn, id_personal):
         email = f"{nombre_limpio}.{apellido_limpio}@cafeteria.com"
         password = str(ci)[-6:]
 
-        password_hash = bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+        password_hash = await hashear_password(password)
 
         # 3. Insertar usuario
         await cur.execute(
@@ -0,0 +1,250 @@
+"""
+Migraciones versionadas del esquema: migraciones/NNNN_descripcion.sql, en
+orden de versión, cada una en su propia transacción. Las aplicadas quedan en
+schema_migracion. La app las aplica al arrancar (settings.migraciones_al_iniciar)
+y también se pueden correr a mano:
+
+    python -m services.migraciones aplicar
+    python -m services.migraciones estado
+    python -m services.migraciones verificar [--min-filas N]
+
+`verificar` planifica (EXPLAIN GENERIC_PLAN, Postgres 16+) cada consulta
+escrita en routers/ y marca las que leen con Seq Scan una tabla con al menos
+N filas estimadas. Sale con código 1 si encontró alguna.
+
+db.txt es la foto del esquema para instalaciones nuevas; cada cambio de
+esquema va además como migración, escrita para que no falle ni duplique datos
+sobre una base creada desde db.txt.
+
+La conversión a particiones de venta/detalle_venta depende del rango de
+fechas de los datos y sigue en `python -m services.particiones migrar`.
+"""
+import argparse
+import ast
+import asyncio
+import json
+import logging
+import re
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from psycopg.rows import dict_row
+
+logger = logging.getLogger(__name__)
+
+RAIZ = Path(__file__).resolve().parent.parent
+DIRECTORIO_MIGRACIONES = RAIZ / "migraciones"
+DIRECTORIO_ROUTERS = RAIZ / "routers"
+
+MIN_FILAS_VERIFICAR = 10000
+
+_CREAR_TABLA = """
+    CREATE TABLE IF NOT EXISTS schema_migracion (
+        version     INT          PRIMARY KEY,
+        nombre      VARCHAR(150) NOT NULL,
+        aplicada_en TIMESTAMP    NOT NULL DEFAULT NOW()
+    )
+"""
+
+
+@dataclass(frozen=True)
+class Migracion:
+    version: int
+    nombre: str
+    ruta: Path
+
+
+def listar_migraciones(directorio: Path = DIRECTORIO_MIGRACIONES) -> list[Migracion]:
+    migraciones = []
+    for ruta in sorted(directorio.glob("*.sql")):
+        version, _, nombre = ruta.stem.partition("_")
+        if not version.isdigit():
+            raise ValueError(f"Nombre de migración inválido: {ruta.name} (se espera NNNN_descripcion.sql)")
+        migraciones.append(Migracion(int(version), nombre, ruta))
+    versiones = [m.version for m in migraciones]
+    if len(versiones) != len(set(versiones)):
+        raise ValueError(f"Versiones de migración repetidas en {directorio}")
+    return sorted(migraciones, key=lambda m: m.version)
+
+
+async def _aplicadas(cur) -> set[int]:
+    await cur.execute(_CREAR_TABLA)
+    await cur.execute("SELECT version FROM schema_migracion")
+    return {fila["version"] for fila in await cur.fetchall()}
+
+
+async def aplicar_migraciones(conn, directorio: Path = DIRECTORIO_MIGRACIONES) -> list[Migracion]:
+    """Aplica las migraciones pendientes. Retorna las aplicadas en esta llamada."""
+    pendientes_archivo = listar_migraciones(directorio)
+    aplicadas = []
+    async with conn.cursor(row_factory=dict_row) as cur:
+        # Varios workers arrancan a la vez: uno migra, el resto espera y no encuentra pendientes
+        await cur.execute("SELECT pg_advisory_lock(hashtext('schema_migracion'))")
+        try:
+            ya_aplicadas = await _aplicadas(cur)
+            await conn.commit()
+            for migracion in pendientes_archivo:
+                if migracion.version in ya_aplicadas:
+                    continue
+                async with conn.transaction():
+                    await cur.execute(migracion.ruta.read_text(encoding="utf-8"))
+                    await cur.execute(
+                        "INSERT INTO schema_migracion (version, nombre) VALUES (%s, %s)",
+                        (migracion.version, migracion.nombre)
+                    )
+                aplicadas.append(migracion)
+                logger.info(f"Migración {migracion.version:04d} aplicada: {migracion.nombre}")
+        finally:
+            await cur.execute("SELECT pg_advisory_unlock(hashtext('schema_migracion'))")
+            await conn.commit()
+    return aplicadas
+
+
+async def estado(conn, directorio: Path = DIRECTORIO_MIGRACIONES) -> list[dict]:
+    async with conn.cursor(row_factory=dict_row) as cur:
+        ya_aplicadas = await _aplicadas(cur)
+    await conn.commit()
+    return [
+        {"version": m.version, "nombre": m.nombre, "aplicada": m.version in ya_aplicadas}
+        for m in listar_migraciones(directorio)
+    ]
+
+
+# ---- Verificación de planes de las consultas de routers/ ----
+
+_INICIO_SQL = re.compile(r"^\s*(SELECT|WITH|INSERT|UPDATE|DELETE)\b", re.IGNORECASE)
+_MARCADOR = re.compile(r"%%|%\((\w+)\)s|%s")
+
+
+@dataclass(frozen=True)
+class ConsultaFuente:
+    ubicacion: str
+    sql: str
+    dinamica: bool   # f-string: las partes interpoladas se reemplazan por ""
+
+
+def _a_parametros_posicionales(consulta: str) -> str:
+    """%s y %(nombre)s de psycopg a $1, $2... para EXPLAIN (GENERIC_PLAN)."""
+    nombres: dict[str, int] = {}
+    contador = 0
+
+    def reemplazar(m):
+        nonlocal contador
+        if m.group(0) == "%%":
+            return "%"
+        if m.group(1):
+            if m.group(1) not in nombres:
+                contador += 1
+                nombres[m.group(1)] = contador
+            return f"${nombres[m.group(1)]}"
+        contador += 1
+        return f"${contador}"
+
+    return _MARCADOR.sub(reemplazar, consulta)
+
+
+def extraer_consultas(directorio: Path = DIRECTORIO_ROUTERS) -> list[ConsultaFuente]:
+    """Literales SQL (también f-strings y los de ConsultaPreparada) escritos en los módulos de `directorio`."""
+    consultas = []
+    for ruta in sorted(directorio.glob("*.py")):
+        arbol = ast.parse(ruta.read_text(encoding="utf-8"))
+        dentro_de_fstring = set()
+        for nodo in ast.walk(arbol):
+            if isinstance(nodo, ast.JoinedStr):
+                dentro_de_fstring.update(id(v) for v in nodo.values)
+                texto = "".join(v.value for v in nodo.values if isinstance(v, ast.Constant))
+                dinamica = True
+            elif isinstance(nodo, ast.Constant) and isinstance(nodo.value, str) and id(nodo) not in dentro_de_fstring:
+                texto, dinamica = nodo.value, False
+            else:
+                continue
+            if _INICIO_SQL.match(texto):
+                consultas.append(ConsultaFuente(f"{ruta.relative_to(RAIZ)}:{nodo.lineno}", texto, dinamica))
+    return consultas
+
+
+def _seq_scans(plan: dict):
+    if plan.get("Node Type") == "Seq Scan":
+        yield plan["Relation Name"]
+    for hijo in plan.get("Plans", []):
+        yield from _seq_scans(hijo)
+
+
+async def verificar_planes(conn, min_filas: int = MIN_FILAS_VERIFICAR) -> tuple[list[dict], list[dict]]:
+    """
+    Retorna (hallazgos, errores). Un hallazgo es una consulta cuyo plan
+    genérico recorre entera (Seq Scan) una tabla con >= min_filas filas
+    estimadas (pg_class.reltuples, se actualiza con ANALYZE).
+    """
+    hallazgos, errores = [], []
+    async with conn.cursor(row_factory=dict_row) as cur:
+        await cur.execute(
+            "SELECT relname, reltuples::bigint AS filas FROM pg_class WHERE relkind = 'r' AND reltuples >= %s",
+            (min_filas,)
+        )
+        grandes = {fila["relname"]: fila["filas"] for fila in await cur.fetchall()}
+        await conn.commit()
+
+        for consulta in extraer_consultas():
+            try:
+                # EXPLAIN sin ANALYZE no ejecuta nada, ni siquiera INSERT/UPDATE/DELETE
+                await cur.execute(
+                    "EXPLAIN (GENERIC_PLAN, FORMAT JSON) " + _a_parametros_posicionales(consulta.sql).rstrip().rstrip(";")
+                )
+                plan = (await cur.fetchone())["QUERY PLAN"]
+            except Exception as e:
+                errores.append({
+                    "ubicacion": consulta.ubicacion,
+                    "dinamica": consulta.dinamica,
+                    "error": str(e).splitlines()[0],
+                })
+                continue
+            finally:
+                await conn.rollback()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            tablas = sorted({t for t in _seq_scans(plan[0]["Plan"]) if t in grandes})
+            if tablas:
+                hallazgos.append({
+                    "ubicacion": consulta.ubicacion,
+                    "dinamica": consulta.dinamica,
+                    "seq_scan": {t: grandes[t] for t in tablas},
+                })
+    return hallazgos, errores
+
+
+async def _main():
+    import psycopg
+    from config.conexionDB import DB_URL
+
+    parser = argparse.ArgumentParser(description="Migraciones versionadas del esquema")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+    comandos.add_parser("aplicar", help="Aplica las migraciones pendientes")
+    comandos.add_parser("estado", help="Lista las migraciones y si ya se aplicaron")
+    p_verificar = comandos.add_parser("verificar", help="Busca Seq Scan sobre tablas grandes en las consultas de routers/")
+    p_verificar.add_argument("--min-filas", type=int, default=MIN_FILAS_VERIFICAR)
+    args = parser.parse_args()
+
+    async with await psycopg.AsyncConnection.connect(DB_URL) as conn:
+        if args.comando == "aplicar":
+            aplicadas = await aplicar_migraciones(conn)
+            if not aplicadas:
+                logger.info("Sin migraciones pendientes")
+        elif args.comando == "estado":
+            for m in await estado(conn):
+                print(f"{m['version']:04d}  {'aplicada ' if m['aplicada'] else 'pendiente'}  {m['nombre']}")
+        else:
+            hallazgos, errores = await verificar_planes(conn, args.min_filas)
+            for h in hallazgos:
+                tablas = ", ".join(f"{t} (~{n} filas)" for t, n in h["seq_scan"].items())
+                print(f"SEQ SCAN  {h['ubicacion']}{'  [f-string]' if h['dinamica'] else ''}: {tablas}")
+            for e in errores:
+                print(f"SIN PLAN  {e['ubicacion']}{'  [f-string]' if e['dinamica'] else ''}: {e['error']}")
+            print(f"{len(hallazgos)} consultas con Seq Scan sobre tablas de {args.min_filas}+ filas")
+            if hallazgos:
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(levelname)-8s | %(message)s")
+    asyncio.run(_main())
@@ -0,0 +1,445 @@
+"""
+Particiones mensuales de venta y detalle_venta (venta_pYYYY_MM,
+detalle_venta_pYYYY_MM; lo que no cae en ninguna va a *_default).
+
+La app crea al arrancar, y luego una vez al día, las particiones del mes
+actual y de los settings.particiones_meses_adelante siguientes. Se crean
+con anticipación a propósito: un mes que todavía no tiene filas en *_default
+se agrega con ATTACH PARTITION. Eso bloquea las *_default, y con ellas los
+reportes y las ventas, solo un instante: se espera por los bloqueos a lo sumo
+settings.particiones_lock_timeout_ms y si no se consiguen se reintenta más
+tarde. Desde la línea de comandos:
+
+    python -m services.particiones asegurar --desde YYYY-MM [--hasta YYYY-MM]
+    python -m services.particiones migrar
+    python -m services.particiones archivar --antes-de YYYY-MM [--directorio archivo]
+    python -m services.particiones restaurar --mes YYYY-MM [--directorio archivo]
+
+`migrar` convierte una base con el esquema anterior (venta y detalle_venta
+sin particionar) moviendo todos los datos. `archivar` vuelca cada mes
+anterior al indicado a CSV comprimidos con gzip y elimina sus particiones;
+los totales por día siguen en venta_resumen_diario. `restaurar` los vuelve
+a cargar.
+"""
+import argparse
+import asyncio
+import gzip
+import logging
+import os
+from datetime import date, timedelta
+from pathlib import Path
+from psycopg import errors, sql
+from psycopg.rows import dict_row
+from config.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Tabla -> columna de partición. venta primero: detalle_venta la referencia.
+TABLAS = {"venta": "fecha", "detalle_venta": "fecha_venta"}
+
+DIRECTORIO_ARCHIVO = Path("archivo")
+
+
+def _mes(d: date) -> date:
+    return d.replace(day=1)
+
+
+def _siguiente(mes: date) -> date:
+    return (mes.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def _sumar_meses(mes: date, n: int) -> date:
+    for _ in range(n):
+        mes = _siguiente(mes)
+    return mes
+
+
+def _meses(desde: date, hasta: date):
+    mes = _mes(desde)
+    while mes <= hasta:
+        yield mes
+        mes = _siguiente(mes)
+
+
+def _particion(tabla: str, mes: date) -> str:
+    return f"{tabla}_p{mes:%Y_%m}"
+
+
+def _leer_mes(texto: str) -> date:
+    return date.fromisoformat(f"{texto}-01")
+
+
+async def _particiones(cur, tabla: str) -> dict[date, str]:
+    """Particiones mensuales existentes de `tabla`: {mes: nombre}."""
+    await cur.execute(
+        """
+        SELECT c.relname AS nombre
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = %s::regclass AND c.relname LIKE %s
+        """,
+        (tabla, f"{tabla}\\_p%")
+    )
+    prefijo = len(tabla) + 2
+    return {
+        _leer_mes(fila["nombre"][prefijo:].replace("_", "-")): fila["nombre"]
+        for fila in await cur.fetchall()
+    }
+
+
+def _limites(mes: date):
+    # Los límites de una partición no aceptan parámetros: van como literales
+    return sql.Literal(mes.isoformat()), sql.Literal(_siguiente(mes).isoformat())
+
+
+async def _anexar_mes(cur, mes: date):
+    """
+    Mes sin filas en *_default (el caso normal, creado por adelantado): cada
+    partición se crea como tabla suelta y se agrega con ATTACH PARTITION, que
+    sobre las tablas padre no necesita ACCESS EXCLUSIVE. Sí lo necesita sobre
+    las *_default, y eso choca con cualquier reporte o venta que lea el padre:
+    la espera por ese bloqueo queda acotada por el lock_timeout de
+    asegurar_particiones y, ya tomado, dura lo que tarda el ATTACH sobre tablas
+    vacías. Los índices y FK del padre se crean en la partición al anexarla.
+    """
+    # ATTACH revisa que la default no tenga filas del rango
+    await cur.execute("LOCK TABLE venta_default, detalle_venta_default IN ACCESS EXCLUSIVE MODE")
+    inicio, fin = _limites(mes)
+    for tabla in TABLAS:
+        particion = sql.Identifier(_particion(tabla, mes))
+        await cur.execute(sql.SQL(
+            "CREATE TABLE {particion} (LIKE {tabla} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+        ).format(particion=particion, tabla=sql.Identifier(tabla)))
+        await cur.execute(sql.SQL(
+            "ALTER TABLE {tabla} ATTACH PARTITION {particion} FOR VALUES FROM ({inicio}) TO ({fin})"
+        ).format(tabla=sql.Identifier(tabla), particion=particion, inicio=inicio, fin=fin))
+
+
+async def _crear_mes(cur, mes: date):
+    inicio, fin = mes, _siguiente(mes)
+
+    # SHARE ROW EXCLUSIVE sobre los padres (lo pide ATTACH por las FK entre
+    # venta y detalle_venta) deja leer los padres y frena los INSERT de las
+    # ventas mientras dura esta transacción; lo que sí frena los reportes es el
+    # bloqueo de las *_default en _anexar_mes. Se toma
+    # antes de mirar la default, para que ninguna venta caiga ahí en el medio,
+    # y en el orden en que una venta toma las tablas, para no cruzarse con ella.
+    await cur.execute("LOCK TABLE venta, detalle_venta IN SHARE ROW EXCLUSIVE MODE")
+    await cur.execute(
+        "SELECT EXISTS (SELECT 1 FROM venta_default WHERE fecha >= %s AND fecha < %s) AS hay",
+        (inicio, fin)
+    )
+    if not (await cur.fetchone())["hay"]:
+        await _anexar_mes(cur, mes)
+        return
+
+    # Filas de ese mes que ya cayeron en *_default (la partición no se creó a
+    # tiempo, o vienen de una migración): se apartan, se crea la partición
+    # (Postgres no deja crearla si la default tiene filas del rango) y se
+    # reinsertan. Detalles antes que ventas por la FK. CREATE ... PARTITION OF
+    # bloquea la tabla padre por completo.
+    await cur.execute("LOCK TABLE venta, detalle_venta IN ACCESS EXCLUSIVE MODE")
+    for tabla, columna in reversed(TABLAS.items()):
+        temporal = sql.Identifier(f"_mover_{tabla}")
+        await cur.execute(sql.SQL("CREATE TEMP TABLE {} (LIKE {})").format(temporal, sql.Identifier(tabla)))
+        await cur.execute(sql.SQL(
+            """
+            WITH movidas AS (
+                DELETE FROM {default} WHERE {columna} >= %s AND {columna} < %s RETURNING *
+            )
+            INSERT INTO {temporal} SELECT * FROM movidas
+            """
+        ).format(
+            temporal=temporal, default=sql.Identifier(f"{tabla}_default"), columna=sql.Identifier(columna),
+        ), (inicio, fin))
+
+    literal_inicio, literal_fin = _limites(mes)
+    for tabla in TABLAS:
+        await cur.execute(sql.SQL(
+            "CREATE TABLE {particion} PARTITION OF {tabla} FOR VALUES FROM ({inicio}) TO ({fin})"
+        ).format(
+            particion=sql.Identifier(_particion(tabla, mes)), tabla=sql.Identifier(tabla),
+            inicio=literal_inicio, fin=literal_fin,
+        ))
+
+    for tabla in TABLAS:
+        await cur.execute(sql.SQL(
+            "INSERT INTO {tabla} SELECT * FROM {temporal}; DROP TABLE {temporal}"
+        ).format(tabla=sql.Identifier(tabla), temporal=sql.Identifier(f"_mover_{tabla}")))
+    logger.info(f"Filas de {mes:%Y-%m} movidas desde las particiones default")
+
+
+async def asegurar_particiones(cur, desde: date, hasta: date) -> list[date]:
+    """Crea las particiones que falten entre los meses de `desde` y `hasta`. Retorna los meses creados."""
+    # Varios workers arrancan a la vez: uno crea, el resto espera y no encuentra nada que hacer
+    await cur.execute("SELECT pg_advisory_xact_lock(hashtext('particiones_venta'))")
+    # Sin esperar detrás de un reporte largo con las ventas encoladas detrás de nosotros
+    await cur.execute(sql.SQL("SET LOCAL lock_timeout = {}").format(
+        sql.Literal(f"{settings.particiones_lock_timeout_ms}ms")))
+    existentes = await _particiones(cur, "venta")
+    creados = [mes for mes in _meses(desde, hasta) if mes not in existentes]
+    for mes in creados:
+        await _crear_mes(cur, mes)
+    if creados:
+        logger.info(f"Particiones creadas: {', '.join(f'{m:%Y-%m}' for m in creados)}")
+    return creados
+
+
+async def asegurar_vigentes(conn):
+    """Particiones del mes actual y de los próximos settings.particiones_meses_adelante."""
+    hoy = date.today()
+    async with conn.cursor(row_factory=dict_row) as cur:
+        await asegurar_particiones(cur, hoy, _sumar_meses(_mes(hoy), settings.particiones_meses_adelante))
+    await conn.commit()
+
+
+async def mantener_periodicamente(pool, intervalo_segundos: float = 86400):
+    """
+    Tarea de fondo del lifespan: asegura las particiones al arrancar y luego
+    una vez al día. Si no consigue los bloqueos dentro del lock_timeout
+    reintenta a los settings.particiones_reintento_segundos.
+    """
+    while True:
+        espera = intervalo_segundos
+        try:
+            async with pool.connection() as conn:
+                await asegurar_vigentes(conn)
+        except asyncio.CancelledError:
+            raise
+        except errors.LockNotAvailable:
+            espera = settings.particiones_reintento_segundos
+            logger.warning(f"Particiones de venta: tablas ocupadas, se reintenta en {espera}s")
+        except Exception as e:
+            logger.error(f"Error asegurando particiones de venta: {e}", exc_info=True)
+        await asyncio.sleep(espera)
+
+
+# ---- Migración desde el esquema sin particionar ----
+
+_CREAR_TABLAS = """
+    CREATE TABLE venta (
+        id_venta    INT         NOT NULL DEFAULT nextval('venta_id_venta_seq'),
+        id_usuario  INT         NOT NULL REFERENCES usuario(id_usuario),
+        id_cliente  INT         NOT NULL REFERENCES cliente(id_cliente),
+        id_estado   INT         NOT NULL REFERENCES estado_venta(id_estado),
+        metodo_pago VARCHAR(30) NOT NULL,
+        fecha       TIMESTAMP   NOT NULL,
+        PRIMARY KEY (id_venta, fecha)
+    ) PARTITION BY RANGE (fecha);
+    CREATE TABLE venta_default PARTITION OF venta DEFAULT;
+    ALTER SEQUENCE venta_id_venta_seq OWNED BY venta.id_venta;
+
+    CREATE TABLE IF NOT EXISTS venta_local (
+        id_local UUID PRIMARY KEY,
+        id_venta INT  NOT NULL
+    );
+
+    CREATE TABLE detalle_venta (
+        id_detalle_venta INT           NOT NULL DEFAULT nextval('detalle_venta_id_detalle_venta_seq'),
+        id_venta         INT           NOT NULL,
+        fecha_venta      TIMESTAMP     NOT NULL,
+        id_producto      INT           NOT NULL REFERENCES producto(id_producto),
+        cantidad         INT           NOT NULL,
+        precio_unitario  DECIMAL(10,2) NOT NULL,
+        CONSTRAINT chk_dv_cantidad        CHECK (cantidad > 0),
+        CONSTRAINT chk_dv_precio_unitario CHECK (precio_unitario > 0),
+        PRIMARY KEY (id_detalle_venta, fecha_venta),
+        FOREIGN KEY (id_venta, fecha_venta) REFERENCES venta(id_venta, fecha),
+        UNIQUE (id_venta, id_producto, fecha_venta)
+    ) PARTITION BY RANGE (fecha_venta);
+    CREATE TABLE detalle_venta_default PARTITION OF detalle_venta DEFAULT;
+    ALTER SEQUENCE detalle_venta_id_detalle_venta_seq OWNED BY detalle_venta.id_detalle_venta;
+
+    CREATE INDEX idx_venta_fecha            ON venta(fecha);
+    CREATE INDEX idx_detalle_venta_id_venta ON detalle_venta(id_venta);
+
+    -- Los de migraciones/0001 sobre estas tablas (ya figura como aplicada)
+    CREATE INDEX idx_venta_id_usuario          ON venta(id_usuario);
+    CREATE INDEX idx_venta_id_cliente          ON venta(id_cliente);
+    CREATE INDEX idx_detalle_venta_id_producto ON detalle_venta(id_producto);
+"""
+
+
+async def _apartar_tabla(cur, tabla: str) -> str:
+    """Renombra la tabla vieja y le quita constraints e índices para liberar sus nombres."""
+    vieja = f"{tabla}_sin_particionar"
+    await cur.execute(sql.SQL("ALTER TABLE {} RENAME TO {}").format(sql.Identifier(tabla), sql.Identifier(vieja)))
+    await cur.execute(
+        "SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype IN ('p', 'u', 'f')"
+        " ORDER BY contype = 'f' DESC",
+        (vieja,)
+    )
+    for fila in await cur.fetchall():
+        await cur.execute(sql.SQL("ALTER TABLE {} DROP CONSTRAINT {}").format(
+            sql.Identifier(vieja), sql.Identifier(fila["conname"])))
+    await cur.execute(
+        "SELECT indexrelid::regclass::text AS indice FROM pg_index WHERE indrelid = %s::regclass",
+        (vieja,)
+    )
+    for fila in await cur.fetchall():
+        await cur.execute(sql.SQL("DROP INDEX {}").format(sql.Identifier(fila["indice"])))
+    return vieja
+
+
+async def migrar(conn):
+    """Pasa venta y detalle_venta al esquema particionado en una sola transacción."""
+    async with conn.cursor(row_factory=dict_row) as cur:
+        await cur.execute("SELECT relkind FROM pg_class WHERE oid = 'venta'::regclass")
+        if (await cur.fetchone())["relkind"] == "p":
+            logger.info("venta ya está particionada; nada que migrar")
+            return
+
+        await cur.execute("LOCK TABLE venta, detalle_venta IN ACCESS EXCLUSIVE MODE")
+        await cur.execute(
+            """
+            SELECT EXISTS (
+                SELECT 1 FROM information_schema.columns
+                WHERE table_name = 'venta' AND column_name = 'id_local'
+            ) AS con_id_local
+            """
+        )
+        con_id_local = (await cur.fetchone())["con_id_local"]
+
+        # La FK de detalle_venta apunta a venta: se aparta primero
+        detalle_viejo = await _apartar_tabla(cur, "detalle_venta")
+        venta_vieja = await _apartar_tabla(cur, "venta")
+        await cur.execute(_CREAR_TABLAS)
+
+        await cur.execute(f"SELECT MIN(fecha)::date AS desde, MAX(fecha)::date AS hasta FROM {venta_vieja}")
+        rango = await cur.fetchone()
+        hasta = max(rango["hasta"] or date.today(), date.today())
+        await asegurar_particiones(
+            cur, rango["desde"] or date.today(), _sumar_meses(_mes(hasta), settings.particiones_meses_adelante)
+        )
+
+        await cur.execute(
+            f"""
+            INSERT INTO venta (id_venta, id_usuario, id_cliente, id_estado, metodo_pago, fecha)
+            SELECT id_venta, id_usuario, id_cliente, id_estado, metodo_pago, fecha
+            FROM {venta_vieja}
+            """
+        )
+        ventas = cur.rowcount
+        if con_id_local:
+            await cur.execute(
+                f"""
+                INSERT INTO venta_local (id_local, id_venta)
+                SELECT id_local, id_venta FROM {venta_vieja} WHERE id_local IS NOT NULL
+                ON CONFLICT (id_local) DO NOTHING
+                """
+            )
+        await cur.execute(
+            f"""
+            INSERT INTO detalle_venta
+                (id_detalle_venta, id_venta, fecha_venta, id_producto, cantidad, precio_unitario)
+            SELECT dv.id_detalle_venta, dv.id_venta, v.fecha, dv.id_producto, dv.cantidad, dv.precio_unitario
+            FROM {detalle_viejo} dv
+            JOIN {venta_vieja} v ON v.id_venta = dv.id_venta
+            """
+        )
+        detalles = cur.rowcount
+
+        await cur.execute(f"DROP TABLE {detalle_viejo}, {venta_vieja}")
+        await cur.execute("ANALYZE venta, detalle_venta")
+    await conn.commit()
+    logger.info(f"Migración terminada: {ventas} ventas y {detalles} detalles en particiones mensuales")
+
+
+# ---- Archivo de meses antiguos ----
+
+def _archivo(directorio: Path, tabla: str, mes: date) -> Path:
+    return directorio / f"{_particion(tabla, mes)}.csv.gz"
+
+
+async def _volcar(cur, particion: str, destino: Path):
+    temporal = destino.with_suffix(".tmp")
+    consulta = sql.SQL("COPY {} TO STDOUT (FORMAT csv, HEADER)").format(sql.Identifier(particion))
+    with gzip.open(temporal, "wb", compresslevel=6) as f:
+        async with cur.copy(consulta) as copia:
+            async for bloque in copia:
+                f.write(bloque)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporal, destino)
+
+
+async def archivar(conn, antes_de: date, directorio: Path = DIRECTORIO_ARCHIVO) -> list[date]:
+    """
+    Vuelca a `directorio` y elimina las particiones de los meses anteriores a
+    `antes_de`. Nunca toca el mes en curso. El archivo se escribe completo
+    antes de soltar la partición.
+    """
+    limite = min(_mes(antes_de), _mes(date.today()))
+    directorio.mkdir(parents=True, exist_ok=True)
+    archivados = []
+
+    async with conn.cursor(row_factory=dict_row) as cur:
+        meses = sorted(m for m in await _particiones(cur, "venta") if m < limite)
+    await conn.commit()
+
+    for mes in meses:
+        async with conn.cursor(row_factory=dict_row) as cur:
+            for tabla in TABLAS:
+                await _volcar(cur, _particion(tabla, mes), _archivo(directorio, tabla, mes))
+            # detalle_venta primero: su FK no deja soltar la partición de venta
+            for tabla in reversed(TABLAS):
+                particion = sql.Identifier(_particion(tabla, mes))
+                await cur.execute(sql.SQL("ALTER TABLE {} DETACH PARTITION {}").format(sql.Identifier(tabla), particion))
+                await cur.execute(sql.SQL("DROP TABLE {}").format(particion))
+        await conn.commit()
+        archivados.append(mes)
+        logger.info(f"Mes {mes:%Y-%m} archivado en {directorio}")
+    return archivados
+
+
+async def restaurar(conn, mes: date, directorio: Path = DIRECTORIO_ARCHIVO):
+    """Vuelve a cargar un mes archivado (crea sus particiones si hacen falta)."""
+    mes = _mes(mes)
+    async with conn.cursor(row_factory=dict_row) as cur:
+        await asegurar_particiones(cur, mes, mes)
+        for tabla in TABLAS:
+            with gzip.open(_archivo(directorio, tabla, mes), "rb") as f:
+                columnas = f.readline().decode().strip().split(",")
+                consulta = sql.SQL("COPY {} ({}) FROM STDIN (FORMAT csv)").format(
+                    sql.Identifier(tabla), sql.SQL(", ").join(map(sql.Identifier, columnas)))
+                async with cur.copy(consulta) as copia:
+                    while bloque := f.read(1 << 20):
+                        await copia.write(bloque)
+    await conn.commit()
+    logger.info(f"Mes {mes:%Y-%m} restaurado desde {directorio}")
+
+
+async def _main():
+    import psycopg
+    from config.conexionDB import DB_URL
+
+    parser = argparse.ArgumentParser(description="Particiones mensuales de venta y detalle_venta")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+    p_asegurar = comandos.add_parser("asegurar", help="Crea las particiones de un rango de meses")
+    p_asegurar.add_argument("--desde", type=_leer_mes, required=True)
+    p_asegurar.add_argument("--hasta", type=_leer_mes)
+    comandos.add_parser("migrar", help="Convierte venta/detalle_venta sin particionar")
+    p_archivar = comandos.add_parser("archivar", help="Vuelca y elimina los meses anteriores a --antes-de")
+    p_archivar.add_argument("--antes-de", type=_leer_mes, required=True)
+    p_archivar.add_argument("--directorio", type=Path, default=DIRECTORIO_ARCHIVO)
+    p_restaurar = comandos.add_parser("restaurar", help="Vuelve a cargar un mes archivado")
+    p_restaurar.add_argument("--mes", type=_leer_mes, required=True)
+    p_restaurar.add_argument("--directorio", type=Path, default=DIRECTORIO_ARCHIVO)
+    args = parser.parse_args()
+
+    async with await psycopg.AsyncConnection.connect(DB_URL) as conn:
+        if args.comando == "asegurar":
+            async with conn.cursor(row_factory=dict_row) as cur:
+                await asegurar_particiones(cur, args.desde, args.hasta or args.desde)
+            await conn.commit()
+        elif args.comando == "migrar":
+            await migrar(conn)
+        elif args.comando == "archivar":
+            await archivar(conn, args.antes_de, args.directorio)
+        else:
+            await restaurar(conn, args.mes, args.directorio)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(levelname)-8s | %(message)s")
+    asyncio.run(_main())
@@ -0,0 +1,173 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from config.notificaciones import suscribir, notificar
+from config.sse import encolar
+
+logger = logging.getLogger(__name__)
+
+# registrar_venta, el lote offline y los cambios de estado encolan en la misma
+# transacción un NOTIFY con los id_venta afectados. Cada worker junta los ids
+# que llegan mientras consulta, los carga en una sola consulta (solo si tiene
+# pantallas conectadas) y reparte el pedido a cada suscripción según su filtro.
+CANAL_PEDIDOS = "pedido_cambio"
+
+# Los payloads de NOTIFY no pueden pasar de 8000 bytes
+IDS_POR_NOTIFICACION = 500
+COLA_MAX = 200
+
+# Misma regla que usa barista.html para reconocer las bebidas
+PALABRAS_BARRA = ("bebida", "caliente", "fría", "fria")
+ESTACION_POR_ROL = {"barista": "barra", "cocinero": "cocina"}
+
+CONSULTA_PEDIDOS = """
+    SELECT
+        v.id_venta,
+        v.fecha,
+        v.metodo_pago,
+        v.id_estado,
+        ev.nombre AS estado,
+        c.nombre  AS cliente,
+        SUM(dv.cantidad * dv.precio_unitario) AS total,
+        json_agg(
+            json_build_object('producto', p.nombre, 'categoria', cp.nombre, 'cantidad', dv.cantidad)
+            ORDER BY dv.id_detalle_venta
+        ) AS items
+    FROM venta v
+    JOIN estado_venta ev ON ev.id_estado = v.id_estado
+    LEFT JOIN cliente c ON c.id_cliente = v.id_cliente
+    JOIN detalle_venta dv ON dv.id_venta = v.id_venta AND dv.fecha_venta = v.fecha
+    JOIN producto p ON p.id_producto = dv.id_producto
+    LEFT JOIN categoria_producto cp ON cp.id_categoria = p.id_categoria
+    WHERE {filtro}
+    GROUP BY v.id_venta, ev.nombre, c.nombre
+    ORDER BY v.id_venta
+"""
+
+
+def estacion(categoria: str | None) -> str:
+    nombre = (categoria or "").lower()
+    return "barra" if any(palabra in nombre for palabra in PALABRAS_BARRA) else "cocina"
+
+
+@dataclass(frozen=True)
+class FiltroPedidos:
+    estacion: str | None = None              # "barra" | "cocina"; None = todos los ítems
+    estados: frozenset[str] = frozenset()    # nombres de estado_venta; vacío = todos
+
+    def vista(self, pedido: dict) -> dict | None:
+        """El pedido con solo los ítems de la estación, o None si no tiene ninguno."""
+        if self.estacion is None:
+            return pedido
+        items = [i for i in pedido["items"] if i["estacion"] == self.estacion]
+        return {**pedido, "items": items} if items else None
+
+
+def _preparar(fila: dict) -> dict:
+    for item in fila["items"]:
+        item["estacion"] = estacion(item["categoria"])
+    fila["fecha"] = fila["fecha"].isoformat()
+    fila["total"] = float(fila["total"])
+    return fila
+
+
+class FeedPedidos:
+    def __init__(self):
+        self._suscripciones: dict[asyncio.Queue, FiltroPedidos] = {}
+        self._pendientes: set[int] = set()
+        self._hay_pendientes = asyncio.Event()
+        self._pool = None
+        self._tarea: asyncio.Task | None = None
+
+    # ---- Suscripciones (una por pantalla conectada) ----
+
+    def suscribirse(self, filtro: FiltroPedidos) -> asyncio.Queue:
+        cola = asyncio.Queue(maxsize=COLA_MAX)
+        self._suscripciones[cola] = filtro
+        return cola
+
+    def desuscribirse(self, cola: asyncio.Queue):
+        self._suscripciones.pop(cola, None)
+
+    async def snapshot(self, filtro: FiltroPedidos) -> list[dict]:
+        """Pedidos de hoy que corresponden al filtro."""
+        condiciones = ["v.fecha >= CURRENT_DATE"]
+        params = []
+        if filtro.estados:
+            condiciones.append("ev.nombre = ANY(%s)")
+            params.append(list(filtro.estados))
+        pedidos = await self._consultar(" AND ".join(condiciones), params)
+        return [vista for p in pedidos if (vista := filtro.vista(p)) is not None]
+
+    # ---- Distribución ----
+
+    def _al_notificar(self, payload):
+        if payload is None:
+            # La escucha se reconectó: todas las pantallas vuelven a pedir snapshot
+            for cola in self._suscripciones:
+                encolar(cola, None)
+            return
+        self._pendientes.update(int(i) for i in payload.split(","))
+        self._hay_pendientes.set()
+
+    async def _consultar(self, filtro_sql: str, params) -> list[dict]:
+        async with self._pool.connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(CONSULTA_PEDIDOS.format(filtro=filtro_sql), params)
+                return [_preparar(fila) for fila in await cur.fetchall()]
+
+    def _repartir(self, pedidos: list[dict], eliminados: set[int]):
+        for cola, filtro in self._suscripciones.items():
+            for pedido in pedidos:
+                vista = filtro.vista(pedido)
+                if vista is None:
+                    continue
+                if filtro.estados and pedido["estado"] not in filtro.estados:
+                    # Salió de los estados que muestra la pantalla (p. ej. ya se entregó)
+                    encolar(cola, ("retirado", {"id_venta": pedido["id_venta"]}))
+                else:
+                    encolar(cola, ("pedido", vista))
+            for id_venta in eliminados:
+                encolar(cola, ("retirado", {"id_venta": id_venta}))
+
+    async def _cargar_pendientes(self):
+        while True:
+            await self._hay_pendientes.wait()
+            self._hay_pendientes.clear()
+            ids, self._pendientes = self._pendientes, set()
+            if not self._suscripciones:
+                continue
+            try:
+                pedidos = await self._consultar("v.id_venta = ANY(%s)", (list(ids),))
+                self._repartir(pedidos, ids - {p["id_venta"] for p in pedidos})
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error cargando pedidos {sorted(ids)}: {e}", exc_info=True)
+                for cola in self._suscripciones:
+                    encolar(cola, None)
+
+    def iniciar(self, pool):
+        self._pool = pool
+        if self._tarea is None:
+            self._tarea = asyncio.create_task(self._cargar_pendientes())
+
+    async def detener(self):
+        if self._tarea is not None:
+            self._tarea.cancel()
+            try:
+                await self._tarea
+            except asyncio.CancelledError:
+                pass
+            self._tarea = None
+
+
+feed = FeedPedidos()
+suscribir(CANAL_PEDIDOS, feed._al_notificar)
+
+
+async def publicar_pedidos(cur, ids_venta):
+    """Avisa a todos los workers que estos pedidos cambiaron. Llamar antes del commit."""
+    ids = [str(i) for i in ids_venta]
+    for inicio in range(0, len(ids), IDS_POR_NOTIFICACION):
+        await notificar(cur, CANAL_PEDIDOS, ",".join(ids[inicio:inicio + IDS_POR_NOTIFICACION]))
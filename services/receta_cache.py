@@ -0,0 +1,72 @@
+import asyncio
+import logging
+from decimal import Decimal
+from psycopg.rows import tuple_row
+from config.notificaciones import suscribir, notificar
+
+logger = logging.getLogger(__name__)
+
+CANAL_RECETA = "receta_cambio"
+
+
+class RecetaCache:
+    """
+    Índice en memoria de recetas: id_producto -> ((id_insumo, cantidad), ...).
+
+    Se carga al iniciar la app y se invalida cuando cambian las recetas, ya sea
+    desde este proceso (handlers de /receta) o desde otro worker (LISTEN/NOTIFY).
+    La recarga es perezosa: la hace la siguiente venta con su propia conexión.
+    """
+
+    def __init__(self):
+        self._indice: dict[int, tuple] = {}
+        self._vigente = False
+        self._generacion = 0   # se incrementa en cada invalidación
+        self.version = 0       # se incrementa en cada carga completa
+        self._lock = asyncio.Lock()
+
+    async def cargar(self, conn):
+        generacion = self._generacion
+        async with conn.cursor(row_factory=tuple_row) as cur:
+            await cur.execute("SELECT id_producto, id_insumo, cantidad FROM receta")
+            filas = await cur.fetchall()
+
+        indice: dict[int, list] = {}
+        for id_producto, id_insumo, cantidad in filas:
+            indice.setdefault(id_producto, []).append((id_insumo, cantidad))
+
+        self._indice = {k: tuple(v) for k, v in indice.items()}
+        self.version += 1
+        # Si hubo una invalidación durante la carga, el índice ya nace viejo
+        self._vigente = generacion == self._generacion
+        logger.info(f"Recetas cargadas en memoria: {len(self._indice)} productos (v{self.version})")
+
+    def invalidar(self, payload=None):
+        self._generacion += 1
+        self._vigente = False
+
+    async def obtener(self, conn) -> dict[int, tuple]:
+        if not self._vigente:
+            async with self._lock:
+                if not self._vigente:
+                    await self.cargar(conn)
+        return self._indice
+
+    async def consumo(self, conn, detalles) -> dict[int, Decimal]:
+        """Cantidad total de cada insumo que consumen las líneas de una venta."""
+        indice = await self.obtener(conn)
+        total: dict[int, Decimal] = {}
+        for d in detalles:
+            cantidad = Decimal(str(d["cantidad"]))
+            for id_insumo, por_unidad in indice.get(d["id_producto"], ()):
+                total[id_insumo] = total.get(id_insumo, Decimal(0)) + por_unidad * cantidad
+        return total
+
+
+recetas = RecetaCache()
+suscribir(CANAL_RECETA, recetas.invalidar)
+
+
+async def publicar_cambio(cur):
+    """Avisa a todos los workers que las recetas cambiaron. Llamar antes del commit."""
+    await notificar(cur, CANAL_RECETA)
@@ -0,0 +1,103 @@
+"""
+Resumen diario de ventas (fecha, producto, usuario, método de pago).
+
+registrar_venta lo actualiza dentro de su misma transacción, y las
+ediciones de ventas/detalles recalculan el día afectado. Para construirlo
+desde el historial:
+
+    python -m services.resumen_service [--desde YYYY-MM-DD] [--hasta YYYY-MM-DD]
+"""
+import argparse
+import asyncio
+import logging
+from datetime import date
+from psycopg.rows import dict_row
+from config.consultas import ConsultaPreparada
+
+logger = logging.getLogger(__name__)
+
+CONSULTA_ACUMULAR_VENTAS = ConsultaPreparada("resumen.acumular_ventas", """
+    INSERT INTO venta_resumen_diario AS r
+        (fecha, id_producto, id_usuario, metodo_pago, cantidad, ingreso)
+    SELECT v.fecha::date, dv.id_producto, v.id_usuario, v.metodo_pago,
+           SUM(dv.cantidad), SUM(dv.cantidad * dv.precio_unitario)
+    FROM venta v
+    JOIN detalle_venta dv ON dv.id_venta = v.id_venta AND dv.fecha_venta = v.fecha
+    WHERE v.id_venta = ANY(%s)
+    GROUP BY v.fecha::date, dv.id_producto, v.id_usuario, v.metodo_pago
+    ON CONFLICT (fecha, id_producto, id_usuario, metodo_pago) DO UPDATE
+    SET cantidad = r.cantidad + EXCLUDED.cantidad,
+        ingreso  = r.ingreso  + EXCLUDED.ingreso
+""")
+
+
+async def acumular_venta(cur, id_venta):
+    """Suma las líneas de una venta recién registrada al resumen de su día."""
+    await acumular_ventas(cur, [id_venta])
+
+
+async def acumular_ventas(cur, ids_venta: list[int]):
+    """Igual que acumular_venta para varias ventas nuevas a la vez (lotes del POS)."""
+    await CONSULTA_ACUMULAR_VENTAS.ejecutar(cur, (ids_venta,))
+
+
+async def reconstruir_rango(cur, desde: date, hasta: date):
+    """Rehace el resumen de los días [desde, hasta] a partir de venta/detalle_venta."""
+    await cur.execute(
+        "DELETE FROM venta_resumen_diario WHERE fecha BETWEEN %s AND %s",
+        (desde, hasta)
+    )
+    await cur.execute(
+        """
+        INSERT INTO venta_resumen_diario
+            (fecha, id_producto, id_usuario, metodo_pago, cantidad, ingreso)
+        SELECT v.fecha::date, dv.id_producto, v.id_usuario, v.metodo_pago,
+               SUM(dv.cantidad), SUM(dv.cantidad * dv.precio_unitario)
+        FROM venta v
+        JOIN detalle_venta dv ON dv.id_venta = v.id_venta AND dv.fecha_venta = v.fecha
+        WHERE v.fecha >= %s AND v.fecha < %s::date + 1
+        GROUP BY v.fecha::date, dv.id_producto, v.id_usuario, v.metodo_pago
+        """,
+        (desde, hasta)
+    )
+
+
+async def recalcular_venta(cur, id_venta):
+    """Recalcula el día de una venta editada (cambio de usuario, método de pago o detalles)."""
+    await cur.execute("SELECT fecha::date AS dia FROM venta WHERE id_venta = %s", (id_venta,))
+    fila = await cur.fetchone()
+    if fila:
+        await reconstruir_rango(cur, fila["dia"], fila["dia"])
+
+
+async def reconstruir(conn, desde: date | None = None, hasta: date | None = None):
+    """Backfill del resumen; sin fechas toma todo el historial de ventas."""
+    async with conn.cursor(row_factory=dict_row) as cur:
+        await cur.execute("SELECT MIN(fecha)::date AS minimo, MAX(fecha)::date AS maximo FROM venta")
+        rango = await cur.fetchone()
+        desde = desde or rango["minimo"]
+        hasta = hasta or rango["maximo"]
+        if desde is None or hasta is None:
+            logger.info("No hay ventas para resumir")
+            return
+        await reconstruir_rango(cur, desde, hasta)
+    await conn.commit()
+    logger.info(f"Resumen diario reconstruido del {desde} al {hasta}")
+
+
+async def _main():
+    import psycopg
+    from config.conexionDB import DB_URL
+
+    parser = argparse.ArgumentParser(description="Reconstruye venta_resumen_diario desde el historial")
+    parser.add_argument("--desde", type=date.fromisoformat)
+    parser.add_argument("--hasta", type=date.fromisoformat)
+    args = parser.parse_args()
+
+    async with await psycopg.AsyncConnection.connect(DB_URL) as conn:
+        await reconstruir(conn, args.desde, args.hasta)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(levelname)-8s | %(message)s")
+    asyncio.run(_main())
@@ -1,7 +1,117 @@
+import asyncio
 import logging
+from psycopg.rows import dict_row, tuple_row
+from config.consultas import ConsultaPreparada
+from services.alertas_stock import publicar_cruces
 
 logger = logging.getLogger(__name__)
 
+# El stock vive en un ledger: cada venta/compra agrega filas a movimiento_insumo
+# en vez de hacer UPDATE sobre la misma fila de insumo (leche, café...), y una
+# tarea periódica suma los movimientos pendientes al snapshot insumo.stock.
+# Las lecturas usan la vista insumo_stock (snapshot + pendientes).
+
+# Además de insertar, devuelve los insumos que cruzan su stock_minimo. La vista
+# no ve las filas que inserta la misma sentencia, así que s.stock es el stock
+# previo y s.stock + m.cantidad el nuevo (m suma las filas de cada insumo). Dos
+# transacciones concurrentes sobre el mismo insumo pueden no ver el cruce; el
+# snapshot del stream lo corrige.
+CONSULTA_REGISTRAR_MOVIMIENTOS = ConsultaPreparada("stock.registrar_movimientos", """
+    WITH filas AS (
+        SELECT * FROM unnest(%s::int[], %s::numeric[], %s::int[]) AS f(id_insumo, cantidad, id_referencia)
+    ), nuevos AS (
+        INSERT INTO movimiento_insumo (id_insumo, tipo, cantidad, id_referencia)
+        SELECT f.id_insumo, %s, f.cantidad, f.id_referencia
+        FROM filas f
+    ), m AS (
+        SELECT id_insumo, SUM(cantidad) AS cantidad FROM filas GROUP BY id_insumo
+    )
+    SELECT s.id_insumo, s.nombre, s.unidad, s.stock_minimo, s.stock + m.cantidad AS stock
+    FROM m
+    JOIN insumo_stock s ON s.id_insumo = m.id_insumo
+    WHERE s.activo AND s.stock_minimo > 0
+      AND (s.stock < s.stock_minimo) <> (s.stock + m.cantidad < s.stock_minimo)
+""")
+
+
+async def registrar_movimientos(cur, tipo, movimientos: dict, id_referencia=None):
+    """
+    Agrega movimientos al ledger en una sola sentencia.
+    `movimientos` es {id_insumo: cantidad}, positiva si entra stock y negativa si sale.
+    Los cruces de stock_minimo se publican como alertas al hacer commit.
+    """
+    await registrar_movimientos_por_referencia(cur, tipo, {id_referencia: movimientos})
+
+
+async def registrar_movimientos_por_referencia(cur, tipo, por_referencia: dict):
+    """
+    Como registrar_movimientos, para varios documentos a la vez (p. ej. las
+    ventas de un lote offline): `por_referencia` es {id_referencia: {id_insumo: cantidad}}.
+    Cada documento deja sus propias filas en el ledger, en una sola sentencia.
+    """
+    filas = [
+        (id_insumo, cantidad, id_referencia)
+        for id_referencia, movimientos in por_referencia.items()
+        for id_insumo, cantidad in sorted(movimientos.items())
+    ]
+    if not filas:
+        return
+    ids_insumo, cantidades, referencias = (list(col) for col in zip(*filas))
+    await CONSULTA_REGISTRAR_MOVIMIENTOS.ejecutar(cur, (ids_insumo, cantidades, referencias, tipo))
+    cruces = await cur.fetchall()
+    if cruces:
+        await publicar_cruces(cur, cruces)
+
+
+async def consolidar_movimientos(conn) -> int:
+    """
+    Suma los movimientos pendientes a insumo.stock y los marca como consolidados.
+    Un advisory lock evita que varios workers consoliden a la vez.
+    Retorna la cantidad de insumos actualizados.
+    """
+    async with conn.cursor(row_factory=tuple_row) as cur:
+        await cur.execute("SELECT pg_try_advisory_xact_lock(hashtext('consolidar_stock'))")
+        bloqueo = await cur.fetchone()
+        if not bloqueo[0]:
+            await conn.rollback()
+            return 0
+
+        await cur.execute(
+            """
+            WITH pendientes AS (
+                UPDATE movimiento_insumo
+                SET consolidado = TRUE
+                WHERE NOT consolidado
+                RETURNING id_insumo, cantidad
+            ), delta AS (
+                SELECT id_insumo, SUM(cantidad) AS total
+                FROM pendientes
+                GROUP BY id_insumo
+            )
+            UPDATE insumo i
+            SET stock = i.stock + d.total
+            FROM delta d
+            WHERE i.id_insumo = d.id_insumo
+            """
+        )
+        actualizados = cur.rowcount
+    await conn.commit()
+    return actualizados
+
+
+async def consolidar_periodicamente(pool, intervalo_segundos: float):
+    """Tarea de fondo del lifespan: consolida el ledger cada `intervalo_segundos`."""
+    while True:
+        await asyncio.sleep(intervalo_segundos)
+        try:
+            async with pool.connection() as conn:
+                actualizados = await consolidar_movimientos(conn)
+            if actualizados:
+                logger.info(f"Stock consolidado para {actualizados} insumos")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Error consolidando movimientos de stock: {e}", exc_info=True)
 
 
 async def obtener_stock_insumo(conn, id_insumo: int) -> float:
@@ -11,7 +121,7 @@ async def obtener_stock_insumo(conn, id_insumo: int) -> float:
             await cur.execute(
                 """
                 SELECT stock
-                FROM insumo
+                FROM insumo_stock
                 WHERE id_insumo = %s
                 """,
                 (id_insumo,)
@@ -25,25 +135,23 @@ async def obtener_stock_insumo(conn, id_insumo: int) -> float:
         return 0.0
 
 
-async def listar_insumos_bajo_stock(conn, umbral_minimo: float = 10.0) -> list[dict]:
+async def listar_insumos_bajo_stock(conn, umbral_minimo: float | None = None) -> list[dict]:
     """
-    Retorna insumos con stock menor al umbral especificado.
-    Por defecto umbral es 10.
+    Retorna los insumos activos por debajo de su stock_minimo.
+    Si se especifica `umbral_minimo`, se usa ese mismo umbral para todos.
     """
     try:
-        async with conn.cursor() as cur:
+        async with conn.cursor(row_factory=dict_row) as cur:
             await cur.execute(
                 """
-                SELECT id_insumo, nombre, unidad, stock, activo
-                FROM insumo
-                WHERE stock < %s AND activo = TRUE
+                SELECT id_insumo, nombre, unidad, stock, stock_minimo, activo
+                FROM insumo_stock
+                WHERE stock < COALESCE(%s, stock_minimo) AND activo = TRUE
                 ORDER BY stock ASC
                 """,
                 (umbral_minimo,)
             )
-            rows = await cur.fetchall()
-            cols = [desc[0] for desc in cur.description]
-            return [dict(zip(cols, row)) for row in rows]
+            return await cur.fetchall()
     except Exception as e:
         logger.error(f"Error listando insumos bajo stock: {e}", exc_info=True)
-        return []
\ No newline at end of file
+        return []
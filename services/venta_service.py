@@ -1,14 +1,55 @@
 import logging
+from collections import Counter
 from decimal import Decimal
 from fastapi import HTTPException
+from services.receta_cache import recetas
+from services.resumen_service import acumular_venta, acumular_ventas
+from services.pedidos_feed import publicar_pedidos
+from services.stock_service import registrar_movimientos, registrar_movimientos_por_referencia
+from schema.enums import TipoMovInv
+from config.consultas import ConsultaPreparada
+from config.config import settings
 
 logger = logging.getLogger(__name__)
 
+CONSULTA_CLIENTE_EXISTE = ConsultaPreparada(
+    "venta.cliente_existe",
+    "SELECT id_cliente FROM cliente WHERE id_cliente = %s"
+)
+
+CONSULTA_VALIDAR = ConsultaPreparada("venta.validar", """
+    SELECT
+        EXISTS (SELECT 1 FROM usuario WHERE id_usuario = %s)     AS usuario_ok,
+        EXISTS (SELECT 1 FROM estado_venta WHERE id_estado = %s) AS estado_ok,
+        ARRAY(
+            SELECT x.id_producto
+            FROM unnest(%s::int[]) WITH ORDINALITY AS x(id_producto, orden)
+            WHERE NOT EXISTS (
+                SELECT 1 FROM producto p
+                WHERE p.id_producto = x.id_producto AND p.activo = TRUE
+            )
+            ORDER BY x.orden
+        ) AS productos_faltantes
+""")
+
+CONSULTA_INSERTAR_VENTA = ConsultaPreparada("venta.insertar", """
+    INSERT INTO venta (id_usuario, id_cliente, id_estado, metodo_pago, fecha)
+    VALUES (%s, %s, %s, %s, NOW())
+    RETURNING id_venta, fecha
+""")
+
+CONSULTA_INSERTAR_DETALLES = ConsultaPreparada("venta.insertar_detalles", """
+    INSERT INTO detalle_venta (id_venta, fecha_venta, id_producto, cantidad, precio_unitario)
+    SELECT %s, %s, d.id_producto, d.cantidad, d.precio_unitario
+    FROM unnest(%s::int[], %s::int[], %s::numeric[])
+         AS d(id_producto, cantidad, precio_unitario)
+""")
+
 
 async def _obtener_o_crear_cliente(cur, id_cliente=None, nombre_cliente=None, nit_cliente=None):
 
     if id_cliente:
-        await cur.execute("SELECT id_cliente FROM cliente WHERE id_cliente = %s", (id_cliente,))
+        await CONSULTA_CLIENTE_EXISTE.ejecutar(cur, (id_cliente,))
         if not await cur.fetchone():
             raise HTTPException(status_code=404, detail=f"Cliente con id {id_cliente} no encontrado")
         return id_cliente
@@ -29,10 +70,18 @@ async def _obtener_o_crear_cliente(cur, id_cliente=None, nombre_cliente=None, ni
 
 
 async def _validar_prerequisitos(cur, id_usuario, id_estado, detalles):
+    """
+    Valida usuario, estado y productos de la venta en una sola consulta.
+    Si hay productos inexistentes o inactivos, reporta el primero según
+    el orden de los detalles.
+    """
+    ids_producto = [d["id_producto"] for d in detalles]
+
+    await CONSULTA_VALIDAR.ejecutar(cur, (id_usuario, id_estado, ids_producto))
+    validacion = await cur.fetchone()
 
     # 1. Validar usuario
-    await cur.execute("SELECT id_usuario FROM usuario WHERE id_usuario = %s", (id_usuario,))
-    if not await cur.fetchone():
+    if not validacion["usuario_ok"]:
         raise HTTPException(
             status_code=404,
             detail=f"Usuario con id {id_usuario} no encontrado. "
@@ -40,26 +89,35 @@ async def _validar_prerequisitos(cur, id_usuario, id_estado, detalles):
         )
 
     # 2. Validar estado de venta
-    await cur.execute("SELECT id_estado FROM estado_venta WHERE id_estado = %s", (id_estado,))
-    if not await cur.fetchone():
+    if not validacion["estado_ok"]:
         raise HTTPException(
             status_code=404,
             detail=f"Estado de venta con id {id_estado} no encontrado. "
                    f"Los estados disponibles son: 1=COMPLETADA, 2=CANCELADA, 3=PENDIENTE."
         )
 
-    # 3. Validar cada producto
-    for d in detalles:
-        await cur.execute(
-            "SELECT id_producto, nombre FROM producto WHERE id_producto = %s AND activo = TRUE",
-            (d["id_producto"],)
+    # 3. Validar productos
+    if validacion["productos_faltantes"]:
+        id_producto = validacion["productos_faltantes"][0]
+        raise HTTPException(
+            status_code=404,
+            detail=f"Producto con id {id_producto} no encontrado o inactivo. "
+                   f"Créalo primero con POST /producto/."
         )
-        if not await cur.fetchone():
-            raise HTTPException(
-                status_code=404,
-                detail=f"Producto con id {d['id_producto']} no encontrado o inactivo. "
-                       f"Créalo primero con POST /producto/."
-            )
+
+
+async def _insertar_detalles(cur, id_venta, fecha, detalles):
+    """Inserta todas las líneas de la venta en una sola sentencia."""
+    await CONSULTA_INSERTAR_DETALLES.ejecutar(
+        cur,
+        (
+            id_venta,
+            fecha,
+            [d["id_producto"] for d in detalles],
+            [d["cantidad"] for d in detalles],
+            [Decimal(str(d["precio_unitario"])) for d in detalles],
+        )
+    )
 
 
 async def registrar_venta(conn, id_usuario, id_cliente, id_estado, metodo_pago, detalles,
@@ -83,40 +141,24 @@ async def registrar_venta(conn, id_usuario, id_cliente, id_estado, metodo_pago,
         )
 
         # 4. Insertar venta
-        await cur.execute(
-            """
-            INSERT INTO venta (id_usuario, id_cliente, id_estado, metodo_pago, fecha)
-            VALUES (%s, %s, %s, %s, NOW())
-            RETURNING id_venta
-            """,
-            (id_usuario, id_cliente_final, id_estado, metodo_pago)
-        )
+        await CONSULTA_INSERTAR_VENTA.ejecutar(cur, (id_usuario, id_cliente_final, id_estado, metodo_pago))
         row = await cur.fetchone()
         id_venta = row["id_venta"]
 
-        # 5. Insertar detalles y restar stock según receta
-        for d in detalles:
-            await cur.execute(
-                """
-                INSERT INTO detalle_venta (id_venta, id_producto, cantidad, precio_unitario)
-                VALUES (%s, %s, %s, %s)
-                """,
-                (id_venta, d["id_producto"], d["cantidad"], d["precio_unitario"])
-            )
+        # 5. Insertar detalles y registrar el consumo de insumos según receta
+        await _insertar_detalles(cur, id_venta, row["fecha"], detalles)
+        consumo = await recetas.consumo(conn, detalles)
+        await registrar_movimientos(
+            cur, TipoMovInv.VENTA_CONSUMO.value,
+            {id_insumo: -cantidad for id_insumo, cantidad in consumo.items()},
+            id_referencia=id_venta
+        )
 
-            # Descontar stock de insumos según receta
-            await cur.execute(
-                "SELECT id_insumo, cantidad FROM receta WHERE id_producto = %s",
-                (d["id_producto"],)
-            )
-            receta = await cur.fetchall()
+        # 6. Acumular en el resumen diario (misma transacción)
+        await acumular_venta(cur, id_venta)
 
-            for insumo in receta:
-                cant_total = Decimal(str(insumo["cantidad"])) * Decimal(str(d["cantidad"]))
-                await cur.execute(
-                    "UPDATE insumo SET stock = stock - %s WHERE id_insumo = %s",
-                    (cant_total, insumo["id_insumo"])
-                )
+        # 7. Avisar a las pantallas de pedidos (se entrega al hacer commit)
+        await publicar_pedidos(cur, [id_venta])
 
         await conn.commit()
         return {
@@ -133,4 +175,246 @@ async def registrar_venta(conn, id_usuario, id_cliente, id_estado, metodo_pago,
     except Exception as e:
         await conn.rollback()
         logger.error(f"Error al registrar venta: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+def _motivo_rechazo(v, validos) -> str | None:
+    """Primer problema de una venta del lote frente a los ids válidos, o None si está bien."""
+    if not v["detalles"]:
+        return "Detalles requeridos"
+    if v["id_usuario"] not in validos["usuarios"]:
+        return f"Usuario con id {v['id_usuario']} no encontrado"
+    if v["id_estado"] not in validos["estados"]:
+        return f"Estado de venta con id {v['id_estado']} no encontrado"
+    if v.get("id_cliente"):
+        if v["id_cliente"] not in validos["clientes"]:
+            return f"Cliente con id {v['id_cliente']} no encontrado"
+    elif not v.get("nombre_cliente"):
+        return "Se requiere id_cliente o nombre_cliente para registrar la venta"
+    ids_producto = [d["id_producto"] for d in v["detalles"]]
+    for id_producto in ids_producto:
+        if id_producto not in validos["productos"]:
+            return f"Producto con id {id_producto} no encontrado o inactivo"
+    if len(set(ids_producto)) != len(ids_producto):
+        return "Producto repetido en la venta; agrupa las cantidades en una sola línea"
+    # Lo mismo que chk_dv_cantidad / chk_dv_precio_unitario: si llegara al INSERT
+    # haría fallar todo el lote
+    for d in v["detalles"]:
+        if d["cantidad"] <= 0:
+            return f"Cantidad inválida para el producto {d['id_producto']}; debe ser mayor a 0"
+        if d["precio_unitario"] <= 0:
+            return f"Precio unitario inválido para el producto {d['id_producto']}; debe ser mayor a 0"
+    return None
+
+
+async def _reservar_ids(cur, tabla, columna, cantidad) -> list[int]:
+    """Toma `cantidad` valores de la secuencia de la tabla para insertar varias filas con id conocido."""
+    if not cantidad:
+        return []
+    await cur.execute(
+        "SELECT nextval(pg_get_serial_sequence(%s, %s)) AS id FROM generate_series(1, %s)",
+        (tabla, columna, cantidad)
+    )
+    return [row["id"] for row in await cur.fetchall()]
+
+
+async def _insertar_lote(cur, conn, ventas, nuevas, resultados):
+    # 1. Reclamar los id_local. ON CONFLICT cubre el mismo lote reenviado en
+    #    paralelo: esas ventas no vuelven de RETURNING y se reportan como duplicadas
+    ids_venta = dict(zip(nuevas, await _reservar_ids(cur, "venta", "id_venta", len(nuevas))))
+    await cur.execute(
+        """
+        INSERT INTO venta_local (id_local, id_venta)
+        SELECT * FROM unnest(%s::uuid[], %s::int[])
+        ON CONFLICT (id_local) DO NOTHING
+        RETURNING id_venta
+        """,
+        ([ventas[i]["id_local"] for i in nuevas], [ids_venta[i] for i in nuevas])
+    )
+    insertadas = {row["id_venta"] for row in await cur.fetchall()}
+    a_insertar = [i for i in nuevas if ids_venta[i] in insertadas]
+
+    # Las que perdió contra el otro envío ya están confirmadas: tomar su id_venta
+    perdidas = [i for i in nuevas if ids_venta[i] not in insertadas]
+    if perdidas:
+        await cur.execute(
+            "SELECT id_local, id_venta FROM venta_local WHERE id_local = ANY(%s::uuid[])",
+            ([ventas[i]["id_local"] for i in perdidas],)
+        )
+        registradas = {row["id_local"]: row["id_venta"] for row in await cur.fetchall()}
+        for i in perdidas:
+            resultados[i].update(estado="duplicada", id_venta=registradas.get(ventas[i]["id_local"]))
+
+    # 2. Clientes nuevos, solo para las ventas reclamadas que no traen id_cliente
+    sin_cliente = [i for i in a_insertar if not ventas[i].get("id_cliente")]
+    ids_cliente = dict(zip(sin_cliente, await _reservar_ids(cur, "cliente", "id_cliente", len(sin_cliente))))
+    if sin_cliente:
+        await cur.execute(
+            """
+            INSERT INTO cliente (id_cliente, nombre, nit, activo)
+            SELECT c.id_cliente, c.nombre, c.nit, TRUE
+            FROM unnest(%s::int[], %s::text[], %s::text[]) AS c(id_cliente, nombre, nit)
+            """,
+            (
+                [ids_cliente[i] for i in sin_cliente],
+                [ventas[i]["nombre_cliente"] for i in sin_cliente],
+                [ventas[i].get("nit_cliente") for i in sin_cliente],
+            )
+        )
+
+    # 3. Cabeceras
+    await cur.execute(
+        """
+        INSERT INTO venta (id_venta, id_usuario, id_cliente, id_estado, metodo_pago, fecha)
+        SELECT v.id_venta, v.id_usuario, v.id_cliente, v.id_estado, v.metodo_pago,
+               COALESCE(v.fecha, NOW())
+        FROM unnest(%s::int[], %s::int[], %s::int[], %s::int[], %s::text[], %s::timestamp[])
+             AS v(id_venta, id_usuario, id_cliente, id_estado, metodo_pago, fecha)
+        RETURNING id_venta, fecha
+        """,
+        (
+            [ids_venta[i] for i in a_insertar],
+            [ventas[i]["id_usuario"] for i in a_insertar],
+            [ventas[i].get("id_cliente") or ids_cliente[i] for i in a_insertar],
+            [ventas[i]["id_estado"] for i in a_insertar],
+            [ventas[i]["metodo_pago"] for i in a_insertar],
+            [ventas[i].get("fecha") for i in a_insertar],
+        )
+    )
+    fechas = {row["id_venta"]: row["fecha"] for row in await cur.fetchall()}
+
+    # 4. Detalles de todas las ventas insertadas en una sola sentencia
+    lineas = [
+        (ids_venta[i], d)
+        for i in a_insertar
+        for d in ventas[i]["detalles"]
+    ]
+    if lineas:
+        await cur.execute(
+            """
+            INSERT INTO detalle_venta (id_venta, fecha_venta, id_producto, cantidad, precio_unitario)
+            SELECT d.id_venta, d.fecha_venta, d.id_producto, d.cantidad, d.precio_unitario
+            FROM unnest(%s::int[], %s::timestamp[], %s::int[], %s::int[], %s::numeric[])
+                 AS d(id_venta, fecha_venta, id_producto, cantidad, precio_unitario)
+            """,
+            (
+                [id_venta for id_venta, _ in lineas],
+                [fechas[id_venta] for id_venta, _ in lineas],
+                [d["id_producto"] for _, d in lineas],
+                [d["cantidad"] for _, d in lineas],
+                [Decimal(str(d["precio_unitario"])) for _, d in lineas],
+            )
+        )
+
+        # 5. Consumo de insumos de cada venta con su id_venta como referencia,
+        #    todo el lote en una sola sentencia
+        consumos = {}
+        for i in a_insertar:
+            consumo = await recetas.consumo(conn, ventas[i]["detalles"])
+            consumos[ids_venta[i]] = {id_insumo: -cantidad for id_insumo, cantidad in consumo.items()}
+        await registrar_movimientos_por_referencia(cur, TipoMovInv.VENTA_CONSUMO.value, consumos)
+
+        # 6. Resumen diario y aviso a las pantallas de pedidos
+        await acumular_ventas(cur, sorted(insertadas))
+        await publicar_pedidos(cur, sorted(insertadas))
+
+    for i in a_insertar:
+        total = sum(
+            Decimal(str(d["cantidad"])) * Decimal(str(d["precio_unitario"]))
+            for d in ventas[i]["detalles"]
+        )
+        resultados[i].update(estado="registrada", id_venta=ids_venta[i], total=float(total))
+
+
+async def registrar_lote(conn, ventas):
+    """
+    Registra ventas encoladas por el POS mientras no tenía conexión.
+
+    Cada venta trae `id_local` (UUID generado por el POS): las que ya fueron
+    registradas (reintentos) o vienen repetidas en el lote se reportan como
+    'duplicada' sin volver a insertarse. Las inválidas se reportan como
+    'rechazada' con el motivo y no impiden registrar el resto.
+
+    Todo el lote se valida con una consulta y se escribe con inserciones
+    multi-fila; el consumo de insumos queda en el ledger por venta, en una sola sentencia.
+    """
+    if not ventas:
+        raise HTTPException(status_code=400, detail="Ventas requeridas")
+    if len(ventas) > settings.venta_lote_max:
+        raise HTTPException(
+            status_code=400,
+            detail=f"El lote admite hasta {settings.venta_lote_max} ventas; divide el envío."
+        )
+
+    resultados: list[dict] = [{"id_local": v["id_local"]} for v in ventas]
+    primera: dict = {}   # id_local -> índice de su primera aparición en el lote
+    for i, v in enumerate(ventas):
+        primera.setdefault(v["id_local"], i)
+
+    try:
+        cur = conn.cursor()
+
+        # 1. Ventas ya sincronizadas en un envío anterior
+        await cur.execute(
+            "SELECT id_local, id_venta FROM venta_local WHERE id_local = ANY(%s::uuid[])",
+            (list(primera),)
+        )
+        ya_registradas = {row["id_local"]: row["id_venta"] for row in await cur.fetchall()}
+
+        # 2. Validar usuarios, estados, clientes y productos de todo el lote a la vez
+        await cur.execute(
+            """
+            SELECT
+                ARRAY(SELECT id_usuario FROM usuario WHERE id_usuario = ANY(%s::int[]))      AS usuarios,
+                ARRAY(SELECT id_estado FROM estado_venta WHERE id_estado = ANY(%s::int[]))   AS estados,
+                ARRAY(SELECT id_cliente FROM cliente WHERE id_cliente = ANY(%s::int[]))      AS clientes,
+                ARRAY(SELECT id_producto FROM producto
+                      WHERE id_producto = ANY(%s::int[]) AND activo = TRUE)                  AS productos
+            """,
+            (
+                list({v["id_usuario"] for v in ventas}),
+                list({v["id_estado"] for v in ventas}),
+                list({v["id_cliente"] for v in ventas if v.get("id_cliente")}),
+                list({d["id_producto"] for v in ventas for d in v["detalles"]}),
+            )
+        )
+        validos = {k: set(val) for k, val in (await cur.fetchone()).items()}
+
+        nuevas = []   # índices de las ventas a insertar
+        for i, v in enumerate(ventas):
+            if primera[v["id_local"]] != i or v["id_local"] in ya_registradas:
+                resultados[i]["estado"] = "duplicada"
+                continue
+            motivo = _motivo_rechazo(v, validos)
+            if motivo:
+                resultados[i].update(estado="rechazada", error=motivo)
+                continue
+            nuevas.append(i)
+
+        if nuevas:
+            await _insertar_lote(cur, conn, ventas, nuevas, resultados)
+
+        await conn.commit()
+
+    except HTTPException:
+        await conn.rollback()
+        raise
+    except Exception as e:
+        await conn.rollback()
+        logger.error(f"Error al registrar lote de ventas: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+    # Las duplicadas apuntan a la venta ya registrada
+    for i, v in enumerate(ventas):
+        if resultados[i]["estado"] == "duplicada":
+            resultados[i]["id_venta"] = (
+                ya_registradas.get(v["id_local"]) or resultados[primera[v["id_local"]]].get("id_venta")
+            )
+
+    conteo = Counter(r["estado"] for r in resultados)
+    logger.info(f"Lote de ventas sincronizado: {dict(conteo)}")
+    return {
+        "registradas": conteo["registrada"],
+        "duplicadas": conteo["duplicada"],
+        "rechazadas": conteo["rechazada"],
+        "resultados": resultados,
+    }
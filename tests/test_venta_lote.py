@@ -0,0 +1,60 @@
+"""
+POST /venta/lote contra la base configurada (variables de entorno de
+config/config.py). Se salta si no hay conexión.
+"""
+import uuid
+import psycopg
+import pytest
+from fastapi.testclient import TestClient
+from config.conexionDB import DB_URL
+
+
+def _hay_base() -> bool:
+    try:
+        psycopg.connect(DB_URL, connect_timeout=3).close()
+        return True
+    except psycopg.OperationalError:
+        return False
+
+
+pytestmark = pytest.mark.skipif(not _hay_base(), reason="sin conexión a la base de datos")
+
+
+@pytest.fixture(scope="module")
+def cliente():
+    import main
+    with TestClient(main.app) as c:
+        yield c
+
+
+def _venta(cantidad=1, precio_unitario=10.0):
+    return {
+        "id_local": str(uuid.uuid4()),
+        "id_usuario": 1,
+        "id_cliente": 1,
+        "id_estado": 1,
+        "metodo_pago": "EFECTIVO",
+        "detalles": [{"id_producto": 1, "cantidad": cantidad, "precio_unitario": precio_unitario}],
+    }
+
+
+def test_linea_invalida_no_bloquea_el_lote(cliente):
+    ventas = [_venta(), _venta(cantidad=0), _venta(precio_unitario=0), _venta()]
+    r = cliente.post("/venta/lote", json={"ventas": ventas})
+
+    assert r.status_code == 200
+    cuerpo = r.json()
+    estados = [res["estado"] for res in cuerpo["resultados"]]
+    assert estados == ["registrada", "rechazada", "rechazada", "registrada"]
+    assert cuerpo["registradas"] == 2 and cuerpo["rechazadas"] == 2
+    for res in (cuerpo["resultados"][0], cuerpo["resultados"][3]):
+        assert cliente.get(f"/venta/{res['id_venta']}").status_code == 200
+
+
+def test_reenvio_devuelve_la_venta_registrada(cliente):
+    ventas = [_venta()]
+    primera = cliente.post("/venta/lote", json={"ventas": ventas}).json()["resultados"][0]
+    segunda = cliente.post("/venta/lote", json={"ventas": ventas}).json()["resultados"][0]
+
+    assert segunda["estado"] == "duplicada"
+    assert segunda["id_venta"] == primera["id_venta"]